@@ -1,24 +1,65 @@
+import asyncio
+import logging
 import os
+import secrets
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
 from itsdangerous import URLSafeTimedSerializer
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.password_hashing import (
+    BCRYPT_MAX_COST,
+    hash_in_pool,
+    verify_and_update_in_pool,
+    verify_in_pool,
+)
+from app.schemas import UserResponse
+from app.session_db import DatabaseSessionStore
+from app.session_store import (
+    SessionInfo,
+    SessionStore,
+    StatelessSessionStore,
+    create_session_store,
+)
+from app.session_touch import SESSION_SLIDING_EXPIRATION, SessionTouchBuffer, flush_touches
+from app.user_cache import get_cached_user
+
+logger = logging.getLogger(__name__)
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt cost factor configuration
+# - BCRYPT_ROUNDS: fixed cost factor (skips calibration)
+# - BCRYPT_TARGET_MS: per-hash latency budget; the cost is calibrated at startup
+# - Neither set: passlib's default cost, stored hashes are never rehashed
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_TARGET_MS = os.getenv("BCRYPT_TARGET_MS")
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+
+# Cost factor currently in use (None = passlib default)
+bcrypt_rounds: int | None = None
+
 # Session serializer
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
 session_serializer = URLSafeTimedSerializer(SECRET_KEY)
 
-# In-memory session storage (TODO: use Redis in production)
-# Format: {session_id: {"user_id": int, "created_at": datetime}}
-sessions: dict[str, dict[str, Any]] = {}
-
-# Session expiration time (7 days)
+# Session expiration time (7 days since the last request, see app.session_touch)
 SESSION_EXPIRATION = timedelta(days=7)
 
+# Session storage (in-memory, Redis or stateless, see app.session_store)
+session_store: SessionStore = create_session_store(session_serializer, SESSION_EXPIRATION)
+
+# Sliding expiration: coalesced, write-behind touches (see app.session_touch).
+# Stateless tokens cannot be extended.
+session_touches = SessionTouchBuffer(
+    enabled=SESSION_SLIDING_EXPIRATION and not isinstance(session_store, StatelessSessionStore)
+)
+
 
 def hash_password(password: str) -> str:
     """
@@ -47,6 +88,146 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)  # type: ignore[no-any-return]
 
 
+def _time_bcrypt_hash(rounds: int) -> float:
+    """Measure the time (ms) of one bcrypt hash with the given cost factor."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    start = time.perf_counter()
+    context.hash("calibration-password")
+    return (time.perf_counter() - start) * 1000
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Find the highest bcrypt cost factor whose hash time fits a budget.
+
+    Each extra round doubles the hash time, so the search stops as soon as
+    the next cost would exceed the budget. Never returns less than
+    ``min_rounds``, even if that cost is already over budget.
+
+    Args:
+        target_ms: Per-hash latency budget in milliseconds
+        min_rounds: Lowest acceptable cost factor
+        max_rounds: Highest cost factor to consider
+
+    Returns:
+        Selected cost factor
+    """
+    rounds = min_rounds
+    elapsed_ms = _time_bcrypt_hash(rounds)
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms = _time_bcrypt_hash(rounds)
+        if elapsed_ms > target_ms:
+            rounds -= 1
+            break
+
+    logger.info(f"bcrypt cost calibrated to {rounds} rounds (budget {target_ms:.0f} ms)")
+    return rounds
+
+
+def set_bcrypt_rounds(rounds: int | None) -> None:
+    """
+    Set the bcrypt cost factor used for new hashes.
+
+    Stored hashes with a lower cost are reported by
+    ``pwd_context.needs_update`` and rehashed on the next successful login.
+    Stronger hashes are kept: the cost is calibrated per instance, and
+    instances on different CPUs must not rewrite (or weaken) each other's
+    hashes.
+
+    Args:
+        rounds: Cost factor, or None to go back to passlib's default
+    """
+    global bcrypt_rounds
+    bcrypt_rounds = rounds
+    config: dict[str, Any] = {"schemes": ["bcrypt"], "deprecated": "auto"}
+    if rounds is not None:
+        # Only a floor: hashes are upgraded, never downgraded
+        config.update(
+            bcrypt__rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=BCRYPT_MAX_COST,
+        )
+    pwd_context.load(config)
+
+
+def configure_password_hashing() -> None:
+    """
+    Apply the bcrypt cost configuration (called at startup).
+
+    Uses BCRYPT_ROUNDS if set (no calibration), otherwise calibrates against
+    BCRYPT_TARGET_MS. Does nothing when neither is set. Calibration hashes
+    synchronously: call it from a thread in async code.
+    """
+    if BCRYPT_ROUNDS:
+        set_bcrypt_rounds(int(BCRYPT_ROUNDS))
+    elif BCRYPT_TARGET_MS:
+        set_bcrypt_rounds(calibrate_bcrypt_rounds(float(BCRYPT_TARGET_MS)))
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password using bcrypt in the password hashing process pool.
+
+    Use this from request handlers so hashing does not block the event loop
+    or hold the GIL of the API process.
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Hashed password
+
+    Raises:
+        PasswordHashQueueFullError: If the hashing queue is full
+    """
+    return await hash_in_pool(password, bcrypt_rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash in the password hashing process pool.
+
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Hashed password to compare against
+
+    Returns:
+        True if password matches, False otherwise
+
+    Raises:
+        PasswordHashQueueFullError: If the hashing queue is full
+    """
+    return await verify_in_pool(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and rehash it if its cost factor is outdated.
+
+    Both steps run in a single job of the password hashing process pool.
+
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Stored hash to compare against
+
+    Returns:
+        (valid, new_hash): new_hash is the replacement hash to store, or None
+
+    Raises:
+        PasswordHashQueueFullError: If the hashing queue is full
+    """
+    if bcrypt_rounds is None:
+        return await verify_in_pool(plain_password, hashed_password), None
+    return await verify_and_update_in_pool(plain_password, hashed_password, bcrypt_rounds)
+
+
 def create_session(user_id: int) -> str:
     """
     Create a new session for a user.
@@ -57,24 +238,41 @@ def create_session(user_id: int) -> str:
     Returns:
         Session ID (signed token)
     """
-    # Create session data
+    # Create session data (jti identifies the token for revocation)
     session_data = {
         "user_id": user_id,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": datetime.utcnow().isoformat(),
+        "jti": secrets.token_urlsafe(12)
     }
 
     # Generate signed session ID
     session_id = session_serializer.dumps(session_data)
 
-    # Store session in memory
-    sessions[session_id] = {
-        "user_id": user_id,
-        "created_at": datetime.utcnow()
-    }
+    # Store session (expires after SESSION_EXPIRATION)
+    session_store.create(session_id, user_id, SESSION_EXPIRATION)
+    session_touches.mark_fresh(session_id)
 
     return session_id
 
 
+async def create_session_async(user_id: int) -> str:
+    """
+    Create a new session for a user, from async code.
+
+    Blocking session stores (Redis, database) are written from a worker
+    thread so the event loop keeps serving other requests.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        Session ID (signed token)
+    """
+    if session_store.blocking_io:
+        return await asyncio.to_thread(create_session, user_id)
+    return create_session(user_id)
+
+
 def get_user_from_session(session_id: str) -> int | None:
     """
     Get user ID from session.
@@ -85,21 +283,62 @@ def get_user_from_session(session_id: str) -> int | None:
     Returns:
         User ID if session is valid, None otherwise
     """
-    # Check if session exists in memory
-    if session_id not in sessions:
-        return None
+    # Expired sessions are treated (and cleaned up) as missing by the store
+    return session_store.get(session_id)
+
+
+async def get_session_user(db: AsyncSession, session_id: str) -> UserResponse | None:
+    """
+    Resolve a session ID to a snapshot of its user.
 
-    session_data = sessions[session_id]
-    created_at: datetime = session_data["created_at"]
+    With the database backend this is one JOIN query; otherwise a session
+    store lookup followed by a (cached) user lookup. Blocking store lookups
+    (Redis) run in a worker thread.
 
-    # Check if session has expired
-    if datetime.utcnow() - created_at > SESSION_EXPIRATION:
-        # Session expired, delete it
-        delete_session(session_id)
+    Args:
+        db: Database session of the request
+        session_id: Session ID to validate
+
+    Returns:
+        User snapshot if the session is valid and the user exists, None otherwise
+    """
+    if isinstance(session_store, DatabaseSessionStore):
+        user = await session_store.get_user_async(db, session_id)
+        return UserResponse.model_validate(user) if user is not None else None
+
+    if session_store.blocking_io:
+        user_id = await asyncio.to_thread(session_store.get, session_id)
+    else:
+        user_id = session_store.get(session_id)
+    if not user_id:
         return None
+    return await get_cached_user(db, user_id)
+
+
+def touch_session(session_id: str) -> bool:
+    """
+    Extend a session to SESSION_EXPIRATION from now (sliding expiration).
+
+    The touch is coalesced and written to the store in the background.
+
+    Args:
+        session_id: Session ID of an authenticated request
 
-    user_id: int = session_data["user_id"]
-    return user_id
+    Returns:
+        True if the session will be extended (refresh the cookie),
+        False if it was extended recently or sliding expiration is off
+    """
+    return session_touches.record(session_id)
+
+
+def flush_session_touches() -> int:
+    """
+    Write buffered session touches to the session store.
+
+    Returns:
+        Number of sessions extended
+    """
+    return flush_touches(session_touches, session_store, SESSION_EXPIRATION)
 
 
 def delete_session(session_id: str) -> bool:
@@ -112,7 +351,45 @@ def delete_session(session_id: str) -> bool:
     Returns:
         True if session was deleted, False if it didn't exist
     """
-    if session_id in sessions:
-        del sessions[session_id]
-        return True
-    return False
+    return session_store.delete(session_id)
+
+
+def list_user_sessions(user_id: int) -> list[SessionInfo]:
+    """
+    List the live sessions of a user.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        Sessions of the user, oldest first
+    """
+    return session_store.list_user_sessions(user_id)
+
+
+def delete_user_session(user_id: int, handle: str) -> bool:
+    """
+    Delete one session of a user by its handle.
+
+    Args:
+        user_id: ID of the user
+        handle: Session handle (see ``list_user_sessions``)
+
+    Returns:
+        True if session was deleted, False if it didn't exist
+    """
+    return session_store.delete_user_session(user_id, handle)
+
+
+def delete_user_sessions(user_id: int, keep_session_id: str | None = None) -> int:
+    """
+    Delete every session of a user (log out everywhere).
+
+    Args:
+        user_id: ID of the user
+        keep_session_id: Session ID to keep logged in
+
+    Returns:
+        Number of sessions deleted
+    """
+    return session_store.delete_user_sessions(user_id, keep_session_id)
@@ -0,0 +1,201 @@
+"""
+Database connection pool configuration and metrics.
+
+Both engines (sync and async, see ``app.database``) get their pool from
+``engine_options``:
+- Postgres: an instrumented queue pool sized by the settings below, with
+  ``pool_pre_ping`` (drops connections Cloud SQL closed while idle) and
+  ``pool_recycle`` (replaces connections before server/proxy timeouts)
+- SQLite file: an instrumented queue pool, so connections are reused
+  instead of reopened per request (aiosqlite defaults to NullPool); no
+  pre-ping or recycle, a local file has no idle timeout
+- SQLite in-memory: ``StaticPool``, one connection shared by every thread
+  (each new connection would be a new, empty database)
+
+Each process can open up to 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+connections (one pool per engine), so WEB_CONCURRENCY x that must stay
+below the database's connection limit; ``check_pool_budget`` logs it at
+startup.
+
+Read replicas (``app.db_replicas``) get one async pool each, sized the
+same; they count against their own server's limit, not the primary's.
+
+Metrics (``<engine>`` is "db_pool", "db_async_pool" or "db_replica<n>_pool"):
+- ``<engine>_checkout_wait_ms``: time to get a connection from the pool
+- ``<engine>_in_use``: connections currently checked out
+- ``<engine>_overflow_total``: connections opened beyond DB_POOL_SIZE
+- ``<engine>_timeouts_total``: checkouts that gave up after DB_POOL_TIMEOUT
+
+Configuration (environment variables):
+- DB_POOL_SIZE: connections kept open per engine (default: 5)
+- DB_MAX_OVERFLOW: extra connections allowed under load (default: 10)
+- DB_POOL_TIMEOUT: seconds to wait for a connection before failing (default: 30)
+- DB_POOL_RECYCLE: max connection age in seconds, -1 disables (default: 1800)
+- DB_POOL_PRE_PING: "false" skips the liveness check on checkout (default: "true")
+- WEB_CONCURRENCY: worker processes per instance (default: 1)
+- DB_MAX_CONNECTIONS: database connection limit, for the startup check (optional)
+"""
+
+import logging
+import os
+import time
+from typing import Any
+
+from sqlalchemy import exc, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool, StaticPool
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+DB_MAX_CONNECTIONS = os.getenv("DB_MAX_CONNECTIONS")
+
+
+class PoolMetrics:
+    """Metrics of one connection pool, registered under ``prefix``."""
+
+    def __init__(self, prefix: str):
+        self.checkout_wait = metrics.histogram(
+            f"{prefix}_checkout_wait_ms", "Time to get a connection from the pool"
+        )
+        self.in_use = metrics.gauge(f"{prefix}_in_use", "Connections currently checked out")
+        self.overflow_total = metrics.counter(
+            f"{prefix}_overflow_total", "Connections opened beyond the pool size"
+        )
+        self.timeouts_total = metrics.counter(
+            f"{prefix}_timeouts_total", "Checkouts that timed out waiting for a connection"
+        )
+
+
+class _InstrumentedPoolMixin:
+    """Times checkouts and tracks overflow/in-use counts of a queue pool."""
+
+    pool_metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        overflow_before = self._overflow  # type: ignore[attr-defined]
+        try:
+            entry = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.pool_metrics.timeouts_total.inc()
+            raise
+        finally:
+            self.pool_metrics.checkout_wait.observe((time.perf_counter() - start) * 1000)
+        # _overflow starts at -pool_size: only increments above 0 are overflow
+        if self._overflow > max(overflow_before, 0):  # type: ignore[attr-defined]
+            self.pool_metrics.overflow_total.inc()
+        self.pool_metrics.in_use.set(self.checkedout())  # type: ignore[attr-defined]
+        return entry
+
+    def _do_return_conn(self, record: Any) -> None:
+        super()._do_return_conn(record)  # type: ignore[misc]
+        self.pool_metrics.in_use.set(self.checkedout())  # type: ignore[attr-defined]
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """``QueuePool`` reporting ``db_pool_*`` metrics."""
+
+    pool_metrics = PoolMetrics("db_pool")
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` reporting ``db_async_pool_*`` metrics."""
+
+    pool_metrics = PoolMetrics("db_async_pool")
+
+
+def replica_pool_class(index: int) -> type[Pool]:
+    """
+    Pool class of the read replica number ``index``.
+
+    Each replica gets its own class so its metrics are its own.
+
+    Args:
+        index: Position of the replica in DATABASE_REPLICA_URLS
+
+    Returns:
+        ``AsyncAdaptedQueuePool`` subclass reporting ``db_replica<index>_pool_*`` metrics
+    """
+    return type(
+        f"InstrumentedReplicaPool{index}",
+        (_InstrumentedPoolMixin, AsyncAdaptedQueuePool),
+        {"pool_metrics": PoolMetrics(f"db_replica{index}_pool")},
+    )
+
+
+def engine_options(
+    url: str, is_async: bool = False, pool_class: type[Pool] | None = None
+) -> dict[str, Any]:
+    """
+    Pool (and connect) arguments for ``create_engine``/``create_async_engine``.
+
+    Args:
+        url: Database URL
+        is_async: True for the async engine
+        pool_class: Queue pool class to use instead of the engine's default
+
+    Returns:
+        Keyword arguments for the engine factory
+    """
+    parsed = make_url(url)
+    options: dict[str, Any] = {}
+    if pool_class is None:
+        pool_class = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite needs check_same_thread=False for FastAPI (threadpool)
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            options["poolclass"] = StaticPool
+            return options
+        options.update(
+            poolclass=pool_class,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+        return options
+
+    options.update(
+        poolclass=pool_class,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def check_pool_budget(engines: int = 2) -> int:
+    """
+    Log the max connections this instance can open (called at startup).
+
+    Warns when it exceeds DB_MAX_CONNECTIONS.
+
+    Args:
+        engines: Number of pooled engines per process
+
+    Returns:
+        Max connections of the instance
+    """
+    per_process = engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    total = WEB_CONCURRENCY * per_process
+    logger.info(
+        f"DB pools: up to {per_process} connections per process, "
+        f"{total} for {WEB_CONCURRENCY} worker(s)"
+    )
+    if DB_MAX_CONNECTIONS and total > int(DB_MAX_CONNECTIONS):
+        logger.warning(
+            f"DB pools can open {total} connections, above DB_MAX_CONNECTIONS="
+            f"{DB_MAX_CONNECTIONS}: lower DB_POOL_SIZE/DB_MAX_OVERFLOW or WEB_CONCURRENCY"
+        )
+    return total
@@ -0,0 +1,154 @@
+"""
+Read replicas for read-only endpoints.
+
+DATABASE_REPLICA_URLS (see ``app.database``) lists read replicas of the
+primary database. Read-only endpoints (``/api/auth/me``, the dashboard)
+take their session from ``get_read_db``, which uses the next healthy
+replica in round-robin order, so read spikes don't compete with login and
+signup writes on the primary. Without replicas, reads use the primary.
+
+Health: a replica whose connection fails is skipped for
+REPLICA_RETRY_INTERVAL seconds; the first request after that tries it
+again. With no healthy replica, reads fall back to the primary.
+
+Read-your-writes: replicas lag behind the primary, so a client that just
+wrote (signup, login, Google sign-in/linking) could read stale data (or
+miss its new session with SESSION_BACKEND=database) on its next request.
+Those routes call ``ReplicaRouter.mark_read_primary``, which sets a
+short-lived cookie; requests carrying it read from the primary for
+READ_YOUR_WRITES_WINDOW seconds. A cookie rather than server state, so it
+works across instances.
+
+To try it locally, point DATABASE_REPLICA_URLS at copies of a SQLite
+database (``sqlite:////tmp/replica1.db,sqlite:////tmp/replica2.db``) or at
+other local Postgres instances; tests/test_db_replicas.py does the former.
+
+Configuration (environment variables):
+- REPLICA_RETRY_INTERVAL: seconds a failed replica is skipped (default: 30)
+- READ_YOUR_WRITES_WINDOW: seconds a client reads from the primary after a
+  write; keep it above the replication lag (default: 10)
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from collections.abc import Sequence
+
+from fastapi import Response
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+REPLICA_RETRY_INTERVAL = float(os.getenv("REPLICA_RETRY_INTERVAL", "30"))
+READ_YOUR_WRITES_WINDOW = int(os.getenv("READ_YOUR_WRITES_WINDOW", "10"))
+
+# Cookie sending a client's reads to the primary right after it wrote
+READ_PRIMARY_COOKIE = "read_primary"
+
+# Metrics
+replica_reads_total = metrics.counter(
+    "db_replica_reads_total", "Read-only requests served by a replica"
+)
+primary_reads_total = metrics.counter(
+    "db_primary_reads_total", "Read-only requests served by the primary"
+)
+replica_failures_total = metrics.counter(
+    "db_replica_failures_total", "Replica connection failures (replica skipped)"
+)
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the healthy read replicas.
+
+    Args:
+        engines: Async engines of the replicas
+        retry_interval: Seconds a failed replica is skipped
+    """
+
+    def __init__(
+        self, engines: Sequence[AsyncEngine], retry_interval: float = REPLICA_RETRY_INTERVAL
+    ):
+        self.engines = list(engines)
+        self.retry_interval = retry_interval
+        # {engine index: monotonic time until which it is skipped}
+        self._down_until: dict[int, float] = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> list[AsyncEngine]:
+        """
+        Healthy replicas, starting with the next one in round-robin order.
+
+        Returns:
+            Engines to try in order (empty if none is healthy)
+        """
+        if not self.engines:
+            return []
+        now = time.monotonic()
+        start = next(self._next)
+        count = len(self.engines)
+        return [
+            self.engines[(start + i) % count]
+            for i in range(count)
+            if self._down_until.get((start + i) % count, 0) <= now
+        ]
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        """Skip ``engine`` for ``retry_interval`` seconds."""
+        replica_failures_total.inc()
+        with self._lock:
+            self._down_until[self.engines.index(engine)] = time.monotonic() + self.retry_interval
+        logger.warning(
+            f"Read replica {engine.url.render_as_string(hide_password=True)} failed, "
+            f"skipped for {self.retry_interval:.0f}s"
+        )
+
+    async def connect(self) -> AsyncConnection | None:
+        """
+        Open a connection to the next healthy replica.
+
+        Replicas that fail to connect are marked down and the next one is
+        tried.
+
+        Returns:
+            Connection (caller closes it), or None if no replica is available
+        """
+        for engine in self.candidates():
+            try:
+                return await engine.connect()
+            except (DBAPIError, OSError):
+                self.mark_down(engine)
+        return None
+
+    async def dispose(self) -> None:
+        """Close the connection pools of every replica."""
+        for engine in self.engines:
+            await engine.dispose()
+
+    def mark_read_primary(self, response: Response) -> None:
+        """
+        Send the client's reads to the primary for READ_YOUR_WRITES_WINDOW seconds.
+
+        Call from routes whose writes the client reads back next. No-op
+        without replicas.
+
+        Args:
+            response: Response of the writing request
+        """
+        if self.engines:
+            response.set_cookie(
+                key=READ_PRIMARY_COOKIE,
+                value="1",
+                max_age=READ_YOUR_WRITES_WINDOW,
+                httponly=True,
+                samesite="lax",
+            )
+
+    def __len__(self) -> int:
+        return len(self.engines)
@@ -1,15 +1,32 @@
+import asyncio
+import contextlib
 import logging
 import os
+import secrets
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import FileResponse
 
-from app.database import Base, engine
+from app import metrics, startup
+from app.auth import (
+    configure_password_hashing,
+    flush_session_touches,
+    session_store,
+    session_touches,
+)
+from app.database import async_engine, engine, replica_router
+from app.db_pool import check_pool_budget
+from app.password_hashing import password_pool
 from app.routers import auth, dashboard
+from app.schema_version import prepare_schema
+from app.session_persistence import SESSION_PERSIST_DIR, attach_journal, run_journal_flusher
+from app.session_store import InMemorySessionStore, run_session_sweeper
+from app.session_touch import run_touch_flusher
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,8 +38,17 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for FastAPI application.
     Handles startup and shutdown events.
     """
-    # Startup: create database tables and validate environment variables
-    Base.metadata.create_all(bind=engine)
+    # Startup: check (or apply) the DB schema version and validate environment variables
+    db_started_at = time.perf_counter()
+    await prepare_schema(engine, async_engine)
+    startup.record_db(db_started_at)
+
+    # Log how many DB connections this instance may open
+    check_pool_budget()
+
+    # Pick the bcrypt cost factor (fixed or calibrated to a latency budget);
+    # calibration hashes for up to a few seconds, off the event loop
+    await asyncio.to_thread(configure_password_hashing)
 
     # Validate Google OAuth configuration
     if not os.getenv("GOOGLE_CLIENT_ID"):
@@ -36,8 +62,31 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("Google OAuth não está totalmente configurado")
 
+    # Remove expired sessions in the background
+    background_tasks = [asyncio.create_task(run_session_sweeper(session_store))]
+
+    # Write sliding-expiration touches in batches
+    if session_touches.enabled:
+        background_tasks.append(asyncio.create_task(run_touch_flusher(flush_session_touches)))
+
+    # Restore in-memory sessions from disk (off the event loop) and keep journaling them
+    if SESSION_PERSIST_DIR and isinstance(session_store, InMemorySessionStore):
+        journal = await asyncio.to_thread(attach_journal, session_store, SESSION_PERSIST_DIR)
+        background_tasks.append(asyncio.create_task(run_journal_flusher(journal, session_store)))
+
+    startup.record_ready()
     yield
-    # Shutdown: cleanup if needed (currently none)
+
+    # Shutdown: stop background tasks (final session snapshot included),
+    # password hashing worker processes and async DB connections (replicas included)
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    password_pool.shutdown()
+    await async_engine.dispose()
+    await replica_router.dispose()
 
 
 # Create FastAPI app with lifespan handler
@@ -52,6 +101,9 @@ app = FastAPI(
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
+# Log when the first response of this instance is sent (cold start timing)
+app.add_middleware(startup.FirstRequestTimer)
+
 
 # CORS not needed - same origin in production, Vite proxy in dev
 
@@ -76,6 +128,38 @@ def health_check():
     }
 
 
+# Metrics endpoint (in-process counters, gauges and latency histograms).
+# Opt-in: served only when METRICS_TOKEN is set, to requests sending
+# "Authorization: Bearer <METRICS_TOKEN>" (the counters reveal login
+# rejections and session activity)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@app.get("/metrics", tags=["health"])
+def get_metrics(authorization: str | None = Header(None)):
+    """
+    Expose in-process metrics as JSON.
+
+    Args:
+        authorization: "Bearer <METRICS_TOKEN>"
+
+    Returns:
+        dict: {metric_name: metric snapshot} for this worker process
+
+    Raises:
+        HTTPException 404: If METRICS_TOKEN is not set
+        HTTPException 401: If the token is missing or wrong
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {METRICS_TOKEN}".encode()
+    if authorization is None or not secrets.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"}
+        )
+    return metrics.snapshot()
+
+
 # Include routers (API routes must come before static files)
 app.include_router(auth.router)
 app.include_router(dashboard.router)
@@ -100,3 +184,7 @@ if STATIC_DIR.exists() and STATIC_DIR.is_dir():
 
         # Fallback to index.html for SPA routing
         return FileResponse(STATIC_DIR / "index.html")
+
+
+# End of the import phase of the cold start
+startup.record_import()
@@ -0,0 +1,168 @@
+"""
+Lightweight in-process metrics.
+
+This module provides minimal counters, gauges and latency histograms.
+Other modules register their metrics at import time and the values are
+exposed as a JSON snapshot by the ``/metrics`` endpoint (see ``app.main``;
+only served when METRICS_TOKEN is set).
+
+Metrics are per process: with several uvicorn workers each one reports
+its own numbers.
+"""
+
+import threading
+from typing import Any
+
+# Default histogram buckets in milliseconds (upper bounds)
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """Value that can go up and down (queue depth, live sessions, etc.)."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value: float = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram for latencies in milliseconds.
+
+    Keeps count, sum, max and cumulative bucket counts, which is enough
+    to estimate averages and percentiles without storing samples.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS_MS,
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    return
+            self._counts[-1] += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            buckets: dict[str, int] = {}
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts, strict=False):
+                cumulative += count
+                buckets[f"le_{bound}"] = cumulative
+            buckets["le_inf"] = cumulative + self._counts[-1]
+            return {
+                "type": "histogram",
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "avg": round(self._sum / self._count, 3) if self._count else 0.0,
+                "max": round(self._max, 3),
+                "buckets": buckets,
+            }
+
+
+# Global registry: {metric_name: metric}
+_registry: dict[str, Counter | Gauge | Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric_cls: type, name: str, description: str, **kwargs: Any) -> Any:
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = metric_cls(name, description, **kwargs)
+            _registry[name] = metric
+        elif not isinstance(metric, metric_cls):
+            raise ValueError(f"Metric {name} already registered with another type")
+        return metric
+
+
+def counter(name: str, description: str = "") -> Counter:
+    """Get or create a counter registered under ``name``."""
+    return _register(Counter, name, description)  # type: ignore[no-any-return]
+
+
+def gauge(name: str, description: str = "") -> Gauge:
+    """Get or create a gauge registered under ``name``."""
+    return _register(Gauge, name, description)  # type: ignore[no-any-return]
+
+
+def histogram(
+    name: str, description: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS_MS
+) -> Histogram:
+    """Get or create a latency histogram (milliseconds) registered under ``name``."""
+    return _register(Histogram, name, description, buckets=buckets)  # type: ignore[no-any-return]
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    """
+    Return the current value of every registered metric.
+
+    Returns:
+        dict: {metric_name: metric snapshot}
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.snapshot() for metric in sorted(metrics, key=lambda m: m.name)}
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+)
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -31,3 +41,107 @@ class User(Base):
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
+
+
+class UserSession(Base):
+    """
+    Login session stored in the database (SESSION_BACKEND=database).
+
+    Attributes:
+        id: ``session_key`` of the session ID (16-byte digest, the token itself
+            is never stored)
+        user_id: Session owner
+        expires_at: Expiration as epoch seconds (indexed for purges)
+        created_at: Timestamp of session creation
+    """
+    __tablename__ = "sessions"
+
+    id = Column(LargeBinary(16), primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    expires_at = Column(BigInteger, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<UserSession(user_id={self.user_id}, expires_at={self.expires_at})>"
+
+
+class SalesEvent(Base):
+    """
+    One sale of a user (raw event, append-only).
+
+    The dashboard chart never reads this table: it reads ``DailySales``,
+    updated in the same transaction as each insert (see ``app.sales``).
+
+    Attributes:
+        id: Primary key
+        user_id: Seller
+        occurred_at: When the sale happened
+        amount_cents: Sale amount in cents
+    """
+    __tablename__ = "sales_events"
+    __table_args__ = (Index("ix_sales_events_user_id_occurred_at", "user_id", "occurred_at"),)
+
+    # BIGINT on Postgres; INTEGER on SQLite, where only INTEGER primary keys autoincrement
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<SalesEvent(user_id={self.user_id}, occurred_at={self.occurred_at})>"
+
+
+class DailySales(Base):
+    """
+    Per-user daily rollup of ``SalesEvent`` (one row per user and UTC day).
+
+    Attributes:
+        user_id: Seller
+        day: UTC day
+        event_count: Number of sales that day
+        amount_cents: Total amount of the day in cents
+    """
+    __tablename__ = "daily_sales"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    event_count = Column(Integer, nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<DailySales(user_id={self.user_id}, day={self.day})>"
+
+
+class Product(Base):
+    """
+    Product of a user, listed in the dashboard table.
+
+    The composite indexes match the table endpoint's queries (see
+    ``app.products``): per user, optionally per status, ordered by the sort
+    column with ``id`` as tie-breaker.
+
+    Attributes:
+        id: Primary key
+        user_id: Owner
+        nome: Product name
+        status: "Ativo", "Pendente" or "Inativo"
+        valor_cents: Price in cents
+    """
+    __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_user_valor", "user_id", "valor_cents", "id"),
+        Index("ix_products_user_nome", "user_id", "nome", "id"),
+        Index("ix_products_user_status_valor", "user_id", "status", "valor_cents", "id"),
+        Index("ix_products_user_status_nome", "user_id", "status", "nome", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    nome = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    valor_cents = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<Product(id={self.id}, nome={self.nome})>"
@@ -0,0 +1,239 @@
+"""
+Process pool for password hashing.
+
+bcrypt is CPU bound and holds the GIL while it runs, so hashing inside the
+request threadpool slows down every other request in the same process.
+This module runs hash/verify calls in a ``ProcessPoolExecutor`` and exposes
+them as awaitables, with a bounded number of pending jobs and metrics for
+queue depth and latency.
+
+Configuration (environment variables):
+- PASSWORD_HASH_WORKERS: number of worker processes (default: CPUs available
+  to the container per its cgroup quota, at most 2: every uvicorn worker
+  starts its own pool). Use 0 to run hashing in the default threadpool
+  instead (no extra processes).
+- PASSWORD_HASH_MAX_PENDING: max jobs queued or running at once (default: 64).
+  Extra jobs are rejected with ``PasswordHashQueueFullError``.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from passlib.context import CryptContext
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default cap of PASSWORD_HASH_WORKERS
+DEFAULT_MAX_WORKERS = 2
+
+
+def available_cpus(cgroup_root: Path = Path("/sys/fs/cgroup")) -> int:
+    """
+    Number of CPUs this process may use, honoring the cgroup CPU quota.
+
+    The quota is rounded up; without one, the CPUs the process is allowed to
+    run on are counted. ``os.cpu_count()`` reports the host's CPUs, far more than a 1-2 vCPU
+    container (Cloud Run) can use.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Number of CPUs (at least 1)
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = (cgroup_root / "cpu.max").read_text().split()[:2]
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota -1 means unlimited
+            quota = (cgroup_root / "cpu" / "cpu.cfs_quota_us").read_text().strip()
+            period = (cgroup_root / "cpu" / "cpu.cfs_period_us").read_text().strip()
+        except OSError:
+            quota = period = "max"
+    if quota not in ("max", "-1"):
+        with contextlib.suppress(ValueError, ZeroDivisionError):
+            cpus = min(cpus or 1, math.ceil(int(quota) / int(period)))
+    return max(cpus or 1, 1)
+
+
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS") or min(available_cpus(), DEFAULT_MAX_WORKERS)
+)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Highest bcrypt cost factor. passlib treats a missing max_rounds as equal to
+# min_rounds, which would flag every stronger hash as outdated
+BCRYPT_MAX_COST = 31
+
+# Metrics
+queue_depth = metrics.gauge(
+    "password_hash_queue_depth", "Password hash jobs queued or running"
+)
+rejected_total = metrics.counter(
+    "password_hash_rejected_total", "Password hash jobs rejected because the queue was full"
+)
+hash_latency = metrics.histogram(
+    "password_hash_latency_ms", "Time to hash a password, including queue wait"
+)
+verify_latency = metrics.histogram(
+    "password_verify_latency_ms", "Time to verify a password, including queue wait"
+)
+
+
+class PasswordHashQueueFullError(Exception):
+    """Raised when too many password hash jobs are already pending."""
+
+
+# ---------------------------------------------------------------------------
+# Worker functions (run inside the pool processes, must be picklable)
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=8)
+def _worker_context(rounds: int | None) -> CryptContext:
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # Only a floor: weaker hashes need update, stronger ones are kept
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=BCRYPT_MAX_COST,
+    )
+
+
+def hash_in_worker(password: str, rounds: int | None = None) -> str:
+    """Hash a password with bcrypt (executed in a worker process)."""
+    return _worker_context(rounds).hash(password)  # type: ignore[no-any-return]
+
+
+def verify_in_worker(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a bcrypt hash (executed in a worker process)."""
+    return _worker_context(None).verify(plain_password, hashed_password)  # type: ignore[no-any-return]
+
+
+def verify_and_update_in_worker(
+    plain_password: str, hashed_password: str, rounds: int | None = None
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and rehash it if its cost is below ``rounds``.
+
+    Returns:
+        (valid, new_hash): new_hash is None when no rehash is needed
+    """
+    return _worker_context(rounds).verify_and_update(  # type: ignore[no-any-return]
+        plain_password, hashed_password
+    )
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+class PasswordHashPool:
+    """
+    Bounded, lazily started pool for password hashing jobs.
+
+    Args:
+        workers: Number of worker processes (0 = use the default threadpool)
+        max_pending: Max number of jobs queued or running at the same time
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor | None:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process with running threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Password hash pool started with {self.workers} workers")
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``func(*args)`` in the pool and wait for the result.
+
+        Raises:
+            PasswordHashQueueFullError: If ``max_pending`` jobs are already pending
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                rejected_total.inc()
+                raise PasswordHashQueueFullError("Password hashing queue is full")
+            self._pending += 1
+            queue_depth.set(self._pending)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                queue_depth.set(self._pending)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def shutdown(self) -> None:
+        """Stop worker processes (a new pool is started on next use)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_in_pool(password: str, rounds: int | None = None) -> str:
+    """Hash a password in the pool, recording latency."""
+    start = time.perf_counter()
+    hashed: str = await password_pool.run(hash_in_worker, password, rounds)
+    hash_latency.observe((time.perf_counter() - start) * 1000)
+    return hashed
+
+
+async def verify_in_pool(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the pool, recording latency."""
+    start = time.perf_counter()
+    valid: bool = await password_pool.run(verify_in_worker, plain_password, hashed_password)
+    verify_latency.observe((time.perf_counter() - start) * 1000)
+    return valid
+
+
+async def verify_and_update_in_pool(
+    plain_password: str, hashed_password: str, rounds: int | None = None
+) -> tuple[bool, str | None]:
+    """Verify (and possibly rehash) a password in the pool, recording latency."""
+    start = time.perf_counter()
+    result: tuple[bool, str | None] = await password_pool.run(
+        verify_and_update_in_worker, plain_password, hashed_password, rounds
+    )
+    verify_latency.observe((time.perf_counter() - start) * 1000)
+    return result
@@ -0,0 +1,170 @@
+"""
+Keyset-paginated product table of the dashboard.
+
+Accounts can have tens of thousands of products, so the table is served in
+pages. Pages are found with keyset pagination instead of OFFSET: the cursor
+holds the (sort value, id) of the last row of the previous page and the
+next page is ``WHERE (sort_column, id) > (:value, :id) ORDER BY sort_column,
+id LIMIT n``. With the composite indexes of ``Product`` (per user,
+optionally per status, then sort column and id) every page is an index
+range scan of ``n`` rows, however deep; OFFSET reads and discards every
+row before the page. ``benchmarks.table_pagination`` compares both.
+
+``id`` breaks ties between equal sort values, so no row is skipped or
+repeated across pages.
+
+Cursors are opaque (URL-safe base64 of JSON) and tied to the sort, order
+and status filter they were issued for; any other use raises
+``InvalidCursorError``.
+"""
+
+import base64
+import binascii
+import json
+from functools import cache
+from typing import Any, Literal
+
+from sqlalchemy import Column, Select, bindparam, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+
+Sort = Literal["valor", "nome"]
+Order = Literal["asc", "desc"]
+Status = Literal["Ativo", "Pendente", "Inativo"]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_SORT_COLUMNS: dict[str, Column[Any]] = {"valor": Product.valor_cents, "nome": Product.nome}
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a malformed cursor or one issued for another query."""
+
+
+def encode_cursor(sort: Sort, order: Order, status: Status | None, key: Any, row_id: int) -> str:
+    """
+    Build the cursor pointing after a row.
+
+    Args:
+        sort: Sort of the query
+        order: Order of the query
+        status: Status filter of the query
+        key: Sort value of the row
+        row_id: ID of the row
+
+    Returns:
+        Opaque cursor
+    """
+    payload = json.dumps([sort, order, status, key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, sort: Sort, order: Order, status: Status | None
+) -> tuple[Any, int]:
+    """
+    Read a cursor issued for the same sort, order and status filter.
+
+    Args:
+        cursor: Cursor from a previous page
+        sort: Sort of the query
+        order: Order of the query
+        status: Status filter of the query
+
+    Returns:
+        (sort value, id) of the last row of the previous page
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or from another query
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_sort, cursor_order, cursor_status, key, row_id = payload
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if (cursor_sort, cursor_order, cursor_status) != (sort, order, status):
+        raise InvalidCursorError("Cursor was issued for another sort or filter")
+    if not isinstance(row_id, int) or not isinstance(key, int if sort == "valor" else str):
+        raise InvalidCursorError("Malformed cursor")
+    return key, row_id
+
+
+@cache
+def _page_query(sort: Sort, order: Order, filtered: bool, after: bool) -> Select[Any]:
+    """
+    Build the page query of a sort, order and filter combination (once).
+
+    Args:
+        sort: Sort column
+        order: Sort order
+        filtered: Whether the query filters on status (bindparam "status")
+        after: Whether the query starts after a cursor (bindparams "key", "after_id")
+
+    Returns:
+        Select of a page of products (bindparams "user_id", "limit")
+    """
+    column = _SORT_COLUMNS[sort]
+    query = select(
+        Product.id, Product.nome, Product.status, Product.valor_cents, column.label("sort_key")
+    ).where(Product.user_id == bindparam("user_id"))
+    if filtered:
+        query = query.where(Product.status == bindparam("status"))
+    if after:
+        position = tuple_(column, Product.id)
+        last = tuple_(bindparam("key"), bindparam("after_id"))
+        query = query.where(position > last if order == "asc" else position < last)
+    if order == "asc":
+        query = query.order_by(column.asc(), Product.id.asc())
+    else:
+        query = query.order_by(column.desc(), Product.id.desc())
+    return query.limit(bindparam("limit"))
+
+
+async def product_page(
+    db: AsyncSession,
+    user_id: int,
+    sort: Sort = "valor",
+    order: Order = "asc",
+    status: Status | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """
+    Load a page of a user's products.
+
+    Args:
+        db: Database session
+        user_id: Owner
+        sort: Sort column ("valor" or "nome")
+        order: Sort order
+        status: Only products with this status (all when None)
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page (first page when None)
+
+    Returns:
+        ``{"items": [...], "next_cursor": str | None}``; items have the
+        ``table_data`` shape (``id``, ``nome``, ``status``, ``valor``)
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or from another query
+    """
+    params: dict[str, Any] = {"user_id": user_id, "status": status, "limit": limit + 1}
+    if cursor is not None:
+        params["key"], params["after_id"] = decode_cursor(cursor, sort, order, status)
+    query = _page_query(sort, order, status is not None, cursor is not None)
+    rows = (await db.execute(query, params)).all()
+
+    # One extra row tells whether there is a next page
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, order, status, rows[-1].sort_key, rows[-1].id)
+    return {
+        "items": [
+            {"id": row.id, "nome": row.nome, "status": row.status, "valor": row.valor_cents / 100}
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,275 @@
+"""
+Token-bucket rate limiting for login attempts.
+
+Every login attempt costs a full bcrypt verification, so attempts are
+throttled per email and per client IP *before* any DB query or hash runs.
+
+Buckets live in a pluggable ``TokenBucketStore``:
+- ``InMemoryTokenBucketStore``: per process, O(1) updates, bounded memory
+  (least recently used keys are evicted once ``max_keys`` is reached)
+- ``RedisTokenBucketStore``: shared by every worker/instance (atomic Lua script)
+
+Configuration (environment variables):
+- LOGIN_RATE_LIMIT_ENABLED: "false" disables throttling (default: "true")
+- LOGIN_EMAIL_BURST / LOGIN_EMAIL_PER_MINUTE: bucket size and refill per email
+- LOGIN_IP_BURST / LOGIN_IP_PER_MINUTE: bucket size and refill per client IP
+- LOGIN_RATE_LIMIT_MAX_KEYS: max buckets kept by the in-memory store
+- RATE_LIMIT_REDIS_URL: use the Redis store instead of the in-memory one
+- TRUSTED_PROXY_HOPS: proxies in front of the app that append the client
+  address to ``X-Forwarded-For`` (default: 0 = use the peer address). Cloud
+  Run's front end is one hop: without it every client shares the front
+  end's address, and the per-IP limit becomes one global login cap
+"""
+
+import asyncio
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import Request
+
+from app import metrics
+
+LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "5"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "20"))
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+# Metrics
+rejected_email_total = metrics.counter(
+    "login_rate_limited_email_total", "Login attempts rejected by the per-email limit"
+)
+rejected_ip_total = metrics.counter(
+    "login_rate_limited_ip_total", "Login attempts rejected by the per-IP limit"
+)
+
+
+def client_address(request: Request, trusted_hops: int | None = None) -> str | None:
+    """
+    Address of the client, as seen by the first trusted proxy.
+
+    Each trusted proxy appends the address it received the request from to
+    ``X-Forwarded-For``, so the client is the ``trusted_hops``-th entry from
+    the right. Entries further left are sent by the client and can be
+    forged: they are ignored.
+
+    Args:
+        request: Incoming request
+        trusted_hops: Proxies in front of the app (0 = use the peer address,
+            default: TRUSTED_PROXY_HOPS)
+
+    Returns:
+        Client address, or None if unknown
+    """
+    if trusted_hops is None:
+        trusted_hops = TRUSTED_PROXY_HOPS
+    peer = request.client.host if request.client else None
+    if trusted_hops <= 0:
+        return peer
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    if len(forwarded) < trusted_hops:
+        # Not (fully) proxied: fall back to the peer
+        return peer
+    return forwarded[-trusted_hops]
+
+
+class TokenBucketStore(ABC):
+    """Storage backend for token buckets."""
+
+    # True if operations wait on the network: async code must run them in a
+    # worker thread instead of on the event loop
+    blocking_io = False
+
+    @abstractmethod
+    def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """
+        Take one token from the bucket identified by ``key``.
+
+        Args:
+            key: Bucket key (e.g. "email:user@example.com")
+            capacity: Max tokens in the bucket (burst size)
+            refill_per_second: Tokens added per second
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every bucket."""
+
+
+class InMemoryTokenBucketStore(TokenBucketStore):
+    """
+    Per-process token buckets with LRU eviction.
+
+    Args:
+        max_keys: Max number of buckets kept (least recently used are evicted)
+    """
+
+    def __init__(self, max_keys: int = LOGIN_RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # {key: [tokens, last_refill_monotonic]}, ordered by last use
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(capacity), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / refill_per_second
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] = bucket key; ARGV = capacity, refill_per_second, now (seconds)
+# Returns the wait in milliseconds (0 = token taken)
+_REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return wait
+"""
+
+
+class RedisTokenBucketStore(TokenBucketStore):
+    """
+    Token buckets shared across workers and instances through Redis.
+
+    Each bucket is a hash updated atomically by a Lua script; idle buckets
+    expire once they would be full again, so memory stays bounded.
+
+    Args:
+        client: redis-py client (``redis.Redis``)
+        prefix: Key prefix for bucket hashes
+    """
+
+    blocking_io = True
+
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(_REDIS_TAKE_SCRIPT)
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        wait_ms = self._take(
+            keys=[self.prefix + key], args=[capacity, refill_per_second, time.time()]
+        )
+        return int(wait_ms) / 1000
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class LoginRateLimiter:
+    """
+    Per-email and per-IP throttling for login attempts.
+
+    Args:
+        store: Bucket storage backend
+        enabled: When False every attempt is allowed
+    """
+
+    def __init__(self, store: TokenBucketStore, enabled: bool = LOGIN_RATE_LIMIT_ENABLED):
+        self.store = store
+        self.enabled = enabled
+
+    def check(self, email: str, client_ip: str | None) -> float:
+        """
+        Consume one attempt for the client IP and for the email.
+
+        Args:
+            email: Email from the login request
+            client_ip: Client IP address (None if unknown)
+
+        Returns:
+            0.0 if the attempt is allowed, otherwise seconds to wait (Retry-After)
+        """
+        if not self.enabled:
+            return 0.0
+
+        if client_ip:
+            wait = self.store.take(f"ip:{client_ip}", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60)
+            if wait:
+                rejected_ip_total.inc()
+                return wait
+
+        wait = self.store.take(
+            f"email:{email.lower()}", LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE / 60
+        )
+        if wait:
+            rejected_email_total.inc()
+        return wait
+
+    async def check_async(self, email: str, client_ip: str | None) -> float:
+        """
+        ``check`` from async code.
+
+        Blocking stores (Redis) are called from a worker thread so the event
+        loop keeps serving other requests.
+
+        Args:
+            email: Email from the login request
+            client_ip: Client IP address (None if unknown)
+
+        Returns:
+            0.0 if the attempt is allowed, otherwise seconds to wait (Retry-After)
+        """
+        if self.enabled and self.store.blocking_io:
+            return await asyncio.to_thread(self.check, email, client_ip)
+        return self.check(email, client_ip)
+
+
+def _create_store() -> TokenBucketStore:
+    if RATE_LIMIT_REDIS_URL:
+        import redis
+
+        return RedisTokenBucketStore(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+    return InMemoryTokenBucketStore()
+
+
+login_rate_limiter = LoginRateLimiter(_create_store())
@@ -0,0 +1,243 @@
+"""
+Per-user cache of serialized responses, with ETags (conditional GET).
+
+The frontend refetches the dashboard data on every navigation, and each
+call rebuilt and re-serialized the same JSON. Responses built from a user's
+data are kept here as the serialized body plus a strong ETag (hash of the
+body), tagged with the version of the data they were built from:
+- a request whose ``If-None-Match`` matches the cached ETag gets a 304 with
+  no body: nothing is recomputed, serialized or sent
+- any other request for the same version gets the cached bytes as is
+- a response cached for another version is rebuilt
+
+Versions: ``data_version(user_id)`` is a per-user counter, bumped by
+``invalidate(user_id)`` wherever that user's data changes. Endpoints add
+whatever else their payload depends on (e.g. the current date) to the
+version they pass to ``get``/``put``. The TTL bounds staleness for changes
+made by other instances.
+
+Metrics: ``response_cache_hits_total``, ``response_cache_misses_total``,
+``response_cache_hit_ratio``, ``response_cache_not_modified_total`` (304s),
+``response_cache_bytes_saved_total`` (body bytes not sent thanks to 304s)
+and ``response_cache_bytes`` (cached body bytes).
+
+Configuration (environment variables):
+- RESPONSE_CACHE_ENABLED: "false" disables the cache, ETags still work (default: "true")
+- RESPONSE_CACHE_MAX_SIZE: max cached responses, least recently used are evicted (default: 10000)
+- RESPONSE_CACHE_TTL: seconds a cached response stays valid (default: 300)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, NamedTuple
+
+from fastapi import Request, Response
+
+from app import metrics
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# Metrics
+cache_hits_total = metrics.counter(
+    "response_cache_hits_total", "Responses served from the response cache"
+)
+cache_misses_total = metrics.counter(
+    "response_cache_misses_total", "Responses rebuilt and serialized"
+)
+cache_hit_ratio = metrics.gauge("response_cache_hit_ratio", "Share of responses served from cache")
+not_modified_total = metrics.counter(
+    "response_cache_not_modified_total", "Conditional requests answered with 304"
+)
+bytes_saved_total = metrics.counter(
+    "response_cache_bytes_saved_total", "Response body bytes not sent thanks to 304s"
+)
+cache_bytes = metrics.gauge("response_cache_bytes", "Bytes of cached response bodies")
+
+
+class CachedResponse(NamedTuple):
+    """Serialized response body and its strong ETag."""
+
+    body: bytes
+    etag: str
+
+
+def make_entry(payload: Any) -> CachedResponse:
+    """
+    Serialize a JSON payload and compute its ETag.
+
+    Args:
+        payload: JSON-serializable payload
+
+    Returns:
+        Body and strong ETag (quoted hash of the body)
+    """
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    return CachedResponse(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check ``If-None-Match`` against ``etag`` (weak comparison, as RFC 9110 asks).
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's copy is current (answer 304)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses keyed by (user, name), with versions and a TTL.
+
+    Args:
+        max_size: Max number of responses kept (least recently used are evicted)
+        ttl: Seconds a response stays valid
+        enabled: When False every lookup is a miss and nothing is stored
+    """
+
+    def __init__(
+        self,
+        max_size: int = RESPONSE_CACHE_MAX_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        # {(user_id, name): (expires_at_monotonic, version, response)}, ordered by last use
+        self._entries: OrderedDict[
+            tuple[int, str], tuple[float, Hashable, CachedResponse]
+        ] = OrderedDict()
+        # {user_id: data version}, bumped by invalidate()
+        self._versions: dict[int, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def data_version(self, user_id: int) -> int:
+        """Current version of a user's data (changes on ``invalidate``)."""
+        return self._versions.get(user_id, 0)
+
+    def get(self, user_id: int, name: str, version: Hashable) -> CachedResponse | None:
+        """
+        Get a cached response.
+
+        Args:
+            user_id: ID of the user the response belongs to
+            name: Name of the response (e.g. "dashboard_data")
+            version: Version of the data the caller would build it from
+
+        Returns:
+            Cached response if fresh and built from ``version``, None otherwise
+        """
+        now = time.monotonic()
+        key = (user_id, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end(key)
+                cache_hits_total.inc()
+                self._update_ratio()
+                return entry[2]
+            if entry is not None:
+                self._drop(key)
+            cache_misses_total.inc()
+            self._update_ratio()
+        return None
+
+    def put(
+        self, user_id: int, name: str, version: Hashable, response: CachedResponse
+    ) -> CachedResponse:
+        """
+        Cache a response built from ``version`` of the user's data.
+
+        Args:
+            user_id: ID of the user the response belongs to
+            name: Name of the response
+            version: Version of the data it was built from
+            response: Serialized response (see ``make_entry``)
+
+        Returns:
+            The response
+        """
+        if self.enabled:
+            key = (user_id, name)
+            with self._lock:
+                self._drop(key)
+                self._entries[key] = (time.monotonic() + self.ttl, version, response)
+                self._bytes += len(response.body)
+                if len(self._entries) > self.max_size:
+                    self._drop(next(iter(self._entries)))
+                cache_bytes.set(self._bytes)
+        return response
+
+    def invalidate(self, user_id: int) -> None:
+        """Bump the user's data version, so their cached responses are rebuilt."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            cache_bytes.set(0)
+
+    def _drop(self, key: tuple[int, str]) -> None:
+        """Remove an entry (lock held)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2].body)
+
+    def _update_ratio(self) -> None:
+        hits = cache_hits_total.value
+        total = hits + cache_misses_total.value
+        cache_hit_ratio.set(hits / total if total else 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def cached_json_response(
+    request: Request, cached: CachedResponse, sub_response: Response | None = None
+) -> Response:
+    """
+    Build the response for a cached body: 304 if the client has it, 200 otherwise.
+
+    Args:
+        request: Incoming request (for ``If-None-Match``)
+        cached: Serialized body and ETag
+        sub_response: Response injected into the route, whose headers (cookies
+            set by dependencies) are copied over
+
+    Returns:
+        Response to return from the route
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, cached.etag):
+        not_modified_total.inc()
+        bytes_saved_total.inc(len(cached.body))
+        response = Response(status_code=304, headers=headers)
+    else:
+        response = Response(cached.body, media_type="application/json", headers=headers)
+    if sub_response is not None:
+        response.headers.raw.extend(sub_response.headers.raw)
+    return response
@@ -1,20 +1,31 @@
+import math
 import os
+from datetime import UTC, datetime
 
 from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import (
-    create_session,
+    create_session_async,
     delete_session,
+    delete_user_session,
+    delete_user_sessions,
+    get_session_user,
     get_user_from_session,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    list_user_sessions,
+    touch_session,
+    verify_and_update_password_async,
 )
-from app.database import get_db
-from app.models import User
+from app.database import get_async_db, get_read_db, replica_router
 from app.oauth import GOOGLE_REDIRECT_URI, get_google_oauth_client, get_google_user_info
-from app.schemas import UserLogin, UserResponse, UserSignup
+from app.password_hashing import PasswordHashQueueFullError
+from app.rate_limit import client_address, login_rate_limiter
+from app.schemas import SessionResponse, UserLogin, UserResponse, UserSignup
+from app.session_store import session_handle
+from app.user_cache import user_cache
+from app.user_repository import get_user_by_email, insert_user, upsert_google_user
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -25,9 +36,45 @@ COOKIE_MAX_AGE = 60 * 60 * 24 * 7  # 7 days in seconds
 # Environment detection (same logic as main.py health check)
 IS_PRODUCTION = os.getenv("ENVIRONMENT", "development") == "production"
 
+# Seconds suggested to clients when the password hashing queue is full
+HASH_QUEUE_RETRY_AFTER = "1"
+
+
+def _hash_queue_full_error() -> HTTPException:
+    """Build the 503 returned when the password hashing queue is saturated."""
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, please try again",
+        headers={"Retry-After": HASH_QUEUE_RETRY_AFTER},
+    )
+
+
+def refresh_session_cookie(response: Response, session_id: str) -> None:
+    """
+    Extend an authenticated session (sliding expiration).
+
+    The cookie is re-sent only when the session is actually extended, i.e.
+    at most once per SESSION_TOUCH_INTERVAL.
+
+    Args:
+        response: FastAPI Response object to set the cookie on
+        session_id: Session ID of the authenticated request
+    """
+    if touch_session(session_id):
+        response.set_cookie(
+            key=COOKIE_NAME,
+            value=session_id,
+            max_age=COOKIE_MAX_AGE,
+            httponly=True,
+            samesite="lax",
+            secure=IS_PRODUCTION  # HTTPS only in production
+        )
+
 
 @router.post("/signup", response_model=UserResponse, status_code=201)
-def signup(user_data: UserSignup, response: Response, db: Session = Depends(get_db)):
+async def signup(
+    user_data: UserSignup, response: Response, db: AsyncSession = Depends(get_async_db)
+):
     """
     Create a new user account.
 
@@ -41,25 +88,22 @@ def signup(user_data: UserSignup, response: Response, db: Session = Depends(get_
 
     Raises:
         HTTPException 400: If email already registered
+        HTTPException 503: If the password hashing queue is full
     """
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    # Create new user
-    hashed_password = hash_password(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        password_hash=hashed_password
-    )
+    try:
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordHashQueueFullError as e:
+        raise _hash_queue_full_error() from e
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Create the user in one statement; no row back means the email is taken
+    row = await insert_user(db, user_data.email, hashed_password)
+    if row is None:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await db.commit()
+    new_user = user_cache.put(row)
 
     # Create session
-    session_id = create_session(new_user.id)  # type: ignore[arg-type]
+    session_id = await create_session_async(new_user.id)
 
     # Set cookie
     response.set_cookie(
@@ -71,16 +115,28 @@ def signup(user_data: UserSignup, response: Response, db: Session = Depends(get_
         secure=IS_PRODUCTION  # HTTPS only in production
     )
 
+    # Read the new session/user back from the primary (replicas may lag)
+    replica_router.mark_read_primary(response)
+
     return new_user
 
 
 @router.post("/login", response_model=UserResponse)
-def login(credentials: UserLogin, response: Response, db: Session = Depends(get_db)):
+async def login(
+    credentials: UserLogin,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Login with email and password.
 
+    Attempts are throttled per email and per client IP before any DB query
+    or password verification runs.
+
     Args:
         credentials: Login credentials (email, password)
+        request: FastAPI Request object (client IP)
         response: FastAPI Response object to set cookies
         db: Database session
 
@@ -89,18 +145,47 @@ def login(credentials: UserLogin, response: Response, db: Session = Depends(get_
 
     Raises:
         HTTPException 401: If credentials are invalid
+        HTTPException 429: If too many attempts for this email or IP
+        HTTPException 503: If the password hashing queue is full
     """
+    # Throttle before doing any expensive work
+    client_ip = client_address(request)
+    retry_after = await login_rate_limiter.check_async(credentials.email, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await get_user_by_email(db, credentials.email)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    # Verify password
-    if not verify_password(credentials.password, user.password_hash):  # type: ignore[arg-type]
+    # OAuth-only users have no password to verify
+    if not user.password_hash:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    # Verify password (runs in the password hashing process pool)
+    try:
+        valid, new_hash = await verify_and_update_password_async(
+            credentials.password, user.password_hash  # type: ignore[arg-type]
+        )
+    except PasswordHashQueueFullError as e:
+        raise _hash_queue_full_error() from e
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    # Transparently upgrade hashes created with an outdated bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash  # type: ignore[assignment]
+        await db.commit()
+        await db.refresh(user)
+        user_cache.invalidate(user.id)  # type: ignore[arg-type]
+
     # Create session
-    session_id = create_session(user.id)  # type: ignore[arg-type]
+    session_id = await create_session_async(user.id)  # type: ignore[arg-type]
 
     # Set cookie
     response.set_cookie(
@@ -112,6 +197,9 @@ def login(credentials: UserLogin, response: Response, db: Session = Depends(get_
         secure=IS_PRODUCTION  # HTTPS only in production
     )
 
+    # Read the new session/user back from the primary (replicas may lag)
+    replica_router.mark_read_primary(response)
+
     return user
 
 
@@ -138,15 +226,17 @@ def logout(response: Response, session_id: str | None = Cookie(None, alias=COOKI
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     session_id: str | None = Cookie(None, alias=COOKIE_NAME)
 ):
     """
     Get current user from session.
 
     Args:
-        db: Database session
+        response: FastAPI Response object to refresh the session cookie
+        db: Read-only database session (replica when configured)
         session_id: Session ID from cookie
 
     Returns:
@@ -158,18 +248,102 @@ def get_current_user(
     if not session_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    # Get user ID from session
+    # Resolve session -> user (one JOIN with the database backend,
+    # otherwise a session lookup and a cached user lookup)
+    user = await get_session_user(db, session_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+    refresh_session_cookie(response, session_id)
+    return user
+
+
+def _require_session_user(session_id: str | None) -> int:
+    """Return the user ID of the session cookie, or raise 401."""
+    if not session_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
     user_id = get_user_from_session(session_id)
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return user_id
 
-    # Get user from database
-    # TODO isso nao geraria excesso de queris no banco?
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+@router.get("/sessions", response_model=list[SessionResponse])
+def list_sessions(session_id: str | None = Cookie(None, alias=COOKIE_NAME)):
+    """
+    List the active sessions (devices) of the current user.
+
+    Args:
+        session_id: Session ID from cookie
+
+    Returns:
+        Sessions of the current user, oldest first
+
+    Raises:
+        HTTPException 401: If not authenticated
+    """
+    user_id = _require_session_user(session_id)
+    current = session_handle(session_id) if session_id else None
+    return [
+        SessionResponse(
+            id=session.handle,
+            expires_at=datetime.fromtimestamp(session.expires_at, UTC),
+            current=session.handle == current,
+        )
+        for session in list_user_sessions(user_id)
+    ]
+
+
+@router.delete("/sessions/{handle}")
+def revoke_session(
+    handle: str,
+    session_id: str | None = Cookie(None, alias=COOKIE_NAME),
+):
+    """
+    Revoke one session of the current user.
+
+    Args:
+        handle: Session ID as returned by GET /sessions
+        session_id: Session ID from cookie
+
+    Returns:
+        Success message
+
+    Raises:
+        HTTPException 401: If not authenticated
+        HTTPException 404: If the user has no such session
+    """
+    user_id = _require_session_user(session_id)
+    if not delete_user_session(user_id, handle):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session revoked"}
+
+
+@router.delete("/sessions")
+def revoke_all_sessions(
+    response: Response,
+    keep_current: bool = True,
+    session_id: str | None = Cookie(None, alias=COOKIE_NAME),
+):
+    """
+    Log out everywhere: revoke every session of the current user.
+
+    Args:
+        response: FastAPI Response object to clear cookies
+        keep_current: Keep the session making the request logged in
+        session_id: Session ID from cookie
+
+    Returns:
+        Number of revoked sessions
+
+    Raises:
+        HTTPException 401: If not authenticated
+    """
+    user_id = _require_session_user(session_id)
+    revoked = delete_user_sessions(user_id, keep_session_id=session_id if keep_current else None)
+    if not keep_current:
+        response.delete_cookie(key=COOKIE_NAME, samesite="lax")
+    return {"revoked": revoked}
 
 
 @router.get("/google/login")
@@ -204,7 +378,7 @@ async def google_login(request: Request):
 async def google_callback(
     request: Request,
     error: str | None = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handle Google OAuth2 callback.
@@ -272,34 +446,13 @@ async def google_callback(
     email = user_info["email"]
     google_id = user_info["google_id"]
 
-    # Find or create user
-    # 1. Try to find user by google_id
-    user = db.query(User).filter(User.google_id == google_id).first()
-
-    if not user:
-        # 2. If not found, try to find by email (link existing account)
-        user = db.query(User).filter(User.email == email).first()
-
-        if user:
-            # Link existing account with Google
-            user.google_id = google_id  # type: ignore[assignment]
-            user.auth_provider = "google"  # type: ignore[assignment]
-            db.commit()
-            db.refresh(user)
-        else:
-            # 3. Create new user
-            user = User(
-                email=email,
-                auth_provider="google",
-                google_id=google_id,
-                password_hash=None  # OAuth users don't need password
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+    # Find the user by google_id, or link (same email)/create it in one upsert
+    row = await upsert_google_user(db, email, google_id)
+    await db.commit()
+    user = user_cache.put(row)
 
     # Create session
-    session_id = create_session(user.id)  # type: ignore[arg-type]
+    session_id = await create_session_async(user.id)
 
     # Redirect to dashboard with cookie
     # Using 302 (Found) instead of 303 to preserve cookie behavior
@@ -314,4 +467,7 @@ async def google_callback(
         path="/"  # Explicitly set path to ensure cookie is sent to all routes
     )
 
+    # Read the new session/user back from the primary (replicas may lag)
+    replica_router.mark_read_primary(redirect_response)
+
     return redirect_response
@@ -1,98 +1,305 @@
-from datetime import datetime, timedelta
+from collections.abc import Awaitable, Callable
+from typing import Any
 
-from fastapi import APIRouter, Cookie, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import get_user_from_session
-from app.database import get_db
-from app.models import User
+from app.auth import get_session_user
+from app.database import get_async_db, get_read_db, read_session, replica_router
+from app.products import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    Order,
+    Sort,
+    Status,
+    product_page,
+)
+from app.response_cache import cached_json_response, make_entry, response_cache
+from app.routers.auth import refresh_session_cookie
+from app.sales import CHART_RANGES, record_sales, sales_chart, utc_today
+from app.schemas import SalesIn, UserResponse
+from app.table_export import MEDIA_TYPES, ExportFormat, ExportTable, stream_table
+from app.timeseries import Bucket
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 COOKIE_NAME = "session_id"
 
+# Products previewed in /data
+DASHBOARD_TABLE_ROWS = 5
 
-def get_current_user_dependency(
-    db: Session = Depends(get_db),
+# Previous mock rows of /data, previewed while the user has no products
+# (nothing writes products yet)
+SAMPLE_TABLE_ROWS = [
+    {"id": 1, "nome": "Produto A", "status": "Ativo", "valor": 1250.00},
+    {"id": 2, "nome": "Produto B", "status": "Pendente", "valor": 890.50},
+    {"id": 3, "nome": "Produto C", "status": "Ativo", "valor": 2100.75},
+    {"id": 4, "nome": "Produto D", "status": "Inativo", "valor": 450.00},
+    {"id": 5, "nome": "Produto E", "status": "Ativo", "valor": 3200.00},
+]
+
+# Upper bound of /chart's max_points
+MAX_CHART_POINTS = 1000
+
+
+async def get_current_user_dependency(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     session_id: str | None = Cookie(None, alias=COOKIE_NAME)
-) -> User:
+) -> UserResponse:
     """
-    Dependency to get current authenticated user.
+    Dependency to get current authenticated user (cached snapshot).
+    Extends the session (sliding expiration).
     Raises HTTPException if not authenticated.
     """
     if not session_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    user_id = get_user_from_session(session_id)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid or expired session")
-
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await get_session_user(db, session_id)
     if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
 
+    refresh_session_cookie(response, session_id)
     return user
 
 
+async def _cached_response(
+    request: Request,
+    response: Response,
+    user_id: int,
+    name: str,
+    build: Callable[[], Awaitable[Any]],
+) -> Response:
+    """
+    Serve a user's JSON payload through the response cache, with an ETag.
+
+    Args:
+        request: Incoming request (for ``If-None-Match``)
+        response: Response carrying the session cookie refresh
+        user_id: Owner of the data
+        name: Name of the payload in the cache
+        build: Builds the payload on a cache miss
+
+    Returns:
+        Cached payload, or 304
+    """
+    # Charts end today: a new day is a new version
+    version = (response_cache.data_version(user_id), utc_today())
+    cached = response_cache.get(user_id, name, version)
+    if cached is None:
+        cached = response_cache.put(user_id, name, version, make_entry(await build()))
+    return cached_json_response(request, cached, response)
+
+
 @router.get("/data")
-def get_dashboard_data(current_user: User = Depends(get_current_user_dependency)):
+async def get_dashboard_data(
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user_dependency),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
     """
     Get dashboard data (protected endpoint).
 
-    Returns dummy data for charts and tables.
+    The serialized payload is cached per user and version (see
+    ``app.response_cache``) and sent with an ETag: clients revalidating
+    with ``If-None-Match`` get a 304.
+
+    Args:
+        request: Incoming request (for ``If-None-Match``)
+        response: Response carrying the session cookie refresh
+        current_user: Current authenticated user (from dependency)
+        db: Database session (read replica when available)
+
+    Returns:
+        Dashboard data with chart and table information, or 304
+    """
+    return await _cached_response(
+        request,
+        response,
+        current_user.id,
+        "dashboard_data",
+        lambda: build_dashboard_data(db, current_user),
+    )
+
+
+@router.get("/chart")
+async def get_sales_chart(
+    request: Request,
+    response: Response,
+    days: int = Query(7, description=f"Range in days, one of {CHART_RANGES}"),
+    bucket: Bucket = Query("day"),
+    window: int | None = Query(None, ge=2, le=90, description="Moving average window (buckets)"),
+    max_points: int | None = Query(None, ge=3, le=MAX_CHART_POINTS),
+    current_user: UserResponse = Depends(get_current_user_dependency),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """
+    Get the sales chart of the last ``days`` days (protected endpoint).
+
+    Read from the daily rollup (see ``app.sales``), cached like the
+    dashboard data. ``max_points`` bounds the payload whatever the range
+    (LTTB downsampling, see ``app.timeseries``).
+
+    Args:
+        request: Incoming request (for ``If-None-Match``)
+        response: Response carrying the session cookie refresh
+        days: Range in days (7, 30, 90 or 365)
+        bucket: Bucket size ("day", "week" or "month")
+        window: Add the moving average over this many buckets ("average")
+        max_points: Return at most this many points
+        current_user: Current authenticated user (from dependency)
+        db: Database session (read replica when available)
+
+    Returns:
+        Points ``{"date", "value", "count"[, "average"]}``, oldest first, or 304
+
+    Raises:
+        HTTPException: If the range isn't supported
+    """
+    if days not in CHART_RANGES:
+        raise HTTPException(
+            status_code=422, detail=f"days must be one of {', '.join(map(str, CHART_RANGES))}"
+        )
+    return await _cached_response(
+        request,
+        response,
+        current_user.id,
+        f"chart:{days}:{bucket}:{window}:{max_points}",
+        lambda: sales_chart(
+            db, current_user.id, days, bucket, window=window, max_points=max_points
+        ),
+    )
+
+
+@router.get("/table")
+async def get_product_table(
+    sort: Sort = Query("valor"),
+    order: Order = Query("asc"),
+    status: Status | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    current_user: UserResponse = Depends(get_current_user_dependency),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get a page of the product table (protected endpoint).
+
+    Keyset pagination (see ``app.products``): pass the ``next_cursor`` of a
+    page to get the next one, with the same sort, order and status.
 
     Args:
+        sort: Sort column ("valor" or "nome")
+        order: Sort order ("asc" or "desc")
+        status: Only products with this status
+        limit: Page size
+        cursor: Cursor of the previous page (first page when omitted)
         current_user: Current authenticated user (from dependency)
+        db: Database session (read replica when available)
+
+    Returns:
+        ``{"items": [...], "next_cursor": str | None}``
+
+    Raises:
+        HTTPException: If the cursor is invalid for this query
+    """
+    try:
+        return await product_page(db, current_user.id, sort, order, status, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get("/export/{table}")
+async def export_table(
+    request: Request,
+    response: Response,
+    table: ExportTable,
+    fmt: ExportFormat = Query("csv", alias="format"),
+    current_user: UserResponse = Depends(get_current_user_dependency),
+) -> StreamingResponse:
+    """
+    Download a full table as CSV or NDJSON (protected endpoint).
+
+    Streamed from a server-side cursor in constant memory (see
+    ``app.table_export``).
+
+    Args:
+        request: Incoming request (read session routing)
+        response: Response carrying the session cookie refresh
+        table: "products" or "sales"
+        fmt: "csv" or "ndjson"
+        current_user: Current authenticated user (from dependency)
+
+    Returns:
+        Streamed file
+    """
+    streaming = StreamingResponse(
+        stream_table(lambda: read_session(request), current_user.id, table, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
+    streaming.headers.raw.extend(response.headers.raw)
+    return streaming
+
+
+@router.post("/sales", status_code=201)
+async def post_sales(
+    sales_in: SalesIn,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user_dependency),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Record sales of the current user (protected endpoint).
+
+    Updates the daily rollup behind the chart in the same transaction, then
+    invalidates the user's cached responses.
+
+    Args:
+        sales_in: Sales to record
+        response: FastAPI Response object (read-your-writes cookie)
+        current_user: Current authenticated user (from dependency)
+        db: Database session (primary)
+
+    Returns:
+        Number of sales recorded
+    """
+    recorded = await record_sales(
+        db,
+        current_user.id,
+        ((sale.occurred_at, int(sale.amount * 100)) for sale in sales_in.sales),
+    )
+    await db.commit()
+    # After the commit: a response built before it must not get the new version
+    response_cache.invalidate(current_user.id)
+    replica_router.mark_read_primary(response)
+    return {"recorded": recorded}
+
+
+async def build_dashboard_data(db: AsyncSession, current_user: UserResponse) -> dict:
+    """
+    Build the dashboard payload.
+
+    The chart shows the sales of the last 7 days, the table the first
+    products by name (the full table is ``/api/dashboard/table``), or the
+    sample rows while the user has none.
+
+    Args:
+        db: Database session
+        current_user: Current authenticated user
 
     Returns:
         Dashboard data with chart and table information
     """
-    # Generate dummy chart data (last 7 days)
-    chart_data = []
-    today = datetime.now()
-    for i in range(7):
-        date = today - timedelta(days=6-i)
-        chart_data.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "value": 100 + (i * 50) + ((i % 2) * 30)  # Dummy values
-        })
-
-    # Generate dummy table data
-    table_data = [
-        {
-            "id": 1,
-            "nome": "Produto A",
-            "status": "Ativo",
-            "valor": 1250.00
-        },
-        {
-            "id": 2,
-            "nome": "Produto B",
-            "status": "Pendente",
-            "valor": 890.50
-        },
-        {
-            "id": 3,
-            "nome": "Produto C",
-            "status": "Ativo",
-            "valor": 2100.75
-        },
-        {
-            "id": 4,
-            "nome": "Produto D",
-            "status": "Inativo",
-            "valor": 450.00
-        },
-        {
-            "id": 5,
-            "nome": "Produto E",
-            "status": "Ativo",
-            "valor": 3200.00
-        }
-    ]
+    chart_data = await sales_chart(db, current_user.id)
+
+    # Preview of the product table
+    table = await product_page(db, current_user.id, sort="nome", limit=DASHBOARD_TABLE_ROWS)
 
     return {
         "user_email": current_user.email,
         "chart_data": chart_data,
-        "table_data": table_data
+        "table_data": table["items"] or SAMPLE_TABLE_ROWS,
     }
@@ -0,0 +1,186 @@
+"""
+Sales events and the dashboard chart, backed by a daily rollup.
+
+Raw sales go to ``sales_events``. Grouping them by date on every chart
+request would read every event of the range, so each ingest also
+upserts the per-user daily totals in ``daily_sales`` in the same
+transaction (one ``INSERT ... ON CONFLICT DO UPDATE`` adding to the day's
+count and amount). A chart then reads at most one rollup row per day of its
+range (365 for the longest), whatever the number of events.
+
+Days are UTC days. Charts are built with array operations
+(``app.timeseries``): bucketing by day, week (from Monday) or month, gap
+filling with zeros, an optional moving average and LTTB downsampling to a
+maximum number of points. A bucket starting before the range is labeled
+with the range's first day.
+
+Callers of ``record_sales`` invalidate the user's cached responses
+(``app.response_cache``) once they have committed.
+"""
+
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import UTC, date, datetime, timedelta
+from functools import cache
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Insert, bindparam, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import timeseries
+from app.models import DailySales, SalesEvent
+from app.timeseries import Bucket
+
+# Chart ranges (days) accepted by the API
+CHART_RANGES = (7, 30, 90, 365)
+
+CHART_ROLLUPS = (
+    select(DailySales.day, DailySales.event_count, DailySales.amount_cents)
+    .where(
+        DailySales.user_id == bindparam("user_id"),
+        DailySales.day >= bindparam("start"),
+        DailySales.day <= bindparam("end"),
+    )
+    .order_by(DailySales.day)
+)
+
+# Dialects with INSERT ... ON CONFLICT
+_DIALECT_INSERTS: dict[str, Callable[..., Any]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def utc_today() -> date:
+    """Current UTC day (the last day of every chart)."""
+    return datetime.now(UTC).date()
+
+
+@cache
+def _rollup_upsert(dialect: str) -> Insert:
+    """
+    Build the daily rollup upsert of a dialect (once).
+
+    Args:
+        dialect: SQLAlchemy dialect name ("postgresql" or "sqlite")
+
+    Returns:
+        Insert adding to the day's totals when the row exists
+    """
+    upsert = _DIALECT_INSERTS[dialect](DailySales)
+    statement: Insert = upsert.on_conflict_do_update(
+        index_elements=[DailySales.user_id, DailySales.day],
+        set_={
+            "event_count": DailySales.event_count + upsert.excluded.event_count,
+            "amount_cents": DailySales.amount_cents + upsert.excluded.amount_cents,
+        },
+    )
+    return statement
+
+
+async def record_sales(
+    db: AsyncSession, user_id: int, sales: Iterable[tuple[datetime, int]]
+) -> int:
+    """
+    Insert sales and add them to the daily rollup.
+
+    The caller commits: events and rollup change in the same transaction.
+    It then calls ``response_cache.invalidate(user_id)``; invalidating
+    before the commit would let a concurrent request cache the old data
+    under the new version (and a valid ETag).
+
+    Args:
+        db: Database session
+        user_id: Seller
+        sales: (occurred_at, amount in cents) pairs; naive datetimes are UTC
+
+    Returns:
+        Number of sales recorded
+    """
+    events = [
+        # Stored and bucketed in UTC
+        (occurred_at.astimezone(UTC) if occurred_at.tzinfo else occurred_at, amount_cents)
+        for occurred_at, amount_cents in sales
+    ]
+    if not events:
+        return 0
+
+    counts: Counter[date] = Counter()
+    amounts: Counter[date] = Counter()
+    for occurred_at, amount_cents in events:
+        counts[occurred_at.date()] += 1
+        amounts[occurred_at.date()] += amount_cents
+
+    await db.execute(
+        insert(SalesEvent),
+        [
+            {"user_id": user_id, "occurred_at": occurred_at, "amount_cents": amount_cents}
+            for occurred_at, amount_cents in events
+        ],
+    )
+    await db.execute(
+        _rollup_upsert(db.get_bind().dialect.name),
+        [
+            {"user_id": user_id, "day": day, "event_count": count, "amount_cents": amounts[day]}
+            # Sorted: concurrent ingests lock the day rows in the same order
+            for day, count in sorted(counts.items())
+        ],
+    )
+    return len(events)
+
+
+async def sales_chart(
+    db: AsyncSession,
+    user_id: int,
+    days: int = 7,
+    bucket: Bucket = "day",
+    today: date | None = None,
+    window: int | None = None,
+    max_points: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Build the sales chart of the last ``days`` days from the daily rollup.
+
+    Args:
+        db: Database session
+        user_id: Seller
+        days: Range in days, ending today (one of CHART_RANGES)
+        bucket: Bucket size
+        today: Last day of the range (default: current UTC day)
+        window: Add the moving average of the amount over this many buckets
+        max_points: Downsample to at most this many points (LTTB on the
+            amount, at least 3)
+
+    Returns:
+        One point per bucket, oldest first: ``{"date", "value", "count"}``
+        with the bucket's first day (ISO), total amount and number of sales,
+        plus ``"average"`` with ``window``
+    """
+    end = today or utc_today()
+    start = end - timedelta(days=days - 1)
+    rows = (await db.execute(CHART_ROLLUPS, {"user_id": user_id, "start": start, "end": end})).all()
+
+    starts = timeseries.bucket_range(start, end, bucket)
+    row_days = np.array([row.day for row in rows], dtype="datetime64[D]")
+    counts, amounts = timeseries.aggregate(
+        starts,
+        bucket,
+        row_days,
+        [row.event_count for row in rows],
+        [row.amount_cents for row in rows],
+    )
+    series: dict[str, Any] = {
+        "date": np.maximum(starts, np.datetime64(start, "D")).astype(str),
+        "value": amounts / 100,
+        "count": counts,
+    }
+    if window is not None:
+        series["average"] = timeseries.moving_average(series["value"], window).round(2)
+    if max_points is not None:
+        kept = timeseries.lttb(np.arange(len(starts)), series["value"], max_points)
+        series = {name: values[kept] for name, values in series.items()}
+
+    columns = {name: values.tolist() for name, values in series.items()}
+    return [dict(zip(columns, point, strict=True)) for point in zip(*columns.values(), strict=True)]
@@ -0,0 +1,146 @@
+"""
+Database schema handling at startup.
+
+The schema is owned by the Alembic migrations in ``backend/migrations``,
+applied as a deploy step (``alembic upgrade head``) before new instances
+start. Startup no longer runs ``Base.metadata.create_all``, which opened a
+connection and inspected every table before the first request could be
+served (added to each Cloud Run cold start).
+
+DB_SCHEMA_MODE selects what startup does:
+- "check" (default): one ``SELECT`` of the Alembic version, compared with
+  SCHEMA_REVISION; startup fails on a mismatch instead of serving requests
+  against the wrong schema. The connection it opens stays in the pool for
+  the first request. Cached per process.
+- "migrate": apply pending migrations at startup; for databases that don't
+  outlive the instance (SQLite in /tmp), where no deploy step can reach them,
+  and local development. Databases built by the former ``create_all`` (tables
+  but no Alembic version) are stamped with the revision matching their
+  tables first, instead of failing on "table users already exists"
+- "off": nothing (production, once migrations run as a deploy step)
+
+Configuration (environment variables):
+- DB_SCHEMA_MODE: "check", "migrate" or "off" (default: "check")
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "check").lower()
+
+# Alembic head revision this code expects (bump with every new migration)
+SCHEMA_REVISION = "0004"
+
+ALEMBIC_INI = Path(__file__).parent.parent / "alembic.ini"
+
+# Revision verified by check_schema in this process
+_verified_revision: str | None = None
+
+
+class SchemaVersionError(RuntimeError):
+    """Raised when the database schema isn't at SCHEMA_REVISION."""
+
+
+async def check_schema(engine: AsyncEngine) -> None:
+    """
+    Verify that the database was migrated to SCHEMA_REVISION.
+
+    Args:
+        engine: Engine of the database
+
+    Raises:
+        SchemaVersionError: If the database is not at SCHEMA_REVISION
+    """
+    global _verified_revision
+    if _verified_revision == SCHEMA_REVISION:
+        return
+
+    async with engine.connect() as conn:
+        try:
+            revision = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+        except Exception as e:
+            raise SchemaVersionError(
+                "Database has no migration version: run `alembic upgrade head` "
+                "(or `alembic stamp 0001` first if create_all already built the users "
+                "table, `alembic stamp 0002` if it also built sessions)"
+            ) from e
+    if revision != SCHEMA_REVISION:
+        raise SchemaVersionError(
+            f"Database schema is at revision {revision}, this version expects "
+            f"{SCHEMA_REVISION}: run `alembic upgrade head`"
+        )
+    _verified_revision = revision
+
+
+def legacy_revision(conn: Connection) -> str | None:
+    """
+    Revision matching the tables of a database built by ``create_all``.
+
+    Args:
+        conn: Connection to the database
+
+    Returns:
+        "0001" (users) or "0002" (users and sessions) for an unversioned
+        database with tables, None otherwise
+    """
+    tables = set(inspect(conn).get_table_names())
+    if "alembic_version" in tables or "users" not in tables:
+        return None
+    return "0002" if "sessions" in tables else "0001"
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Apply pending migrations (``alembic upgrade head``) with ``engine``.
+
+    Databases built by ``create_all`` are stamped with their
+    ``legacy_revision`` first.
+
+    Args:
+        engine: Sync engine of the database
+    """
+    # Imported here: only this mode needs Alembic at runtime
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        revision = legacy_revision(conn)
+        if revision is not None:
+            logger.warning("Database built without migrations: stamping revision %s", revision)
+            command.stamp(config, revision)
+        command.upgrade(config, "head")
+
+
+async def prepare_schema(
+    engine: Engine, async_engine: AsyncEngine, mode: str = DB_SCHEMA_MODE
+) -> None:
+    """
+    Run the startup schema step selected by DB_SCHEMA_MODE.
+
+    Args:
+        engine: Sync engine (migrations)
+        async_engine: Async engine (version check)
+        mode: "check", "migrate" or "off"
+
+    Raises:
+        SchemaVersionError: If the database is not at SCHEMA_REVISION
+        ValueError: If ``mode`` is unknown
+    """
+    if mode == "off":
+        return
+    if mode == "migrate":
+        await asyncio.to_thread(run_migrations, engine)
+    elif mode != "check":
+        raise ValueError(f"Unknown DB_SCHEMA_MODE: {mode!r}")
+    await check_schema(async_engine)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from decimal import Decimal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -24,3 +25,22 @@ class UserResponse(BaseModel):
 
     class Config:
         from_attributes = True  # Allows SQLAlchemy models to be converted to Pydantic models
+
+
+class SessionResponse(BaseModel):
+    """Schema for one of the current user's sessions."""
+    id: str  # Session handle, not the session cookie
+    expires_at: datetime
+    current: bool  # True for the session making the request
+
+
+class SaleIn(BaseModel):
+    """Schema for one sale sent to the dashboard."""
+    occurred_at: datetime  # Naive datetimes are UTC
+    amount: Decimal = Field(..., max_digits=14, decimal_places=2)  # Negative for refunds
+
+
+class SalesIn(BaseModel):
+    """Schema for a batch of sales."""
+    sales: list[SaleIn] = Field(..., min_length=1, max_length=10000)
+
@@ -0,0 +1,187 @@
+"""
+Database-backed session storage (SESSION_BACKEND=database).
+
+Sessions are rows of the ``sessions`` table (``app.models.UserSession``):
+durable, shared by every instance, and stored next to ``users`` so an
+authenticated request resolves cookie -> user with a single indexed JOIN
+(``DatabaseSessionStore.get_user``) instead of a session lookup followed by
+a user query.
+
+Rows are keyed by ``session_key`` (the token itself is never stored).
+Expired rows are ignored by every query and purged by the background
+sweeper in batches of SESSION_SWEEP_BATCH rows, each batch a short
+transaction using the ``expires_at`` index.
+"""
+
+import time
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import Select, bindparam, delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import User, UserSession
+from app.session_store import (
+    KEY_SIZE,
+    MAX_SESSIONS_PER_USER,
+    SessionInfo,
+    SessionStore,
+    session_key,
+)
+
+# The user of a live session (one indexed JOIN), built once like the
+# lookups of app.user_repository
+USER_BY_SESSION: Select[tuple[User]] = (
+    select(User)
+    .join(UserSession, UserSession.user_id == User.id)
+    .where(UserSession.id == bindparam("key"), UserSession.expires_at > bindparam("now"))
+)
+
+
+def _session_params(session_id: str) -> dict[str, object]:
+    """Parameters of ``USER_BY_SESSION``."""
+    return {"key": session_key(session_id), "now": int(time.time())}
+
+
+class DatabaseSessionStore(SessionStore):
+    """
+    Session storage in the ``sessions`` table.
+
+    Each method runs in its own short-lived DB session from
+    ``session_factory``; ``get_user``/``get_user_async`` run in the
+    caller's session.
+
+    Args:
+        session_factory: Factory for DB sessions (``SessionLocal`` by default)
+        max_sessions_per_user: Evict the least recently used sessions of a
+            user beyond this many (0 = unlimited)
+    """
+
+    blocking_io = True
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_sessions_per_user: int = MAX_SESSIONS_PER_USER,
+    ):
+        self.session_factory = session_factory
+        self.max_sessions_per_user = max_sessions_per_user
+
+    def create(self, session_id: str, user_id: int, ttl: timedelta) -> None:
+        key = session_key(session_id)
+        with self.session_factory() as db:
+            db.add(
+                UserSession(
+                    id=key,
+                    user_id=user_id,
+                    expires_at=int(time.time() + ttl.total_seconds()),
+                    # Sub-second precision orders sessions created within a second
+                    created_at=datetime.now(UTC),
+                )
+            )
+            if self.max_sessions_per_user > 0:
+                # The new session counts as one: keep max - 1 of the others
+                evicted = db.scalars(
+                    select(UserSession.id)
+                    .where(UserSession.user_id == user_id, UserSession.id != key)
+                    .order_by(UserSession.expires_at.desc(), UserSession.created_at.desc())
+                    .offset(self.max_sessions_per_user - 1)
+                ).all()
+                if evicted:
+                    db.execute(delete(UserSession).where(UserSession.id.in_(evicted)))
+            db.commit()
+
+    def get(self, session_id: str) -> int | None:
+        with self.session_factory() as db:
+            user_id: int | None = db.scalar(
+                select(UserSession.user_id).where(
+                    UserSession.id == session_key(session_id),
+                    UserSession.expires_at > int(time.time()),
+                )
+            )
+        return user_id
+
+    def get_user(self, db: Session, session_id: str) -> User | None:
+        """
+        Resolve a session ID to its user with one JOIN query.
+
+        Args:
+            db: Database session of the request
+            session_id: Session ID from the cookie
+
+        Returns:
+            User if the session exists and has not expired, None otherwise
+        """
+        return db.scalar(USER_BY_SESSION, _session_params(session_id))
+
+    async def get_user_async(self, db: AsyncSession, session_id: str) -> User | None:
+        """Async version of ``get_user``, for async routes."""
+        user: User | None = await db.scalar(USER_BY_SESSION, _session_params(session_id))
+        return user
+
+    def delete(self, session_id: str) -> bool:
+        return self._delete(UserSession.id == session_key(session_id)) > 0
+
+    def touch(self, session_id: str, ttl: timedelta) -> bool:
+        return self.touch_many([session_id], ttl) == 1
+
+    def touch_many(self, session_ids: Iterable[str], ttl: timedelta) -> int:
+        keys = [session_key(session_id) for session_id in session_ids]
+        if not keys:
+            return 0
+        now = time.time()
+        with self.session_factory() as db:
+            result = db.execute(
+                update(UserSession)
+                .where(UserSession.id.in_(keys), UserSession.expires_at > int(now))
+                .values(expires_at=int(now + ttl.total_seconds()))
+            )
+            db.commit()
+        return result.rowcount
+
+    def list_user_sessions(self, user_id: int) -> list[SessionInfo]:
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(UserSession.id, UserSession.expires_at)
+                .where(UserSession.user_id == user_id, UserSession.expires_at > int(time.time()))
+                .order_by(UserSession.expires_at, UserSession.created_at)
+            ).all()
+        return [SessionInfo(key.hex(), expires_at) for key, expires_at in rows]
+
+    def delete_user_session(self, user_id: int, handle: str) -> bool:
+        try:
+            key = bytes.fromhex(handle)
+        except ValueError:
+            return False
+        if len(key) != KEY_SIZE:
+            return False
+        return self._delete(UserSession.id == key, UserSession.user_id == user_id) > 0
+
+    def delete_user_sessions(self, user_id: int, keep_session_id: str | None = None) -> int:
+        conditions = [UserSession.user_id == user_id]
+        if keep_session_id:
+            conditions.append(UserSession.id != session_key(keep_session_id))
+        return self._delete(*conditions)
+
+    def sweep(self, max_batch: int) -> int:
+        expired = (
+            select(UserSession.id)
+            .where(UserSession.expires_at <= int(time.time()))
+            .limit(max_batch)
+        )
+        return self._delete(UserSession.id.in_(expired.scalar_subquery()))
+
+    def has_expired(self) -> bool:
+        with self.session_factory() as db:
+            return bool(
+                db.scalar(select(exists().where(UserSession.expires_at <= int(time.time()))))
+            )
+
+    def _delete(self, *conditions) -> int:
+        """Delete the rows matching ``conditions``; return how many were deleted."""
+        with self.session_factory() as db:
+            result = db.execute(delete(UserSession).where(*conditions))
+            db.commit()
+        return result.rowcount
@@ -0,0 +1,223 @@
+"""
+Persistence for in-memory sessions (snapshot + append-only log).
+
+Without persistence every deploy or instance recycle wipes the in-memory
+session store and logs every user out. When SESSION_PERSIST_DIR is set:
+
+- every create/touch/delete is appended to an in-memory buffer (no I/O on
+  the request path)
+- a background task writes the buffer to ``sessions.log`` and fsyncs it
+  every SESSION_JOURNAL_FLUSH_INTERVAL seconds
+- every SESSION_SNAPSHOT_INTERVAL seconds the whole store is written to
+  ``sessions.snapshot`` (atomic rename) and the log is truncated
+- at startup the snapshot and then the log are replayed, off the event loop
+
+Both files hold fixed-size little-endian records. The snapshot is read and
+written as one NumPy structured array sorted by expiry, which the store
+loads in bulk (no per-record unpacking, no heap rebuild); the log is
+replayed with a single ``struct.iter_unpack`` pass. Sessions written in the
+last flush interval before a crash are lost. On Cloud Run the directory
+must be a mounted volume, the container filesystem does not survive
+instance recycles.
+
+Configuration (environment variables):
+- SESSION_PERSIST_DIR: directory for the files (unset = persistence disabled)
+- SESSION_JOURNAL_FLUSH_INTERVAL: seconds between log flushes (default: 1)
+- SESSION_SNAPSHOT_INTERVAL: seconds between snapshots (default: 300)
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+from app.session_store import (
+    JOURNAL_OP_DELETE,
+    JOURNAL_OP_PUT,
+    SESSION_RECORD_DTYPE,
+    InMemorySessionStore,
+)
+
+logger = logging.getLogger(__name__)
+
+SESSION_PERSIST_DIR = os.getenv("SESSION_PERSIST_DIR")
+SESSION_JOURNAL_FLUSH_INTERVAL = float(os.getenv("SESSION_JOURNAL_FLUSH_INTERVAL", "1"))
+SESSION_SNAPSHOT_INTERVAL = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "300"))
+
+SNAPSHOT_MAGIC = b"SESSNAP1"  # Followed by SESSION_RECORD_DTYPE records
+# Log record: op, key (16 bytes), user_id, expires_at
+LOG_RECORD = struct.Struct("<B16sqq")
+
+
+def _iter_mapped(path: Path, offset: int, record: struct.Struct) -> Iterator[tuple]:
+    """Yield records from a memory-mapped file, ignoring a torn trailing record."""
+    if not path.exists() or path.stat().st_size <= offset:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        usable = offset + (len(mapped) - offset) // record.size * record.size
+        data = mapped[offset:usable]
+    yield from record.iter_unpack(data)
+
+
+class SessionJournal:
+    """
+    Snapshot + append-only log for an ``InMemorySessionStore``.
+
+    Args:
+        directory: Directory holding ``sessions.snapshot`` and ``sessions.log``
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "sessions.snapshot"
+        self.log_path = self.directory / "sessions.log"
+        self._buffer = bytearray()
+        self._buffer_lock = threading.Lock()
+        # Serializes flush() and snapshot() (both touch the log file)
+        self._io_lock = threading.Lock()
+
+    # Request path: append to the in-memory buffer only
+
+    def record_put(self, key: bytes, user_id: int, expires_at: int) -> None:
+        record = LOG_RECORD.pack(JOURNAL_OP_PUT, key, user_id, expires_at)
+        with self._buffer_lock:
+            self._buffer += record
+
+    def record_delete(self, key: bytes) -> None:
+        record = LOG_RECORD.pack(JOURNAL_OP_DELETE, key, 0, 0)
+        with self._buffer_lock:
+            self._buffer += record
+
+    # Background: flush, snapshot, restore
+
+    def _take_buffer(self) -> bytes:
+        with self._buffer_lock:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        return data
+
+    def flush(self) -> int:
+        """
+        Append buffered records to the log and fsync it.
+
+        Returns:
+            Number of bytes written
+        """
+        with self._io_lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        data = self._take_buffer()
+        if data:
+            with open(self.log_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(data)
+
+    def snapshot(self, store: InMemorySessionStore) -> int:
+        """
+        Write every live session to a new snapshot and truncate the log.
+
+        Operations that happen while the snapshot is written stay in the
+        buffer and go to the new log; replaying them on top of the snapshot
+        is idempotent.
+
+        Returns:
+            Number of sessions written
+        """
+        with self._io_lock:
+            self._flush_locked()
+            records = store.export()
+            records = records[records["expires_at"] > int(time.time())]
+            # Sorted by expiry so restore() can skip rebuilding the heaps
+            records = records[np.argsort(records["expires_at"], kind="stable")]
+
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Everything in the log is now covered by the snapshot
+            with open(self.log_path, "wb") as f:
+                os.fsync(f.fileno())
+            return len(records)
+
+    def restore(self, store: InMemorySessionStore) -> int:
+        """
+        Load the snapshot and replay the log into ``store``.
+
+        Returns:
+            Number of live sessions after replay
+        """
+        snapshot = np.empty(0, dtype=SESSION_RECORD_DTYPE)
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    raise ValueError(f"Invalid session snapshot: {self.snapshot_path}")
+                data = f.read()
+            # A torn trailing record is ignored
+            count = len(data) // SESSION_RECORD_DTYPE.itemsize
+            snapshot = np.frombuffer(data, dtype=SESSION_RECORD_DTYPE, count=count)
+        log = _iter_mapped(self.log_path, 0, LOG_RECORD)
+        store.restore(snapshot, log)
+        return store.count()
+
+
+def attach_journal(store: InMemorySessionStore, directory: str | Path) -> SessionJournal:
+    """
+    Restore ``store`` from ``directory`` and journal its future changes.
+
+    Blocking (reads and loads the whole snapshot): the app lifespan runs it
+    in a worker thread, before the store serves any request.
+
+    Returns:
+        The attached journal
+    """
+    start = time.perf_counter()
+    journal = SessionJournal(directory)
+    restored = journal.restore(store)
+    store.journal = journal
+    logger.info(
+        f"Restored {restored} sessions from {directory} "
+        f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    return journal
+
+
+async def run_journal_flusher(
+    journal: SessionJournal,
+    store: InMemorySessionStore,
+    flush_interval: float = SESSION_JOURNAL_FLUSH_INTERVAL,
+    snapshot_interval: float = SESSION_SNAPSHOT_INTERVAL,
+) -> None:
+    """
+    Flush the journal and take snapshots periodically, off the event loop.
+
+    On cancellation (shutdown) a final snapshot is written.
+    """
+    last_snapshot = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(flush_interval)
+            try:
+                if time.monotonic() - last_snapshot >= snapshot_interval:
+                    await asyncio.to_thread(journal.snapshot, store)
+                    last_snapshot = time.monotonic()
+                else:
+                    await asyncio.to_thread(journal.flush)
+            except Exception:
+                logger.exception("Session journal flush failed")
+    finally:
+        journal.snapshot(store)
@@ -0,0 +1,1036 @@
+"""
+Session storage backends.
+
+``app.auth`` creates signed session ids and delegates their storage to a
+``SessionStore``:
+- ``InMemorySessionStore``: per process dict (default, lost on restart)
+- ``RedisSessionStore``: shared by every worker/instance, uses native key TTLs
+- ``DatabaseSessionStore`` (``app.session_db``): durable rows in the
+  ``sessions`` table, resolved together with the user in one JOIN
+- ``StatelessSessionStore``: no per-session state; the signed token is the
+  session and logouts are kept in a small ``RevocationList``
+
+Stateful backends also index sessions per user, so a user's sessions can be
+listed and revoked ("log out everywhere") without scanning the store, and
+the number of concurrent sessions per user can be capped.
+
+Expired in-memory sessions are removed incrementally by
+``run_session_sweeper`` (started by the app lifespan), so abandoned sessions
+do not accumulate.
+
+Configuration (environment variables):
+- SESSION_BACKEND: "memory" (default), "redis", "database" or "stateless"
+- REDIS_URL: Redis connection URL for the "redis" backend
+- SESSION_SHARDS: lock stripes of the in-memory store (default: 16)
+- SESSION_SWEEP_INTERVAL: seconds between sweeps of expired sessions (default: 30)
+- SESSION_SWEEP_BATCH: max expiry entries processed per batch (default: 500)
+- SESSION_REVOCATION_BUCKET: seconds per revocation time bucket (default: 3600)
+- MAX_SESSIONS_PER_USER: sessions kept per user, the oldest is evicted beyond
+  that (default: 0 = unlimited)
+"""
+
+import asyncio
+import contextlib
+import gc
+import hashlib
+import heapq
+import logging
+import math
+import operator
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app import metrics
+
+if TYPE_CHECKING:
+    from app.session_persistence import SessionJournal
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SESSION_SHARDS = int(os.getenv("SESSION_SHARDS", "16"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "30"))
+SESSION_SWEEP_BATCH = int(os.getenv("SESSION_SWEEP_BATCH", "500"))
+SESSION_REVOCATION_BUCKET = int(os.getenv("SESSION_REVOCATION_BUCKET", "3600"))
+MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", "0"))
+
+# Size of session_key() digests
+KEY_SIZE = 16
+
+# Bulk export/restore layout of a session (also the snapshot file record)
+SESSION_RECORD_DTYPE = np.dtype(
+    [("key", f"V{KEY_SIZE}"), ("user_id", "<i8"), ("expires_at", "<i8")]
+)
+
+# Journal operations (see app.session_persistence)
+JOURNAL_OP_PUT = 1  # Create or touch
+JOURNAL_OP_DELETE = 2
+
+# Metrics
+live_sessions = metrics.gauge("sessions_live", "Sessions currently stored in this process")
+evicted_total = metrics.counter(
+    "sessions_evicted_total", "Expired sessions removed by the background sweeper"
+)
+eviction_rate = metrics.gauge(
+    "sessions_evicted_per_second", "Sweeper eviction rate over the last sweep cycle"
+)
+
+
+class SessionInfo(NamedTuple):
+    """
+    A session as shown to its owner.
+
+    ``handle`` identifies the session without revealing the session id
+    (hex digest of ``session_key``), so it can be listed and revoked safely.
+    """
+
+    handle: str
+    expires_at: int
+
+
+def session_key(session_id: str) -> bytes:
+    """
+    Fixed-size (16 bytes) key for a session ID.
+
+    Session IDs are ~100 character signed tokens; keying the in-memory map
+    by a digest keeps every key the same small size.
+    """
+    return hashlib.blake2b(session_id.encode(), digest_size=KEY_SIZE).digest()
+
+
+def session_handle(session_id: str) -> str:
+    """Public handle of a session (see ``SessionInfo``)."""
+    return session_key(session_id).hex()
+
+
+class SessionStore(ABC):
+    """Storage for session id -> user id mappings with expiration."""
+
+    # True if operations wait on the network or disk: async code must run
+    # them in a worker thread instead of on the event loop
+    blocking_io = False
+
+    @abstractmethod
+    def create(self, session_id: str, user_id: int, ttl: timedelta) -> None:
+        """
+        Store a new session.
+
+        Args:
+            session_id: Session ID (signed token)
+            user_id: ID of the session owner
+            ttl: Time until the session expires
+        """
+
+    @abstractmethod
+    def get(self, session_id: str) -> int | None:
+        """
+        Get the user ID of a session.
+
+        Args:
+            session_id: Session ID to look up
+
+        Returns:
+            User ID if the session exists and has not expired, None otherwise
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+
+        Args:
+            session_id: Session ID to delete
+
+        Returns:
+            True if the session was deleted, False if it didn't exist
+        """
+
+    @abstractmethod
+    def touch(self, session_id: str, ttl: timedelta) -> bool:
+        """
+        Reset the expiration of a session to ``ttl`` from now.
+
+        Args:
+            session_id: Session ID to extend
+            ttl: New time until expiration
+
+        Returns:
+            True if the session exists, False otherwise
+        """
+
+    def touch_many(self, session_ids: Iterable[str], ttl: timedelta) -> int:
+        """
+        Touch several sessions at once.
+
+        Args:
+            session_ids: Session IDs to extend
+            ttl: New time until expiration
+
+        Returns:
+            Number of sessions that existed
+        """
+        return sum(self.touch(session_id, ttl) for session_id in session_ids)
+
+    def list_user_sessions(self, user_id: int) -> list[SessionInfo]:
+        """
+        List the live sessions of a user, oldest first.
+
+        Args:
+            user_id: Session owner
+
+        Returns:
+            Sessions of the user (empty if the backend keeps no session state)
+        """
+        return []
+
+    def delete_user_session(self, user_id: int, handle: str) -> bool:
+        """
+        Delete one session of a user by its handle.
+
+        Args:
+            user_id: Session owner (sessions of other users are never deleted)
+            handle: Handle from ``list_user_sessions``
+
+        Returns:
+            True if the session was deleted, False if it didn't exist
+        """
+        return False
+
+    @abstractmethod
+    def delete_user_sessions(self, user_id: int, keep_session_id: str | None = None) -> int:
+        """
+        Delete every session of a user ("log out everywhere").
+
+        Args:
+            user_id: Session owner
+            keep_session_id: Session to keep (usually the current one)
+
+        Returns:
+            Number of sessions deleted
+        """
+
+    def sweep(self, max_batch: int) -> int:
+        """
+        Remove up to ``max_batch`` expired sessions.
+
+        Backends with native expiration (Redis) don't need sweeping.
+
+        Args:
+            max_batch: Max number of expiry entries to process
+
+        Returns:
+            Number of sessions removed
+        """
+        return 0
+
+    def has_expired(self) -> bool:
+        """True if ``sweep`` has expired entries left to process."""
+        return False
+
+    def count(self) -> int | None:
+        """Number of stored sessions, or None if the backend can't tell cheaply."""
+        return None
+
+
+class SessionRecord:
+    """
+    Compact in-memory session record.
+
+    ``__slots__`` avoids a per-instance ``__dict__``; the expiry is stored as
+    integer epoch seconds instead of a ``datetime``.
+    """
+
+    __slots__ = ("user_id", "expires_at")
+
+    def __init__(self, user_id: int, expires_at: int):
+        self.user_id = user_id
+        self.expires_at = expires_at
+
+
+_record_user_id = operator.attrgetter("user_id")
+_record_expires_at = operator.attrgetter("expires_at")
+
+
+class _SessionShard:
+    """One stripe of the in-memory session map: records, expiry heap and lock."""
+
+    __slots__ = ("sessions", "expiry_heap", "lock")
+
+    def __init__(self) -> None:
+        self.sessions: dict[bytes, SessionRecord] = {}
+        # Expiry index: min-heap of (expires_at, key)
+        self.expiry_heap: list[tuple[int, bytes]] = []
+        self.lock = threading.Lock()
+
+
+class _UserIndexShard:
+    """
+    One stripe of the per-user index and its lock.
+
+    ``users`` maps a user id to its only session key, or to a list of two
+    or more keys, oldest first: most users have a single session, and a
+    one-element list would cost more than the key itself.
+    """
+
+    __slots__ = ("users", "lock")
+
+    def __init__(self) -> None:
+        self.users: dict[int, bytes | list[bytes]] = {}
+        self.lock = threading.Lock()
+
+
+def _index_keys(entry: bytes | list[bytes] | None) -> list[bytes]:
+    """Keys of a per-user index entry, as a new list."""
+    if entry is None:
+        return []
+    return [entry] if isinstance(entry, bytes) else list(entry)
+
+
+def _index_append(users: dict[int, bytes | list[bytes]], user_id: int, key: bytes) -> None:
+    """Append ``key`` to the user's index entry (caller holds the stripe lock)."""
+    entry = users.get(user_id)
+    if entry is None:
+        users[user_id] = key
+    elif isinstance(entry, bytes):
+        users[user_id] = [entry, key]
+    else:
+        entry.append(key)
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Per-process session storage, safe for concurrent use from the threadpool.
+
+    Sessions are ``SessionRecord`` objects keyed by ``session_key(session_id)``
+    and spread over ``shards`` stripes by the first byte of the key. Reads
+    take no lock (a dict lookup is atomic); writes lock only their stripe,
+    so writers contend only with writers of the same stripe.
+
+    A secondary index maps each user id to its session keys, oldest first
+    (striped by user id the same way): the bare key for a user with one
+    session, a list from two on. Lists are short (one entry per device), so
+    evicting the oldest session or removing one is constant time in
+    practice.
+
+    Expired sessions are deleted when they are looked up again, or by
+    ``sweep``, which walks each stripe's min-heap of (expires_at, key)
+    entries. Touching a session only updates its record, so the heap keeps
+    one entry per session however often it is touched: when the sweep pops
+    an entry whose session was extended since, it pushes it back once at
+    the current expiry.
+
+    Changes can be recorded in a ``SessionJournal`` (see
+    ``app.session_persistence``) so the store survives restarts.
+
+    Args:
+        shards: Number of stripes (1-256)
+        max_sessions_per_user: Evict the oldest session of a user beyond
+            this many (0 = unlimited)
+    """
+
+    def __init__(
+        self,
+        shards: int = SESSION_SHARDS,
+        max_sessions_per_user: int = MAX_SESSIONS_PER_USER,
+    ):
+        if not 1 <= shards <= 256:
+            raise ValueError("shards must be between 1 and 256")
+        self.max_sessions_per_user = max_sessions_per_user
+        self._shards = [_SessionShard() for _ in range(shards)]
+        self._user_shards = [_UserIndexShard() for _ in range(shards)]
+        self._next_sweep_shard = 0
+        self.journal: SessionJournal | None = None
+
+    def _shard(self, key: bytes) -> _SessionShard:
+        return self._shards[key[0] % len(self._shards)]
+
+    def _user_shard(self, user_id: int) -> _UserIndexShard:
+        return self._user_shards[user_id % len(self._user_shards)]
+
+    # Per-user index
+
+    def _index_add(self, user_id: int, key: bytes) -> list[bytes]:
+        """Add ``key`` to the user's index; return the keys evicted by the cap."""
+        user_shard = self._user_shard(user_id)
+        with user_shard.lock:
+            _index_append(user_shard.users, user_id, key)
+            keys = user_shard.users[user_id]
+            if isinstance(keys, list) and 0 < self.max_sessions_per_user < len(keys):
+                evicted = keys[: len(keys) - self.max_sessions_per_user]
+                del keys[: len(evicted)]
+                if len(keys) == 1:
+                    user_shard.users[user_id] = keys[0]
+                return evicted
+        return []
+
+    def _index_remove(self, user_id: int, key: bytes) -> None:
+        user_shard = self._user_shard(user_id)
+        with user_shard.lock:
+            keys = user_shard.users.get(user_id)
+            if keys is None:
+                return
+            if isinstance(keys, bytes):
+                if keys == key:
+                    del user_shard.users[user_id]
+                return
+            with contextlib.suppress(ValueError):
+                keys.remove(key)
+            if len(keys) == 1:
+                user_shard.users[user_id] = keys[0]
+
+    def _remove_record(self, key: bytes) -> SessionRecord | None:
+        """Remove the record stored under ``key`` (the index is not updated)."""
+        shard = self._shard(key)
+        with shard.lock:
+            record = shard.sessions.pop(key, None)
+            if record is not None and self.journal is not None:
+                self.journal.record_delete(key)
+        return record
+
+    # SessionStore
+
+    def create(self, session_id: str, user_id: int, ttl: timedelta) -> None:
+        key = session_key(session_id)
+        expires_at = int(time.time() + ttl.total_seconds())
+        for evicted_key in self._index_add(user_id, key):
+            self._remove_record(evicted_key)
+        shard = self._shard(key)
+        with shard.lock:
+            shard.sessions[key] = SessionRecord(user_id, expires_at)
+            heapq.heappush(shard.expiry_heap, (expires_at, key))
+            # Journal under the stripe lock so the log order matches memory
+            if self.journal is not None:
+                self.journal.record_put(key, user_id, expires_at)
+
+    def get(self, session_id: str) -> int | None:
+        key = session_key(session_id)
+        record = self._shard(key).sessions.get(key)
+        if record is None:
+            return None
+
+        # Check if session has expired
+        if time.time() >= record.expires_at:
+            self.delete(session_id)
+            return None
+
+        return record.user_id
+
+    def delete(self, session_id: str) -> bool:
+        key = session_key(session_id)
+        record = self._remove_record(key)
+        if record is None:
+            return False
+        self._index_remove(record.user_id, key)
+        return True
+
+    def touch(self, session_id: str, ttl: timedelta) -> bool:
+        key = session_key(session_id)
+        shard = self._shard(key)
+        now = time.time()
+        with shard.lock:
+            record = shard.sessions.get(key)
+            if record is None or now >= record.expires_at:
+                return False
+            # The heap entry is moved by sweep() once it comes due
+            record.expires_at = int(now + ttl.total_seconds())
+            if self.journal is not None:
+                self.journal.record_put(key, record.user_id, record.expires_at)
+            return True
+
+    def list_user_sessions(self, user_id: int) -> list[SessionInfo]:
+        user_shard = self._user_shard(user_id)
+        with user_shard.lock:
+            keys = _index_keys(user_shard.users.get(user_id))
+        now = time.time()
+        sessions = []
+        for key in keys:
+            record = self._shard(key).sessions.get(key)
+            if record is not None and record.user_id == user_id and record.expires_at > now:
+                sessions.append(SessionInfo(key.hex(), record.expires_at))
+        return sessions
+
+    def delete_user_session(self, user_id: int, handle: str) -> bool:
+        try:
+            key = bytes.fromhex(handle)
+        except ValueError:
+            return False
+        record = self._shard(key).sessions.get(key) if len(key) == KEY_SIZE else None
+        if record is None or record.user_id != user_id:
+            return False
+        if self._remove_record(key) is None:
+            return False
+        self._index_remove(user_id, key)
+        return True
+
+    def delete_user_sessions(self, user_id: int, keep_session_id: str | None = None) -> int:
+        keep = session_key(keep_session_id) if keep_session_id else b""
+        user_shard = self._user_shard(user_id)
+        with user_shard.lock:
+            keys = _index_keys(user_shard.users.pop(user_id, None))
+            if keep in keys:
+                keys.remove(keep)
+                user_shard.users[user_id] = keep
+        return sum(self._remove_record(key) is not None for key in keys)
+
+    def sweep(self, max_batch: int) -> int:
+        now = time.time()
+        removed: list[tuple[int, bytes]] = []
+        budget = max_batch
+        # Start where the previous sweep stopped so every stripe gets its turn
+        for _ in range(len(self._shards)):
+            if budget <= 0:
+                break
+            shard = self._shards[self._next_sweep_shard]
+            with shard.lock:
+                heap = shard.expiry_heap
+                while budget > 0 and heap and heap[0][0] <= now:
+                    budget -= 1
+                    _, key = heapq.heappop(heap)
+                    record = shard.sessions.get(key)
+                    if record is None:  # Already deleted
+                        continue
+                    if record.expires_at <= now:
+                        del shard.sessions[key]
+                        removed.append((record.user_id, key))
+                    else:  # Extended by touch(): requeue at the current expiry
+                        heapq.heappush(heap, (record.expires_at, key))
+            if not heap or heap[0][0] > now:
+                self._next_sweep_shard = (self._next_sweep_shard + 1) % len(self._shards)
+        for user_id, key in removed:
+            self._index_remove(user_id, key)
+        return len(removed)
+
+    def has_expired(self) -> bool:
+        now = time.time()
+        return any(
+            shard.expiry_heap and shard.expiry_heap[0][0] <= now for shard in self._shards
+        )
+
+    def count(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    @property
+    def shard_count(self) -> int:
+        """Number of stripes; a key lives in stripe ``key[0] % shard_count``."""
+        return len(self._shards)
+
+    def export(self) -> npt.NDArray[np.void]:
+        """Return every stored session as a ``SESSION_RECORD_DTYPE`` array."""
+        parts = []
+        for shard in self._shards:
+            with shard.lock:
+                keys = list(shard.sessions)
+                records = list(shard.sessions.values())
+            part = np.empty(len(keys), dtype=SESSION_RECORD_DTYPE)
+            part["key"] = np.frombuffer(b"".join(keys), dtype=SESSION_RECORD_DTYPE["key"])
+            part["user_id"] = np.fromiter(map(_record_user_id, records), np.int64, len(records))
+            part["expires_at"] = np.fromiter(
+                map(_record_expires_at, records), np.int64, len(records)
+            )
+            parts.append(part)
+        return np.concatenate(parts)
+
+    def restore(
+        self,
+        snapshot: npt.NDArray[np.void],
+        log: Iterable[tuple[int, bytes, int, int]],
+    ) -> None:
+        """
+        Bulk-load sessions from a snapshot and replay a log on top of it.
+
+        The snapshot is grouped per stripe with NumPy, then every stripe is
+        filled from plain columns: one dict ``update`` for the records and an
+        expiry list that, appended in expiry order, is already a valid heap.
+        The per-user index is built the same way for users with a single
+        session; only users with several sessions are grouped one by one.
+        New sessions of the log are pushed individually, touches only update
+        their record. Expired sessions are skipped.
+        The cyclic GC is paused while the records are created, it would
+        otherwise rescan the growing store over and over, and the loaded
+        objects are frozen (``gc.freeze``) so collections skip them later.
+
+        Index lists are ordered by expiry for the snapshot, then log order;
+        ``max_sessions_per_user`` is not enforced on load. Meant for an empty
+        store, before it serves requests.
+
+        Args:
+            snapshot: ``SESSION_RECORD_DTYPE`` records, sorted by expires_at
+            log: (op, key, user_id, expires_at) records, op 1 = put, 2 = delete
+        """
+        now = int(time.time())
+        count = len(self._shards)
+        snapshot = snapshot[snapshot["expires_at"] > now]
+        # Stripe of a key: first byte modulo the stripe count. The stable sort
+        # keeps every stripe sorted by expiry.
+        stripes = np.ascontiguousarray(snapshot["key"]).view(np.uint8)[::KEY_SIZE] % count
+        snapshot = snapshot[np.argsort(stripes, kind="stable")]
+        bounds = np.cumsum(np.bincount(stripes, minlength=count)).tolist()
+        # Group the sessions by (user, expiry); users with a single session go
+        # to their index stripe in bulk
+        by_user = np.lexsort((snapshot["expires_at"], snapshot["user_id"]))
+        user_ids, first, sizes = np.unique(
+            snapshot["user_id"][by_user], return_index=True, return_counts=True
+        )
+        single = sizes == 1
+        single_ids = user_ids[single]
+        single_stripes = single_ids % count
+        single_order = np.argsort(single_stripes, kind="stable")
+        single_bounds = np.cumsum(np.bincount(single_stripes, minlength=count)).tolist()
+        single_ids = single_ids[single_order].tolist()
+        single_positions = by_user[first[single][single_order]].tolist()
+
+        keys = snapshot["key"].tolist()
+        record_user_ids = snapshot["user_id"].tolist()
+        expiries = snapshot["expires_at"].tolist()
+        # Local lookups: the log loop runs once per operation
+        maps = [shard.sessions for shard in self._shards]
+        heaps = [shard.expiry_heap for shard in self._shards]
+        user_maps = [user_shard.users for user_shard in self._user_shards]
+        record_cls = SessionRecord
+        removed: list[tuple[int, bytes]] = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = single_start = 0
+            for index, (end, single_end) in enumerate(zip(bounds, single_bounds, strict=True)):
+                stripe_keys = keys[start:end]
+                stripe_expiries = expiries[start:end]
+                records = map(record_cls, record_user_ids[start:end], stripe_expiries)
+                maps[index].update(zip(stripe_keys, records, strict=True))
+                heaps[index].extend(zip(stripe_expiries, stripe_keys, strict=True))
+                user_keys = map(keys.__getitem__, single_positions[single_start:single_end])
+                user_maps[index].update(
+                    zip(single_ids[single_start:single_end], user_keys, strict=True)
+                )
+                start, single_start = end, single_end
+            positions = by_user.tolist()
+            for user_id, offset, size in zip(
+                user_ids[~single].tolist(),
+                first[~single].tolist(),
+                sizes[~single].tolist(),
+                strict=True,
+            ):
+                user_maps[user_id % count][user_id] = [
+                    keys[position] for position in positions[offset : offset + size]
+                ]
+
+            for op, key, user_id, expires_at in log:
+                index = key[0] % count
+                if op == JOURNAL_OP_PUT and expires_at > now:
+                    record = maps[index].get(key)
+                    if record is not None:  # Touch: the heap entry is moved by sweep()
+                        record.expires_at = expires_at
+                        continue
+                    _index_append(user_maps[user_id % count], user_id, key)
+                    maps[index][key] = record_cls(user_id, expires_at)
+                    heapq.heappush(heaps[index], (expires_at, key))
+                else:
+                    record = maps[index].pop(key, None)
+                    if record is not None:
+                        removed.append((record.user_id, key))
+            for user_id, key in removed:
+                self._index_remove(user_id, key)
+            # Long-lived: keep the loaded sessions out of every later collection
+            gc.freeze()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session storage in Redis.
+
+    Each session is a string key holding the user id, with a native TTL, so
+    expired sessions are removed by Redis itself. Keys use the session
+    handle, session ids themselves are never stored. Each user also has a
+    sorted set of session handles scored by expiry (least recently used
+    first), trimmed of expired entries on every create. Batch operations
+    are pipelined into a single round trip.
+
+    Args:
+        client: redis-py client (``redis.Redis``)
+        prefix: Key prefix for session keys
+        user_prefix: Key prefix for the per-user sorted sets
+        max_sessions_per_user: Evict the least recently used sessions of a
+            user beyond this many (0 = unlimited)
+    """
+
+    blocking_io = True
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str = "session:",
+        user_prefix: str = "user_sessions:",
+        max_sessions_per_user: int = MAX_SESSIONS_PER_USER,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.user_prefix = user_prefix
+        self.max_sessions_per_user = max_sessions_per_user
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + session_handle(session_id)
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.user_prefix}{user_id}"
+
+    def create(self, session_id: str, user_id: int, ttl: timedelta) -> None:
+        handle = session_handle(session_id)
+        user_key = self._user_key(user_id)
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + handle, user_id, ex=ttl)
+        # Fractional scores keep sessions created within a second in order
+        pipe.zadd(user_key, {handle: now + ttl.total_seconds()})
+        pipe.zremrangebyscore(user_key, "-inf", now)
+        pipe.expire(user_key, ttl)
+        pipe.zcard(user_key)
+        excess = pipe.execute()[-1] - self.max_sessions_per_user
+        if self.max_sessions_per_user > 0 and excess > 0:
+            evicted = [member for member, _ in self.client.zpopmin(user_key, excess)]
+            self.client.delete(*(self.prefix + member.decode() for member in evicted))
+
+    def get(self, session_id: str) -> int | None:
+        value = self.client.get(self._key(session_id))
+        return int(value) if value is not None else None
+
+    def delete(self, session_id: str) -> bool:
+        handle = session_handle(session_id)
+        value = self.client.getdel(self.prefix + handle)
+        if value is None:
+            return False
+        self.client.zrem(self._user_key(int(value)), handle)
+        return True
+
+    def touch(self, session_id: str, ttl: timedelta) -> bool:
+        return self.touch_many([session_id], ttl) == 1
+
+    def touch_many(self, session_ids: Iterable[str], ttl: timedelta) -> int:
+        handles = [session_handle(session_id) for session_id in session_ids]
+        pipe = self.client.pipeline(transaction=False)
+        for handle in handles:
+            pipe.getex(self.prefix + handle, ex=ttl)
+        user_ids = pipe.execute()
+
+        # Move the touched sessions to the end of their user's index
+        expires_at = time.time() + ttl.total_seconds()
+        pipe = self.client.pipeline(transaction=False)
+        for handle, user_id in zip(handles, user_ids, strict=True):
+            if user_id is not None:
+                user_key = self._user_key(int(user_id))
+                pipe.zadd(user_key, {handle: expires_at}, xx=True)
+                pipe.expire(user_key, ttl)
+        pipe.execute()
+        return sum(user_id is not None for user_id in user_ids)
+
+    def list_user_sessions(self, user_id: int) -> list[SessionInfo]:
+        members = self.client.zrangebyscore(
+            self._user_key(user_id), f"({time.time()}", "+inf", withscores=True
+        )
+        return [SessionInfo(member.decode(), int(score)) for member, score in members]
+
+    def delete_user_session(self, user_id: int, handle: str) -> bool:
+        user_key = self._user_key(user_id)
+        if self.client.zscore(user_key, handle) is None:
+            return False
+        pipe = self.client.pipeline()
+        pipe.delete(self.prefix + handle)
+        pipe.zrem(user_key, handle)
+        deleted, _ = pipe.execute()
+        return bool(deleted)
+
+    def delete_user_sessions(self, user_id: int, keep_session_id: str | None = None) -> int:
+        user_key = self._user_key(user_id)
+        keep = session_handle(keep_session_id) if keep_session_id else None
+        handles = [
+            member.decode()
+            for member in self.client.zrange(user_key, 0, -1)
+            if member.decode() != keep
+        ]
+        if not handles:
+            return 0
+        pipe = self.client.pipeline()
+        pipe.delete(*(self.prefix + handle for handle in handles))
+        pipe.zrem(user_key, *handles)
+        deleted, _ = pipe.execute()
+        return int(deleted)
+
+
+class RevocationList:
+    """
+    Set of revoked token ids that forgets entries once the token has expired.
+
+    Ids are grouped in time buckets by token expiry, so dropping expired
+    entries is a walk over the oldest buckets instead of a scan of the whole
+    set. Memory is proportional to logouts within the last ``max_age``.
+
+    Args:
+        bucket_seconds: Width of each expiry bucket
+    """
+
+    def __init__(self, bucket_seconds: int = SESSION_REVOCATION_BUCKET):
+        self.bucket_seconds = bucket_seconds
+        self._revoked: set[str] = set()
+        # {bucket index: token ids expiring in that bucket}
+        self._buckets: dict[int, list[str]] = {}
+        # Min-heap of bucket indexes
+        self._bucket_heap: list[int] = []
+        self._lock = threading.Lock()
+
+    def revoke(self, token_id: str, expires_at: float) -> None:
+        """Revoke ``token_id`` until ``expires_at`` (epoch seconds)."""
+        bucket = int(expires_at // self.bucket_seconds) + 1
+        with self._lock:
+            if token_id in self._revoked:
+                return
+            self._revoked.add(token_id)
+            if bucket not in self._buckets:
+                self._buckets[bucket] = []
+                heapq.heappush(self._bucket_heap, bucket)
+            self._buckets[bucket].append(token_id)
+
+    def is_revoked(self, token_id: str) -> bool:
+        return token_id in self._revoked
+
+    def has_expired(self) -> bool:
+        heap = self._bucket_heap
+        return bool(heap) and heap[0] * self.bucket_seconds <= time.time()
+
+    def prune(self, max_items: int) -> int:
+        """
+        Forget up to ``max_items`` ids whose tokens have expired.
+
+        Returns:
+            Number of ids removed
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while removed < max_items and self._bucket_heap:
+                bucket = self._bucket_heap[0]
+                if bucket * self.bucket_seconds > now:
+                    break
+                token_ids = self._buckets[bucket]
+                while token_ids and removed < max_items:
+                    self._revoked.discard(token_ids.pop())
+                    removed += 1
+                if not token_ids:
+                    heapq.heappop(self._bucket_heap)
+                    del self._buckets[bucket]
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+class StatelessSessionStore(SessionStore):
+    """
+    Sessions validated from the signed token alone.
+
+    The token carries ``user_id`` and a random token id (``jti``) and is
+    checked with ``serializer.loads(max_age=...)``: no lookup, no per-session
+    memory. Logout adds the token id to a ``RevocationList`` until the token
+    would have expired anyway.
+
+    "Log out everywhere" records a per-user cutoff: tokens of that user
+    issued before it are rejected (except the one the user chose to keep).
+    The issue time is the payload's ``created_at`` (microseconds); the
+    signature timestamp only has whole seconds, so a login in the same
+    second as the cutoff would look older than it.
+    Cutoffs are forgotten once every token they cover has expired. Tokens
+    are not tracked, so they cannot be listed or capped per user.
+
+    Revocations are per process: with several instances a logged-out token
+    stays valid on the others until it expires. Tokens cannot be extended,
+    so ``touch`` only reports whether the token is still valid.
+
+    Args:
+        serializer: Serializer used to sign session tokens
+        max_age: Session lifetime
+        revocations: Revocation list (a new one by default)
+    """
+
+    def __init__(
+        self,
+        serializer: URLSafeTimedSerializer,
+        max_age: timedelta,
+        revocations: RevocationList | None = None,
+    ):
+        self.serializer = serializer
+        self.max_age = max_age
+        self.revocations = revocations if revocations is not None else RevocationList()
+        # {user_id: (cutoff epoch seconds, token id kept)}
+        self._user_cutoffs: dict[int, tuple[float, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, session_id: str) -> tuple[dict[str, Any], float] | None:
+        """Return (payload, expires_at) for a valid token, None otherwise."""
+        try:
+            payload, signed_at = self.serializer.loads(
+                session_id, max_age=int(self.max_age.total_seconds()), return_timestamp=True
+            )
+        except BadSignature:  # Also covers SignatureExpired
+            return None
+        if not isinstance(payload, dict) or "user_id" not in payload:
+            return None
+        return payload, signed_at.timestamp() + self.max_age.total_seconds()
+
+    def _issued_before(self, payload: dict[str, Any], expires_at: float, cutoff_at: float) -> bool:
+        """Whether a token was issued before ``cutoff_at`` (epoch seconds)."""
+        try:
+            created_at = datetime.fromisoformat(payload["created_at"])
+        except (KeyError, TypeError, ValueError):
+            # Signature timestamp only: whole seconds, so tokens signed in the
+            # cutoff's second are let through rather than new logins rejected
+            signed_at = expires_at - self.max_age.total_seconds()
+            return signed_at < math.floor(cutoff_at)
+        # created_at is naive UTC (see app.auth.create_session)
+        return created_at.replace(tzinfo=UTC).timestamp() <= cutoff_at
+
+    def create(self, session_id: str, user_id: int, ttl: timedelta) -> None:
+        # The signed token is the session: nothing to store
+        pass
+
+    def get(self, session_id: str) -> int | None:
+        loaded = self._load(session_id)
+        if loaded is None:
+            return None
+        payload, expires_at = loaded
+        token_id = payload.get("jti", session_id)
+        if self.revocations.is_revoked(token_id):
+            return None
+        user_id: int = payload["user_id"]
+        cutoff = self._user_cutoffs.get(user_id)
+        if cutoff is not None:
+            cutoff_at, kept_token_id = cutoff
+            if token_id != kept_token_id and self._issued_before(payload, expires_at, cutoff_at):
+                return None
+        return user_id
+
+    def delete(self, session_id: str) -> bool:
+        loaded = self._load(session_id)
+        if loaded is None:
+            return False
+        payload, expires_at = loaded
+        token_id = payload.get("jti", session_id)
+        if self.revocations.is_revoked(token_id):
+            return False
+        self.revocations.revoke(token_id, expires_at)
+        return True
+
+    def touch(self, session_id: str, ttl: timedelta) -> bool:
+        return self.get(session_id) is not None
+
+    def delete_user_sessions(self, user_id: int, keep_session_id: str | None = None) -> int:
+        """Revoke every token of the user; the count is unknown, so 0 is returned."""
+        kept_token_id = None
+        if keep_session_id is not None:
+            loaded = self._load(keep_session_id)
+            if loaded is not None:
+                kept_token_id = loaded[0].get("jti", keep_session_id)
+        with self._lock:
+            self._user_cutoffs[user_id] = (time.time(), kept_token_id)
+        return 0
+
+    def _prune_cutoffs(self) -> int:
+        horizon = time.time() - self.max_age.total_seconds()
+        with self._lock:
+            expired = [
+                user_id
+                for user_id, (cutoff_at, _) in self._user_cutoffs.items()
+                if cutoff_at < horizon
+            ]
+            for user_id in expired:
+                del self._user_cutoffs[user_id]
+        return len(expired)
+
+    def sweep(self, max_batch: int) -> int:
+        return self.revocations.prune(max_batch) + self._prune_cutoffs()
+
+    def has_expired(self) -> bool:
+        return self.revocations.has_expired()
+
+
+def create_session_store(
+    serializer: URLSafeTimedSerializer,
+    max_age: timedelta,
+    backend: str = SESSION_BACKEND,
+) -> SessionStore:
+    """
+    Build the session store selected by SESSION_BACKEND.
+
+    Args:
+        serializer: Serializer used to sign session tokens
+        max_age: Session lifetime
+        backend: "memory", "redis", "database" or "stateless"
+
+    Returns:
+        SessionStore instance
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "redis":
+        import redis
+
+        return RedisSessionStore(redis.Redis.from_url(REDIS_URL))
+    if backend == "database":
+        from app.session_db import DatabaseSessionStore
+
+        return DatabaseSessionStore()
+    if backend == "stateless":
+        return StatelessSessionStore(serializer, max_age)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+async def run_session_sweeper(
+    store: SessionStore,
+    interval: float = SESSION_SWEEP_INTERVAL,
+    batch_size: int = SESSION_SWEEP_BATCH,
+) -> None:
+    """
+    Periodically remove expired sessions in small batches.
+
+    Each batch holds the store lock (or a DB transaction) only briefly and
+    runs in a worker thread, so large backlogs never block request handling.
+
+    Args:
+        store: Session store to sweep
+        interval: Seconds to wait once no expired sessions are left
+        batch_size: Max expiry entries processed per batch
+    """
+    while True:
+        cycle_start = time.monotonic()
+        cycle_evicted = 0
+        try:
+            while True:
+                cycle_evicted += await asyncio.to_thread(store.sweep, batch_size)
+                if not await asyncio.to_thread(store.has_expired):
+                    break
+        except Exception:
+            logger.exception("Session sweep failed")
+
+        evicted_total.inc(cycle_evicted)
+        count = store.count()
+        if count is not None:
+            live_sessions.set(count)
+
+        await asyncio.sleep(interval)
+        eviction_rate.set(round(cycle_evicted / (time.monotonic() - cycle_start), 3))
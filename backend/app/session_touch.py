@@ -0,0 +1,185 @@
+"""
+Sliding session expiration with write-behind touches.
+
+Every authenticated request extends its session to SESSION_EXPIRATION from
+now. Writing that to the session store on every request would turn each
+read (``/api/auth/me``, ``/api/dashboard/data``) into a write, so touches
+are coalesced and written behind:
+
+- a session is touched at most once per SESSION_TOUCH_INTERVAL; later
+  requests within the interval are no-ops
+- touches are buffered in memory and flushed every
+  SESSION_TOUCH_FLUSH_INTERVAL seconds with ``SessionStore.touch_many``, in
+  batches of SESSION_TOUCH_BATCH (one pipelined round trip each on Redis)
+
+A session therefore expires between SESSION_EXPIRATION and
+SESSION_EXPIRATION + SESSION_TOUCH_INTERVAL after the last request. Touches
+buffered when the process dies are lost, the session then just expires a
+little earlier. Stateless sessions cannot be extended (the expiry is part
+of the signed token), so sliding expiration does not apply to them.
+
+Configuration (environment variables):
+- SESSION_SLIDING_EXPIRATION: "false" keeps fixed expiration (default: "true")
+- SESSION_TOUCH_INTERVAL: min seconds between touches of a session (default: 300)
+- SESSION_TOUCH_FLUSH_INTERVAL: seconds between flushes (default: 5)
+- SESSION_TOUCH_BATCH: max sessions per ``touch_many`` call (default: 1000)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import timedelta
+
+from app import metrics
+from app.session_store import SessionStore, session_key
+
+logger = logging.getLogger(__name__)
+
+SESSION_SLIDING_EXPIRATION = os.getenv("SESSION_SLIDING_EXPIRATION", "true").lower() == "true"
+SESSION_TOUCH_INTERVAL = float(os.getenv("SESSION_TOUCH_INTERVAL", "300"))
+SESSION_TOUCH_FLUSH_INTERVAL = float(os.getenv("SESSION_TOUCH_FLUSH_INTERVAL", "5"))
+SESSION_TOUCH_BATCH = int(os.getenv("SESSION_TOUCH_BATCH", "1000"))
+
+# Metrics
+touches_coalesced_total = metrics.counter(
+    "session_touches_coalesced_total", "Session touches skipped (already touched recently)"
+)
+touches_flushed_total = metrics.counter(
+    "session_touches_flushed_total", "Session touches written to the session store"
+)
+touch_flush_latency = metrics.histogram(
+    "session_touch_flush_latency_ms", "Time to write one batch of session touches"
+)
+
+
+class SessionTouchBuffer:
+    """
+    Coalesces session touches and buffers them until the next flush.
+
+    Args:
+        interval: Min seconds between two touches of the same session
+        enabled: When False nothing is ever recorded
+    """
+
+    def __init__(
+        self,
+        interval: float = SESSION_TOUCH_INTERVAL,
+        enabled: bool = SESSION_SLIDING_EXPIRATION,
+    ):
+        self.interval = interval
+        self.enabled = enabled
+        # {session_key: last touch (monotonic)}, oldest first
+        self._last_touch: OrderedDict[bytes, float] = OrderedDict()
+        # Session ids waiting for the next flush (dict used as an ordered set)
+        self._pending: dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def mark_fresh(self, session_id: str) -> None:
+        """Count a just-created session as touched (its TTL is already full)."""
+        if self.enabled:
+            with self._lock:
+                self._last_touch[session_key(session_id)] = time.monotonic()
+
+    def record(self, session_id: str) -> bool:
+        """
+        Record a request on a session.
+
+        Args:
+            session_id: Session ID of the request
+
+        Returns:
+            True if a touch was scheduled, False if coalesced with a recent one
+        """
+        if not self.enabled:
+            return False
+        key = session_key(session_id)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_touch.get(key)
+            if last is not None and now - last < self.interval:
+                touches_coalesced_total.inc()
+                return False
+            self._last_touch[key] = now
+            self._last_touch.move_to_end(key)
+            self._pending[session_id] = None
+        return True
+
+    def drain(self) -> list[str]:
+        """
+        Take the pending touches and forget touches older than ``interval``.
+
+        Returns:
+            Session IDs to touch
+        """
+        horizon = time.monotonic() - self.interval
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            last_touch = self._last_touch
+            while last_touch and next(iter(last_touch.values())) <= horizon:
+                last_touch.popitem(last=False)
+        return pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+def flush_touches(
+    buffer: SessionTouchBuffer,
+    store: SessionStore,
+    ttl: timedelta,
+    batch_size: int = SESSION_TOUCH_BATCH,
+) -> int:
+    """
+    Write the pending touches to ``store``.
+
+    Args:
+        buffer: Touch buffer to drain
+        store: Session store to extend sessions in
+        ttl: New time until expiration of each touched session
+        batch_size: Max sessions per ``touch_many`` call
+
+    Returns:
+        Number of sessions that still existed and were extended
+    """
+    pending = buffer.drain()
+    extended = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        start_time = time.perf_counter()
+        extended += store.touch_many(batch, ttl)
+        touch_flush_latency.observe((time.perf_counter() - start_time) * 1000)
+        touches_flushed_total.inc(len(batch))
+    return extended
+
+
+async def run_touch_flusher(
+    flush: Callable[[], int],
+    interval: float = SESSION_TOUCH_FLUSH_INTERVAL,
+) -> None:
+    """
+    Flush buffered session touches periodically, off the event loop.
+
+    On cancellation (shutdown) the remaining touches are flushed; if that
+    flush fails the error is logged and the cancellation goes on.
+
+    Args:
+        flush: Function writing the pending touches (e.g. ``auth.flush_session_touches``)
+        interval: Seconds between flushes
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(flush)
+            except Exception:
+                logger.exception("Session touch flush failed")
+    finally:
+        try:
+            flush()
+        except Exception:
+            logger.exception("Final session touch flush failed")
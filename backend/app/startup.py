@@ -0,0 +1,80 @@
+"""
+Startup timing (cold starts).
+
+Breaks a cold start down into phases, all measured from the import of the
+``app`` package (``app.IMPORT_STARTED_AT``):
+- import: loading ``app.main`` and everything it imports
+- database: the startup schema step (``app.schema_version``), including
+  opening the first DB connection
+- ready: startup finished, the server accepts requests
+- first request: the first response sent
+
+Each phase is logged once and exposed as a gauge (milliseconds):
+``startup_import_ms``, ``startup_db_ms``, ``startup_ready_ms`` and
+``startup_first_request_ms``.
+"""
+
+import logging
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import IMPORT_STARTED_AT, metrics
+
+logger = logging.getLogger(__name__)
+
+import_ms = metrics.gauge("startup_import_ms", "Time to import the application")
+db_ms = metrics.gauge("startup_db_ms", "Time spent on the database at startup")
+ready_ms = metrics.gauge("startup_ready_ms", "Time from import to accepting requests")
+first_request_ms = metrics.gauge(
+    "startup_first_request_ms", "Time from import to the first response"
+)
+
+
+def elapsed_ms(since: float = IMPORT_STARTED_AT) -> float:
+    """Milliseconds elapsed since ``since`` (a ``time.perf_counter`` value)."""
+    return (time.perf_counter() - since) * 1000
+
+
+def record_import() -> None:
+    """Record the end of the import phase (call at the end of ``app.main``)."""
+    import_ms.set(elapsed_ms())
+    logger.info(f"Startup: imports took {import_ms.value:.0f} ms")
+
+
+def record_db(started_at: float) -> None:
+    """Record the startup database step, started at ``started_at``."""
+    db_ms.set(elapsed_ms(started_at))
+    logger.info(f"Startup: database took {db_ms.value:.0f} ms")
+
+
+def record_ready() -> None:
+    """Record that startup finished."""
+    ready_ms.set(elapsed_ms())
+    logger.info(f"Startup: ready {ready_ms.value:.0f} ms after import")
+
+
+class FirstRequestTimer:
+    """
+    ASGI middleware recording when the first response was sent.
+
+    After the first request it only checks a flag.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.done = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.done or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not self.done:
+                self.done = True
+                first_request_ms.set(elapsed_ms())
+                logger.info(
+                    f"Startup: first request served {first_request_ms.value:.0f} ms after import"
+                )
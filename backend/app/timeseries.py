@@ -0,0 +1,163 @@
+"""
+Vectorized time series for chart payloads (NumPy).
+
+Charts are built from per-day rows (``app.sales``) with array operations
+instead of per-point Python loops:
+- ``bucket_range``: start day of every day/week/month bucket of a range
+- ``aggregate``: sums per-day values into those buckets, with zeros for
+  buckets without rows (gap filling)
+- ``moving_average``: trailing moving average
+- ``lttb``: Largest-Triangle-Three-Buckets downsampling to ``max_points``
+
+LTTB keeps the first and last points and, in each of ``max_points - 2``
+equal slices of the series, the point forming the largest triangle with
+the previously kept point and the average of the next slice: peaks and
+dips survive, unlike with plain decimation or averaging. Each choice
+depends on the previous one, so slices are walked in a Python loop
+(``max_points`` iterations); the work inside each slice is vectorized.
+
+Days are ``datetime64[D]``; weeks start on Monday, months on the 1st.
+"""
+
+from datetime import date
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+
+Bucket = Literal["day", "week", "month"]
+
+Days = npt.NDArray[np.datetime64]
+
+_ONE_DAY = np.timedelta64(1, "D")
+_ONE_MONTH = np.timedelta64(1, "M")
+# 1970-01-01 (day 0) was a Thursday: Monday-based weekday of day 0
+_EPOCH_WEEKDAY = 3
+
+
+def bucket_start(days: Days, bucket: Bucket) -> Days:
+    """
+    First day of the bucket containing each day.
+
+    Args:
+        days: Days (``datetime64[D]``)
+        bucket: Bucket size
+
+    Returns:
+        Bucket start of each day
+    """
+    if bucket == "week":
+        weekday = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        mondays: Days = days - weekday.astype("timedelta64[D]")
+        return mondays
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+
+def bucket_range(start: date, end: date, bucket: Bucket) -> Days:
+    """
+    Start day of every bucket overlapping [start, end], in order.
+
+    Args:
+        start: First day of the range
+        end: Last day of the range
+        bucket: Bucket size
+
+    Returns:
+        Bucket starts (the first one may be before ``start``)
+    """
+    first, last = np.datetime64(start, "D"), np.datetime64(end, "D")
+    if bucket == "month":
+        months = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + _ONE_MONTH)
+        return months.astype("datetime64[D]")
+    step = 7 if bucket == "week" else 1
+    first = bucket_start(np.array([first]), bucket)[0]
+    return np.arange(first, last + _ONE_DAY, np.timedelta64(step, "D"))
+
+
+def aggregate(
+    starts: Days, bucket: Bucket, days: Days, *columns: npt.ArrayLike
+) -> list[npt.NDArray[np.int64]]:
+    """
+    Sum per-day values into buckets, filling buckets without rows with 0.
+
+    Args:
+        starts: Bucket starts (``bucket_range``)
+        bucket: Bucket size of ``starts``
+        days: Day of each row, within the buckets
+        *columns: Integer values of each row (same length as ``days``)
+
+    Returns:
+        One array per column with the sum of each bucket
+    """
+    index = np.searchsorted(starts, bucket_start(days, bucket))
+    return [
+        np.bincount(index, weights=np.asarray(column, dtype=np.float64), minlength=len(starts))
+        .round()
+        .astype(np.int64)
+        for column in columns
+    ]
+
+
+def moving_average(values: npt.ArrayLike, window: int) -> npt.NDArray[np.float64]:
+    """
+    Trailing moving average (the first points average what precedes them).
+
+    Args:
+        values: Series
+        window: Number of points averaged
+
+    Returns:
+        Average of each point and the ``window - 1`` before it
+    """
+    series = np.asarray(values, dtype=np.float64)
+    totals = np.concatenate(([0.0], np.cumsum(series)))
+    ends = np.arange(1, len(series) + 1)
+    begins = np.maximum(ends - window, 0)
+    return (totals[ends] - totals[begins]) / (ends - begins)
+
+
+def lttb(x: npt.ArrayLike, y: npt.ArrayLike, max_points: int) -> npt.NDArray[np.intp]:
+    """
+    Pick at most ``max_points`` points with Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Increasing x of each point
+        y: y of each point
+        max_points: Points to keep (at least 3)
+
+    Returns:
+        Indices of the kept points, increasing (all points if there are
+        no more than ``max_points``)
+
+    Raises:
+        ValueError: If ``max_points`` is below 3
+    """
+    xs = np.asarray(x, dtype=np.float64)
+    ys = np.asarray(y, dtype=np.float64)
+    count = len(xs)
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    if count <= max_points:
+        return np.arange(count)
+
+    # Slices of the points between the first and last: [edges[i], edges[i + 1])
+    every = (count - 2) / (max_points - 2)
+    edges = np.append((np.arange(max_points - 1) * every).astype(np.intp) + 1, count)
+
+    kept = np.empty(max_points, dtype=np.intp)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for i in range(max_points - 2):
+        low, high = edges[i], edges[i + 1]
+        next_x = xs[high : edges[i + 2]].mean()
+        next_y = ys[high : edges[i + 2]].mean()
+        # Twice the triangle areas (previous kept point, candidate, next average)
+        areas = np.abs(
+            (xs[previous] - next_x) * (ys[low:high] - ys[previous])
+            - (xs[previous] - xs[low:high]) * (next_y - ys[previous])
+        )
+        previous = low + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
@@ -0,0 +1,442 @@
+"""
+Bulk user import/export (CLI).
+
+Loads users in bulk (customer migrations) without going through
+``POST /api/auth/signup`` once per user, i.e. without one hash on the
+request path and one commit per user:
+- input is streamed (CSV with a header row, or NDJSON) in batches of
+  ``--batch-size`` rows, so memory stays flat whatever the file size
+- plaintext passwords are hashed with bcrypt in a process pool (all CPUs by
+  default, cost from BCRYPT_ROUNDS/BCRYPT_TARGET_MS like the API); rows can
+  carry a bcrypt ``password_hash`` instead (exports, other systems)
+- each batch is one write: ``COPY`` into a temporary table then one
+  ``INSERT ... SELECT`` on Postgres, one ``executemany`` on SQLite; users
+  whose email or google_id already exists are skipped, so a failed import
+  can be re-run
+
+Input columns/keys: ``email`` (required), ``password`` or
+``password_hash`` (optional: Google-only users have neither),
+``google_id`` and ``auth_provider`` (optional; "google" when a google_id
+is given, "email" otherwise). Invalid rows are reported and skipped.
+
+Export streams users with a server-side cursor to CSV or NDJSON, without
+password hashes unless ``--with-password-hashes`` is given.
+
+Both report progress and throughput (rows/s) on stderr.
+
+Usage (from backend/):
+    python -m app.user_bulk import users.csv
+    python -m app.user_bulk import users.ndjson --workers 8 --batch-size 10000
+    python -m app.user_bulk export users.ndjson --with-password-hashes
+    python -m app.user_bulk export - --format csv > users.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
+from itertools import islice, repeat
+from pathlib import Path
+from typing import Any, Literal, NamedTuple, TextIO
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import Engine, insert, select
+
+from app.models import User
+from app.password_hashing import hash_in_worker
+from app.schemas import UserSignup
+
+# Columns written by import (created_at uses the server default)
+IMPORT_COLUMNS = ("email", "password_hash", "auth_provider", "google_id")
+EXPORT_COLUMNS = ("id", "email", "auth_provider", "google_id", "created_at")
+
+BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+_email_adapter: TypeAdapter[str] = TypeAdapter(EmailStr)
+
+
+class InvalidRowError(ValueError):
+    """Raised for an input row that can't be imported."""
+
+
+class BulkResult(NamedTuple):
+    """Outcome of an import or export."""
+
+    rows: int  # Rows read (import) or written (export)
+    inserted: int  # Users created (import)
+    skipped: int  # Users that already existed (import)
+    rejected: int  # Invalid input rows (import)
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class _PendingUser(NamedTuple):
+    """Validated input row; ``password`` still needs hashing."""
+
+    email: str
+    password: str | None
+    password_hash: str | None
+    auth_provider: str
+    google_id: str | None
+
+
+def detect_format(path: str, fmt: str | None) -> str:
+    """Return ``fmt``, or "csv"/"ndjson" from the file extension."""
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Stream input rows.
+
+    Args:
+        stream: Text input
+        fmt: "csv" (header row first) or "ndjson"
+
+    Yields:
+        (line number, row dict), or (line number, error message) for
+        lines that can't be parsed
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_num, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_num, "expected a JSON object"
+            continue
+        yield line_num, row
+
+
+def validate_row(row: dict[str, Any]) -> _PendingUser:
+    """
+    Validate and normalize one input row.
+
+    Args:
+        row: Input row
+
+    Returns:
+        User to import
+
+    Raises:
+        InvalidRowError: If the row can't be imported
+    """
+    password = row.get("password") or None
+    password_hash = row.get("password_hash") or None
+    google_id = row.get("google_id") or None
+    try:
+        if password is not None:
+            if password_hash is not None:
+                raise InvalidRowError("both password and password_hash given")
+            # Same rules as signup
+            email = UserSignup.model_validate(
+                {"email": row.get("email"), "password": password}
+            ).email
+        else:
+            email = _email_adapter.validate_python(row.get("email"))
+    except ValidationError as e:
+        raise InvalidRowError(e.errors()[0]["msg"]) from e
+    if password_hash is not None and not BCRYPT_HASH.match(password_hash):
+        raise InvalidRowError("password_hash is not a bcrypt hash")
+    auth_provider = row.get("auth_provider") or ("google" if google_id else "email")
+    if auth_provider not in ("email", "google"):
+        raise InvalidRowError(f"unknown auth_provider {auth_provider!r}")
+    return _PendingUser(email, password, password_hash, auth_provider, google_id)
+
+
+def hash_batch(
+    users: list[_PendingUser], executor: Executor | None, rounds: int | None
+) -> list[dict[str, Any]]:
+    """
+    Hash the plaintext passwords of a batch (in parallel with ``executor``).
+
+    Args:
+        users: Validated users
+        executor: Process pool, or None to hash in this process
+        rounds: bcrypt cost factor (None = passlib default)
+
+    Returns:
+        Rows with the IMPORT_COLUMNS
+    """
+    passwords = [user.password for user in users if user.password is not None]
+    if executor is not None:
+        chunksize = max(1, len(passwords) // (4 * (os.cpu_count() or 1)))
+        hashes = iter(executor.map(hash_in_worker, passwords, repeat(rounds), chunksize=chunksize))
+    else:
+        hashes = iter(map(hash_in_worker, passwords, repeat(rounds)))
+    return [
+        {
+            "email": user.email,
+            "password_hash": next(hashes) if user.password is not None else user.password_hash,
+            "auth_provider": user.auth_provider,
+            "google_id": user.google_id,
+        }
+        for user in users
+    ]
+
+
+def _copy_batch(engine: Engine, rows: list[dict[str, Any]]) -> int:
+    """Write a batch on Postgres: COPY into a temp table, then one INSERT ... SELECT."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # COPY csv: unquoted empty field = NULL
+        writer.writerow(["" if row[c] is None else row[c] for c in IMPORT_COLUMNS])
+    buffer.seek(0)
+    columns = ", ".join(IMPORT_COLUMNS)
+
+    raw = engine.raw_connection()
+    try:
+        # psycopg2 connection: copy_expert isn't part of the DBAPI
+        pg_connection: Any = raw.driver_connection
+        with pg_connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE import_users ({', '.join(c + ' text' for c in IMPORT_COLUMNS)})"
+                " ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY import_users ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cursor.execute(
+                f"INSERT INTO users ({columns}) SELECT {columns} FROM import_users"
+                " ON CONFLICT DO NOTHING"
+            )
+            inserted: int = cursor.rowcount
+        raw.commit()
+    finally:
+        raw.close()
+    return inserted
+
+
+def _executemany_batch(engine: Engine, rows: list[dict[str, Any]]) -> int:
+    """Write a batch with one executemany (SQLite and other databases)."""
+    with engine.begin() as conn:
+        result = conn.execute(insert(User).prefix_with("OR IGNORE", dialect="sqlite"), rows)
+    return result.rowcount
+
+
+def write_batch(engine: Engine, rows: list[dict[str, Any]]) -> int:
+    """
+    Insert a batch of users, skipping existing emails/google_ids.
+
+    Args:
+        engine: Database engine
+        rows: Rows with the IMPORT_COLUMNS
+
+    Returns:
+        Number of users inserted
+    """
+    if not rows:
+        return 0
+    if engine.dialect.name == "postgresql":
+        return _copy_batch(engine, rows)
+    return _executemany_batch(engine, rows)
+
+
+def import_users(
+    engine: Engine,
+    rows: Iterable[tuple[int, dict[str, Any] | str]],
+    batch_size: int = 5000,
+    workers: int = os.cpu_count() or 1,
+    rounds: int | None = None,
+    report: Callable[[str], None] = lambda message: None,
+) -> BulkResult:
+    """
+    Import users from a stream of input rows.
+
+    Args:
+        engine: Database engine
+        rows: (line number, row or parse error) pairs, see ``read_rows``
+        batch_size: Rows hashed and written together
+        workers: Hashing processes (0 = hash in this process)
+        rounds: bcrypt cost factor (None = passlib default)
+        report: Receives progress and rejected-row messages
+
+    Returns:
+        Import result
+    """
+    start = time.perf_counter()
+    total = inserted = rejected = 0
+    executor = (
+        # spawn, like app.password_hashing: no forking with the engine's threads
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if workers > 0
+        else None
+    )
+    try:
+        rows = iter(rows)
+        while batch := list(islice(rows, batch_size)):
+            users = []
+            for line_num, row in batch:
+                try:
+                    if isinstance(row, str):
+                        raise InvalidRowError(row)
+                    users.append(validate_row(row))
+                except InvalidRowError as e:
+                    rejected += 1
+                    report(f"line {line_num}: {e}")
+            inserted += write_batch(engine, hash_batch(users, executor, rounds))
+            total += len(batch)
+            elapsed = time.perf_counter() - start
+            report(f"{total:,} rows, {inserted:,} inserted ({total / elapsed:,.0f} rows/s)")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return BulkResult(
+        rows=total,
+        inserted=inserted,
+        skipped=total - inserted - rejected,
+        rejected=rejected,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def export_users(
+    engine: Engine,
+    stream: TextIO,
+    fmt: str,
+    with_password_hashes: bool = False,
+    batch_size: int = 5000,
+    report: Callable[[str], None] = lambda message: None,
+) -> BulkResult:
+    """
+    Stream every user to ``stream`` with a server-side cursor.
+
+    Args:
+        engine: Database engine
+        stream: Text output
+        fmt: "csv" or "ndjson"
+        with_password_hashes: Include the ``password_hash`` column
+        batch_size: Rows fetched from the cursor at a time
+        report: Receives progress messages
+
+    Returns:
+        Export result
+    """
+    columns = list(EXPORT_COLUMNS)
+    if with_password_hashes:
+        columns.insert(2, "password_hash")
+    query = select(*(getattr(User, c) for c in columns)).order_by(User.id)
+
+    start = time.perf_counter()
+    total = 0
+    csv_writer = csv.writer(stream) if fmt == "csv" else None
+    if csv_writer is not None:
+        csv_writer.writerow(columns)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            for row in partition:
+                if csv_writer is not None:
+                    csv_writer.writerow("" if v is None else _text(v) for v in row)
+                else:
+                    stream.write(json.dumps(dict(zip(columns, row, strict=True)), default=_text))
+                    stream.write("\n")
+            total += len(partition)
+            elapsed = time.perf_counter() - start
+            report(f"{total:,} rows ({total / elapsed:,.0f} rows/s)")
+    return BulkResult(
+        rows=total, inserted=0, skipped=0, rejected=0, seconds=time.perf_counter() - start
+    )
+
+
+def _text(value: Any) -> Any:
+    """Datetimes as ISO 8601, other values unchanged."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _report(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def _open_stream(path: str, mode: Literal["r", "w"]) -> AbstractContextManager[TextIO]:
+    """Open ``path`` as text; ``-`` is stdin/stdout, which is left open on exit."""
+    if path == "-":
+        return nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    return Path(path).open(mode, newline="", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk user import/export")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Create users from CSV/NDJSON")
+    import_parser.add_argument("path", help="Input file, - for stdin")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--batch-size", type=int, default=5000)
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Password hashing processes (0 = no pool)",
+    )
+
+    export_parser = commands.add_parser("export", help="Write every user as CSV/NDJSON")
+    export_parser.add_argument("path", help="Output file, - for stdout")
+    export_parser.add_argument("--format", choices=["csv", "ndjson"])
+    export_parser.add_argument("--batch-size", type=int, default=5000)
+    export_parser.add_argument("--with-password-hashes", action="store_true")
+
+    args = parser.parse_args(argv)
+    fmt = detect_format(args.path, args.format)
+
+    # Imported here: the spawned hashing workers re-import this module and
+    # need none of the session machinery app.auth pulls in
+    from app import auth
+    from app.database import engine
+
+    if args.command == "import":
+        auth.configure_password_hashing()
+        with _open_stream(args.path, "r") as stream:
+            result = import_users(
+                engine,
+                read_rows(stream, fmt),
+                batch_size=args.batch_size,
+                workers=args.workers,
+                rounds=auth.bcrypt_rounds,
+                report=_report,
+            )
+        _report(
+            f"Imported {result.inserted:,} users ({result.skipped:,} already existed, "
+            f"{result.rejected:,} rejected) from {result.rows:,} rows in "
+            f"{result.seconds:.1f}s: {result.rows_per_second:,.0f} rows/s"
+        )
+    else:
+        with _open_stream(args.path, "w") as stream:
+            result = export_users(
+                engine,
+                stream,
+                fmt,
+                with_password_hashes=args.with_password_hashes,
+                batch_size=args.batch_size,
+                report=_report,
+            )
+        _report(
+            f"Exported {result.rows:,} users in {result.seconds:.1f}s: "
+            f"{result.rows_per_second:,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
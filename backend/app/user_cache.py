@@ -0,0 +1,156 @@
+"""
+Cache of current-user snapshots for authenticated requests.
+
+``/api/auth/me`` and every dashboard endpoint resolve the session's user on
+each request. Users rarely change, so the resolved user is kept as a
+detached ``UserResponse`` snapshot (no live ORM object, no lazy loads) in a
+bounded LRU cache with a TTL: most authenticated requests need no DB round
+trip at all.
+
+Entries are invalidated explicitly where users are modified (Google account
+linking, password rehash) and on any ORM update/delete of a ``User`` as a
+safety net. The TTL bounds staleness for changes made outside this process
+(other instances, manual SQL).
+
+Configuration (environment variables):
+- USER_CACHE_ENABLED: "false" disables the cache (default: "true")
+- USER_CACHE_MAX_SIZE: max cached users, least recently used are evicted (default: 10000)
+- USER_CACHE_TTL: seconds a snapshot stays valid (default: 60)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import Row, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics
+from app.models import User
+from app.schemas import UserResponse
+from app.user_repository import get_user_row
+
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+# Metrics
+cache_hits_total = metrics.counter("user_cache_hits_total", "Current-user lookups served from cache")
+cache_misses_total = metrics.counter(
+    "user_cache_misses_total", "Current-user lookups that queried the database"
+)
+cache_size = metrics.gauge("user_cache_size", "Users currently cached")
+
+
+class UserCache:
+    """
+    LRU cache of user snapshots with a TTL.
+
+    Args:
+        max_size: Max number of users kept (least recently used are evicted)
+        ttl: Seconds a snapshot stays valid
+        enabled: When False every lookup is a miss and nothing is stored
+    """
+
+    def __init__(
+        self,
+        max_size: int = USER_CACHE_MAX_SIZE,
+        ttl: float = USER_CACHE_TTL,
+        enabled: bool = USER_CACHE_ENABLED,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        # {user_id: (expires_at_monotonic, snapshot)}, ordered by last use
+        self._entries: OrderedDict[int, tuple[float, UserResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> UserResponse | None:
+        """
+        Get the cached snapshot of a user.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Snapshot if cached and fresh, None otherwise
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                cache_hits_total.inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+        cache_misses_total.inc()
+        return None
+
+    def put(self, user: User | Row[Any]) -> UserResponse:
+        """
+        Cache a snapshot of ``user``.
+
+        Args:
+            user: User (or row of its ``UserResponse`` columns) loaded from the database
+
+        Returns:
+            The snapshot
+        """
+        snapshot = UserResponse.model_validate(user)
+        if self.enabled:
+            with self._lock:
+                self._entries[snapshot.id] = (time.monotonic() + self.ttl, snapshot)
+                self._entries.move_to_end(snapshot.id)
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                cache_size.set(len(self._entries))
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached snapshot of a user (call after modifying it)."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            cache_size.set(len(self._entries))
+
+    def clear(self) -> None:
+        """Drop every cached snapshot."""
+        with self._lock:
+            self._entries.clear()
+            cache_size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = UserCache()
+
+
+async def get_cached_user(db: AsyncSession, user_id: int) -> UserResponse | None:
+    """
+    Resolve a user by ID, from the cache when possible.
+
+    Args:
+        db: Database session (used on cache misses only)
+        user_id: ID of the user
+
+    Returns:
+        Detached user snapshot, or None if the user doesn't exist
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    row = await get_user_row(db, user_id)
+    if row is None:
+        return None
+    return user_cache.put(row)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_modified_user(mapper: Any, connection: Any, target: User) -> None:
+    """Drop the snapshot of any user updated or deleted through the ORM."""
+    user_cache.invalidate(target.id)  # type: ignore[arg-type]
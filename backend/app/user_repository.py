@@ -0,0 +1,178 @@
+"""
+Hot user lookups as pre-built SQLAlchemy statements.
+
+The lookups by id, email and google_id run on (almost) every request or
+login. Building ``db.query(User).filter(...)`` per call costs Python time
+on every request: a new Query, new criteria, a cache-key computation.
+Here each statement is built once at import with a ``bindparam``; SQLAlchemy
+then finds its compiled form in the engine's statement cache and only the
+parameter changes between calls.
+
+The by-id and by-google_id lookups select only the columns of
+``UserResponse`` and return rows instead of ORM objects: no identity map,
+no change tracking, no ``password_hash``. The by-email lookup (login, which
+may rehash the password) returns ``User`` entities.
+
+Signup and first Google sign-ins write with a single ``INSERT ... ON
+CONFLICT ... RETURNING`` (Postgres and SQLite) instead of SELECT pre-checks
+followed by an INSERT/UPDATE and a refresh: one round trip, and concurrent
+signups for the same email can't both pass a pre-check.
+"""
+
+from collections.abc import Callable
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Insert, Row, Select, bindparam, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+# Columns of app.schemas.UserResponse
+USER_RESPONSE_COLUMNS = (User.id, User.email, User.auth_provider, User.created_at)
+
+USER_BY_ID: Select[Any] = select(*USER_RESPONSE_COLUMNS).where(User.id == bindparam("user_id"))
+USER_BY_EMAIL: Select[tuple[User]] = select(User).where(User.email == bindparam("email"))
+USER_BY_GOOGLE_ID: Select[Any] = select(*USER_RESPONSE_COLUMNS).where(
+    User.google_id == bindparam("google_id")
+)
+
+# Dialects with INSERT ... ON CONFLICT ... RETURNING
+_DIALECT_INSERTS: dict[str, Callable[..., Any]] = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@cache
+def _upserts(dialect: str) -> tuple[Insert, Insert]:
+    """
+    Build the signup and Google sign-in statements of a dialect (once).
+
+    Args:
+        dialect: SQLAlchemy dialect name ("postgresql" or "sqlite")
+
+    Returns:
+        (signup insert, Google sign-in upsert)
+    """
+    insert = _DIALECT_INSERTS[dialect]
+    signup = (
+        insert(User)
+        .values(
+            email=bindparam("email"),
+            password_hash=bindparam("password_hash"),
+            auth_provider="email",
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(*USER_RESPONSE_COLUMNS)
+    )
+    google = insert(User).values(
+        email=bindparam("email"), google_id=bindparam("google_id"), auth_provider="google"
+    )
+    # An existing account with this email is linked to the Google account
+    google = google.on_conflict_do_update(
+        index_elements=[User.email],
+        set_={"google_id": google.excluded.google_id, "auth_provider": "google"},
+    ).returning(*USER_RESPONSE_COLUMNS)
+    return signup, google
+
+
+async def get_user_row(db: AsyncSession, user_id: int) -> Row[Any] | None:
+    """
+    Load the ``UserResponse`` columns of a user.
+
+    Args:
+        db: Database session
+        user_id: ID of the user
+
+    Returns:
+        Row with id, email, auth_provider and created_at, or None
+    """
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
+    return result.first()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    """
+    Load a user by email.
+
+    Args:
+        db: Database session
+        email: Email address
+
+    Returns:
+        User or None
+    """
+    user: User | None = await db.scalar(USER_BY_EMAIL, {"email": email})
+    return user
+
+
+async def get_user_by_google_id(db: AsyncSession, google_id: str) -> Row[Any] | None:
+    """
+    Load the ``UserResponse`` columns of a user by Google user ID.
+
+    Args:
+        db: Database session
+        google_id: Google user ID (``sub`` claim)
+
+    Returns:
+        Row with id, email, auth_provider and created_at, or None
+    """
+    result = await db.execute(USER_BY_GOOGLE_ID, {"google_id": google_id})
+    return result.first()
+
+
+async def insert_user(db: AsyncSession, email: str, password_hash: str) -> Row[Any] | None:
+    """
+    Create an email/password user, unless the email is already registered.
+
+    The caller commits.
+
+    Args:
+        db: Database session
+        email: Email address
+        password_hash: Hashed password
+
+    Returns:
+        Row with id, email, auth_provider and created_at, or None if a
+        user with this email exists
+    """
+    signup, _ = _upserts(db.get_bind().dialect.name)
+    result = await db.execute(signup, {"email": email, "password_hash": password_hash})
+    return result.first()
+
+
+async def upsert_google_user(db: AsyncSession, email: str, google_id: str) -> Row[Any]:
+    """
+    Find or create the user of a Google sign-in.
+
+    A returning Google user is found with one read by ``google_id`` (no
+    write, as most sign-ins are). Otherwise one upsert creates the user, or
+    links the existing account with this email to the Google account (sets
+    ``google_id``, ``auth_provider="google"``). If another request assigned
+    this ``google_id`` meanwhile, the unique violation is caught, the
+    session rolled back and that user returned.
+
+    The caller commits.
+
+    Args:
+        db: Database session (with nothing else pending: it may be rolled back)
+        email: Email address from the ID token
+        google_id: Google user ID (``sub`` claim)
+
+    Returns:
+        Row with id, email, auth_provider and created_at
+    """
+    row = await get_user_by_google_id(db, google_id)
+    if row is not None:
+        return row
+
+    _, google = _upserts(db.get_bind().dialect.name)
+    try:
+        result = await db.execute(google, {"email": email, "google_id": google_id})
+    except IntegrityError:
+        await db.rollback()
+        row = await get_user_by_google_id(db, google_id)
+        if row is None:
+            raise
+        return row
+    return result.one()
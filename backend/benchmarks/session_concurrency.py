@@ -0,0 +1,89 @@
+"""
+Read throughput of the in-memory session store under concurrent threads.
+
+FastAPI runs sync handlers (and sync dependencies) in a threadpool, so
+session lookups happen from many threads at once. This benchmark measures
+total lookups per second for 1..N reader threads, optionally with a writer
+thread creating and deleting sessions at the same time, and checks every
+lookup returns the expected user id.
+
+On a GIL build reads do not scale with threads, but they must not degrade
+either: lookups take no lock. On a free-threaded build (3.13t) they scale.
+
+Usage (from backend/):
+    python -m benchmarks.session_concurrency
+    python -m benchmarks.session_concurrency --threads 1 2 4 8 16 --with-writer
+"""
+
+import argparse
+import threading
+import time
+from datetime import timedelta
+
+from app.session_store import InMemorySessionStore
+
+TTL = timedelta(days=7)
+
+
+def measure(store: InMemorySessionStore, ids: list[str], threads: int, seconds: float,
+            with_writer: bool) -> tuple[float, int]:
+    """Return (lookups per second, wrong results) for ``threads`` readers."""
+    stop = threading.Event()
+    counts = [0] * threads
+    wrong = [0] * threads
+
+    def reader(index: int) -> None:
+        local_count = 0
+        local_wrong = 0
+        offset = index * 7919
+        while not stop.is_set():
+            for i in range(1000):
+                position = (offset + i) % len(ids)
+                if store.get(ids[position]) != position:
+                    local_wrong += 1
+            local_count += 1000
+        counts[index] = local_count
+        wrong[index] = local_wrong
+
+    def writer() -> None:
+        i = 0
+        while not stop.is_set():
+            session_id = f"churn-{i}"
+            store.create(session_id, -1, TTL)
+            store.delete(session_id)
+            i += 1
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    if with_writer:
+        workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds, sum(wrong)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--with-writer", action="store_true")
+    args = parser.parse_args()
+
+    store = InMemorySessionStore(shards=args.shards)
+    ids = [f"session-{i}" for i in range(args.sessions)]
+    for user_id, session_id in enumerate(ids):
+        store.create(session_id, user_id, TTL)
+
+    print(f"{'threads':>8} {'lookups/s':>12} {'wrong':>6}")
+    for threads in args.threads:
+        rate, wrong = measure(store, ids, threads, args.seconds, args.with_writer)
+        print(f"{threads:>8} {rate:>12,.0f} {wrong:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Memory and lookup benchmark for in-memory session layouts.
+
+Compares the original layout ({token: {"user_id": int, "created_at": datetime}})
+with ``InMemorySessionStore`` (``SessionRecord`` slots keyed by a 16-byte
+digest, plus the expiry heap).
+
+Each (layout, count) case runs in a fresh subprocess so RSS numbers are not
+polluted by previous cases.
+
+Usage (from backend/):
+    python -m benchmarks.session_memory
+    python -m benchmarks.session_memory --counts 100000 1000000 --lookups 200000
+"""
+
+import argparse
+import gc
+import json
+import random
+import resource
+import secrets
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+SESSION_EXPIRATION = timedelta(days=7)
+TOKEN_BYTES = 80  # token_urlsafe(80) ~ 107 chars, same size as a signed session id
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _build_legacy(count: int, sample_every: int) -> tuple[Any, Any, list[str]]:
+    sessions: dict[str, dict[str, Any]] = {}
+    sample: list[str] = []
+    for user_id in range(count):
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        sessions[token] = {"user_id": user_id, "created_at": datetime.utcnow()}
+        if user_id % sample_every == 0:
+            sample.append(token)
+
+    def get(session_id: str) -> int | None:
+        if session_id not in sessions:
+            return None
+        session_data = sessions[session_id]
+        if datetime.utcnow() - session_data["created_at"] > SESSION_EXPIRATION:
+            return None
+        user_id: int = session_data["user_id"]
+        return user_id
+
+    return sessions, get, sample
+
+
+def _build_compact(count: int, sample_every: int) -> tuple[Any, Any, list[str]]:
+    from app.session_store import InMemorySessionStore
+
+    store = InMemorySessionStore()
+    sample: list[str] = []
+    for user_id in range(count):
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        store.create(token, user_id, SESSION_EXPIRATION)
+        if user_id % sample_every == 0:
+            sample.append(token)
+    return store, store.get, sample
+
+
+def run_case(layout: str, count: int, lookups: int) -> dict[str, Any]:
+    """Build ``count`` sessions with ``layout`` and measure memory and lookups."""
+    # Tokens are generated one at a time and only the store keeps them, like
+    # in the API process; a small sample is kept for the lookups.
+    sample_every = max(1, count // 10_000)
+    builder = _build_legacy if layout == "legacy" else _build_compact
+    if layout == "compact":
+        # Module imports (NumPy included) are not per-session memory
+        import app.session_store  # noqa: F401
+
+    gc.collect()
+    rss_before = _rss_bytes()
+    sessions, get, sample = builder(count, sample_every)
+    gc.collect()
+    rss_delta = _rss_bytes() - rss_before
+
+    rng = random.Random(42)
+    lookup_tokens = [rng.choice(sample) for _ in range(lookups)]
+    start = time.perf_counter()
+    for token in lookup_tokens:
+        get(token)
+    elapsed = time.perf_counter() - start
+    del sessions
+
+    return {
+        "layout": layout,
+        "sessions": count,
+        "rss_mb": round(rss_delta / 1024 / 1024, 1),
+        "bytes_per_session": round(rss_delta / count, 1),
+        "lookup_ns": round(elapsed / lookups * 1e9, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--case", nargs=2, metavar=("LAYOUT", "COUNT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        layout, count = args.case
+        print(json.dumps(run_case(layout, int(count), args.lookups)))
+        return
+
+    print(f"{'layout':<8} {'sessions':>10} {'RSS (MB)':>10} {'B/session':>10} {'lookup (ns)':>12}")
+    for count in args.counts:
+        for layout in ("legacy", "compact"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.session_memory",
+                 "--case", layout, str(count), "--lookups", str(args.lookups)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            print(
+                f"{result['layout']:<8} {result['sessions']:>10} {result['rss_mb']:>10} "
+                f"{result['bytes_per_session']:>10} {result['lookup_ns']:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
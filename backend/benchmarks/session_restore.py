@@ -0,0 +1,65 @@
+"""
+Startup replay time of persisted in-memory sessions.
+
+Writes a snapshot of N sessions plus a log of M extra operations to a
+temporary directory, then measures how long a fresh store takes to
+restore them (what the app lifespan does at startup).
+
+Usage (from backend/):
+    python -m benchmarks.session_restore
+    python -m benchmarks.session_restore --sessions 1000000 --log-ops 100000
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import timedelta
+
+from app.session_persistence import SessionJournal, attach_journal
+from app.session_store import InMemorySessionStore
+
+TTL = timedelta(days=7)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--log-ops", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = InMemorySessionStore()
+        for user_id in range(args.sessions):
+            store.create(f"session-{user_id}", user_id, TTL)
+        journal = SessionJournal(directory)
+        start = time.perf_counter()
+        journal.snapshot(store)
+        snapshot_s = time.perf_counter() - start
+
+        # Ops after the snapshot end up in the log (half creates, half deletes)
+        store.journal = journal
+        for i in range(args.log_ops):
+            if i % 2:
+                store.delete(f"session-{i}")
+            else:
+                store.create(f"extra-{i}", i, TTL)
+        start = time.perf_counter()
+        journal.flush()
+        flush_s = time.perf_counter() - start
+        expected = len(store)
+        del store
+
+        restored = InMemorySessionStore()
+        start = time.perf_counter()
+        attach_journal(restored, directory)
+        restore_s = time.perf_counter() - start
+
+        assert len(restored) == expected, (len(restored), expected)
+        print(f"sessions:       {args.sessions:,} (+{args.log_ops:,} log ops)")
+        print(f"snapshot write: {snapshot_s * 1000:,.0f} ms")
+        print(f"log flush:      {flush_s * 1000:,.0f} ms")
+        print(f"restore:        {restore_s * 1000:,.0f} ms ({expected:,} live sessions)")
+
+
+if __name__ == "__main__":
+    main()
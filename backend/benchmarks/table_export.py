@@ -0,0 +1,129 @@
+"""
+Peak memory and throughput of table exports, streamed vs built in memory.
+
+Exports one account's products (1M rows by default) to NDJSON and CSV:
+- streamed: ``app.table_export.stream_table``, what the export endpoint
+  sends (server-side cursor with ``yield_per``, one chunk per batch)
+- in memory: every row loaded with ``.all()``, converted to a list of dicts
+  and serialized as one document (what the endpoint avoids)
+
+Each run happens in a fresh process, so its peak RSS (``ru_maxrss``) is its
+own; the table shows the peak above the process's RSS after imports,
+rows/s and output size. Chunks are counted and dropped, as a socket would.
+
+Runs on a temporary SQLite file (aiosqlite).
+
+Usage (from backend/):
+    python -m benchmarks.table_export
+    python -m benchmarks.table_export --rows 200000 --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import resource
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.table_export import EXPORTS, stream_table
+
+
+def _rss_mb() -> float:
+    """Peak RSS of this process in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(path: Path, rows: int) -> None:
+    """Create the schema and ``rows`` products of user 1 (constant memory)."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO users (id, email, auth_provider) VALUES (1, 'u@example.com', 'email')"
+    )
+    conn.executemany(
+        "INSERT INTO products (user_id, nome, status, valor_cents) VALUES (1, ?, ?, ?)",
+        (
+            (f"Produto {i}", ("Ativo", "Pendente", "Inativo")[i % 3], i * 7 % 100_000)
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _streamed(path: Path, fmt: str, batch_size: int) -> tuple[int, int]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    factory = async_sessionmaker(engine)
+    sent = lines = 0
+    async for chunk in stream_table(factory, 1, "products", fmt, batch_size):  # type: ignore[arg-type]
+        sent += len(chunk)
+        lines += chunk.count(b"\n")
+    await engine.dispose()
+    return lines - (fmt == "csv"), sent
+
+
+async def _in_memory(path: Path, fmt: str, batch_size: int) -> tuple[int, int]:
+    export = EXPORTS["products"]
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with async_sessionmaker(engine)() as db:
+        rows = (await db.execute(export.query, {"user_id": 1})).all()
+    await engine.dispose()
+    items = [dict(zip(export.columns, export.convert(row), strict=True)) for row in rows]
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, export.columns)
+        writer.writeheader()
+        writer.writerows(items)
+        body = buffer.getvalue().encode()
+    else:
+        body = json.dumps(items, ensure_ascii=False).encode()
+    return len(items), len(body)
+
+
+def measure(path: Path, variant: str, fmt: str, batch_size: int) -> tuple[float, float, int, int]:
+    """Run one export (in a child process); return (RSS growth MB, seconds, rows, bytes)."""
+    baseline = _rss_mb()
+    run = _streamed if variant == "streamed" else _in_memory
+    start = time.perf_counter()
+    rows, sent = asyncio.run(run(path, fmt, batch_size))
+    return _rss_mb() - baseline, time.perf_counter() - start, rows, sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        seed(path, args.rows)
+        print(f"\nsqlite: export of {args.rows:,} products, batches of {args.batch_size:,} rows")
+        print(f"\n{'':<20} {'peak RSS +MB':>13} {'rows/s':>11} {'seconds':>8} {'output MB':>10}")
+        context = multiprocessing.get_context("spawn")
+        for fmt in ("ndjson", "csv"):
+            for variant in ("streamed", "in memory"):
+                with context.Pool(1) as pool:
+                    rss, seconds, rows, sent = pool.apply(
+                        measure, (path, variant, fmt, args.batch_size)
+                    )
+                assert rows == args.rows
+                print(
+                    f"{fmt + ' ' + variant:<20} {rss:>13.1f} {rows / seconds:>11,.0f} "
+                    f"{seconds:>8.2f} {sent / 1e6:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Page latency of the product table: keyset pagination vs OFFSET, by depth.
+
+For pages at increasing depth of one account's products (sorted by valor,
+with and without a status filter), compares:
+- keyset: the query of ``app.products`` (``(valor_cents, id) > (:key, :id)``)
+- OFFSET: the same ORDER BY with ``OFFSET depth * page_size``
+
+Both use the composite indexes of ``Product``. Keyset latency should stay
+flat with depth; OFFSET grows with the number of rows skipped.
+
+Runs on a temporary SQLite file; other accounts' products are mixed in so
+the per-user indexes matter.
+
+Usage (from backend/):
+    python -m benchmarks.table_pagination
+    python -m benchmarks.table_pagination --products 200000 --page-size 50
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Product, User
+from app.products import _page_query
+
+STATUSES = ("Ativo", "Pendente", "Inativo")
+
+
+def measure(db: Session, query: Any, params: dict[str, Any], repeat: int) -> float:
+    """Return the median latency (µs) of ``repeat`` runs of a page query."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(query, params).all()
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(latencies)
+
+
+def run(path: Path, products: int, page_size: int, repeat: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    with Session(engine) as db:
+        db.execute(
+            insert(User),
+            [{"email": f"user{i}@example.com", "auth_provider": "email"} for i in range(4)],
+        )
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "user_id": 1 + i % 4,
+                    "nome": f"Produto {i}",
+                    "status": rng.choice(STATUSES),
+                    "valor_cents": rng.randrange(1_000_000),
+                }
+                for i in range(products * 4)
+            ],
+        )
+        db.commit()
+
+    print(f"\nsqlite: {products:,} products per account (4 accounts), {page_size} rows/page")
+    with Session(engine) as db:
+        for status in (None, "Ativo"):
+            filtered = status is not None
+            base = {"user_id": 1, "status": status}
+            # Every row of the account in page order: (valor_cents, id)
+            keys = [
+                (row.sort_key, row.id)
+                for row in db.execute(
+                    _page_query("valor", "asc", filtered, False), {**base, "limit": -1}
+                )
+            ]
+            offset_query = _page_query("valor", "asc", filtered, False)
+            keyset_query = _page_query("valor", "asc", filtered, True)
+
+            print(f"\nstatus={status or 'all'} ({len(keys):,} rows)")
+            print(f"{'page':>8} {'keyset µs':>11} {'OFFSET µs':>11}")
+            page = 1
+            while (page - 1) * page_size < len(keys):
+                skipped = (page - 1) * page_size
+                params = {**base, "limit": page_size}
+                keyset_us = offset_us = measure(db, offset_query, params, repeat)
+                if skipped:
+                    key, after_id = keys[skipped - 1]
+                    keyset_params = {**params, "key": key, "after_id": after_id}
+                    keyset_us = measure(db, keyset_query, keyset_params, repeat)
+                    offset_us = measure(db, offset_query.offset(skipped), params, repeat)
+                print(f"{page:>8,} {keyset_us:>11.0f} {offset_us:>11.0f}")
+                page *= 10
+
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        run(Path(directory) / "bench.db", args.products, args.page_size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
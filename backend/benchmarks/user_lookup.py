@@ -0,0 +1,128 @@
+"""
+Per-lookup Python overhead of the hot user queries.
+
+Compares, for lookups by id and by email:
+- ORM query: ``db.query(User).filter(...).first()`` (the previous code path)
+- select per call: ``db.scalar(select(User).where(...))``, built on each call
+- pre-built: the statements of ``app.user_repository`` (by id: the
+  ``UserResponse`` columns only, as a row)
+- raw DBAPI: the same SQL on a bare ``sqlite3`` cursor, the floor every
+  SQLAlchemy path pays on top of
+
+Each lookup uses a fresh DB session from the pool, like the API does.
+Runs on a temporary SQLite file: queries are fast, so the differences are
+mostly Python time spent building, compiling and loading.
+
+Usage (from backend/):
+    python -m benchmarks.user_lookup
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base
+from app.models import User
+from app.user_repository import USER_BY_EMAIL, USER_BY_ID
+
+
+def measure(lookups: list[Any], lookup: Callable[[Any], Any]) -> list[float]:
+    """Return the latency (µs) of each lookup."""
+    latencies = []
+    for key in lookups:
+        start = time.perf_counter()
+        assert lookup(key) is not None
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def run(path: Path, users: int, requests: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.execute(
+            insert(User),
+            [{"email": f"user{i}@example.com", "auth_provider": "email"} for i in range(users)],
+        )
+        db.commit()
+    rng = random.Random(42)
+    ids = rng.choices(range(1, users + 1), k=requests)
+    emails = [f"user{i - 1}@example.com" for i in ids]
+    raw = sqlite3.connect(path)
+
+    def in_session(run_query: Callable[[Session], Any]) -> Any:
+        with factory() as db:
+            return run_query(db)
+
+    def raw_query(sql: str) -> Callable[[Any], Any]:
+        return lambda key: raw.execute(sql, (key,)).fetchone()
+
+    by_id: dict[str, Callable[[Any], Any]] = {
+        "ORM query": lambda key: in_session(
+            lambda db: db.query(User).filter(User.id == key).first()
+        ),
+        "select per call": lambda key: in_session(
+            lambda db: db.scalar(select(User).where(User.id == key))
+        ),
+        "pre-built (row)": lambda key: in_session(
+            lambda db: db.execute(USER_BY_ID, {"user_id": key}).first()
+        ),
+        "raw DBAPI": raw_query(
+            "SELECT id, email, auth_provider, created_at FROM users WHERE id = ?"
+        ),
+    }
+    by_email: dict[str, Callable[[Any], Any]] = {
+        "ORM query": lambda key: in_session(
+            lambda db: db.query(User).filter(User.email == key).first()
+        ),
+        "select per call": lambda key: in_session(
+            lambda db: db.scalar(select(User).where(User.email == key))
+        ),
+        "pre-built": lambda key: in_session(
+            lambda db: db.scalar(USER_BY_EMAIL, {"email": key})
+        ),
+        "raw DBAPI": raw_query("SELECT * FROM users WHERE email = ?"),
+    }
+
+    print(f"\nsqlite: {users:,} users, {requests:,} lookups")
+    for title, cases, keys in (("by id", by_id, ids), ("by email", by_email, emails)):
+        print(f"\n{title:<20} {'mean µs':>9} {'p50 µs':>9} {'p99 µs':>9} {'overhead µs':>12}")
+        results = {}
+        for name, lookup in cases.items():
+            measure(keys[:200], lookup)  # Warm up pool and statement cache
+            results[name] = sorted(measure(keys, lookup))
+        floor = statistics.median(results["raw DBAPI"])
+        for name, latencies in results.items():
+            p50 = statistics.median(latencies)
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"{name:<20} {statistics.fmean(latencies):>9.1f} {p50:>9.1f} "
+                f"{p99:>9.1f} {p50 - floor:>12.1f}"
+            )
+
+    raw.close()
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        run(Path(directory) / "bench.db", args.users, args.requests)
+
+
+if __name__ == "__main__":
+    main()
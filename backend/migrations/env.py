@@ -0,0 +1,64 @@
+"""
+Alembic environment: runs migrations against DATABASE_URL.
+
+``app.models`` is imported so ``Base.metadata`` describes the current
+models (``alembic revision --autogenerate`` diffs the database against it).
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import Connection, create_engine, pool
+
+import app.models  # noqa: F401 (register the models on Base.metadata)
+from app.database import DATABASE_URL, Base
+
+config = context.config
+
+# Skipped when migrations run inside the app (DB_SCHEMA_MODE=migrate), whose
+# logging is already configured
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout (``alembic upgrade head --sql``)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection: Connection) -> None:
+    """Run the migrations on ``connection``."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can't ALTER most things: recreate tables instead
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations on the given connection, or a new one to DATABASE_URL."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    engine = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
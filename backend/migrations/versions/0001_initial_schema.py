@@ -0,0 +1,48 @@
+"""
+Initial schema: users.
+
+Databases created by the former ``Base.metadata.create_all`` at startup
+already have this table: mark them as migrated with ``alembic stamp 0001``
+(``0002`` if they also have ``sessions``), then upgrade.
+``DB_SCHEMA_MODE=migrate`` does this by itself (see ``app.schema_version``).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: str | Sequence[str] | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("auth_provider", sa.String(), nullable=False),
+        sa.Column("google_id", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_google_id", "users", ["google_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("users")
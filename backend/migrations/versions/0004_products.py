@@ -0,0 +1,43 @@
+"""
+Products listed in the dashboard table, with keyset pagination indexes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: str | Sequence[str] | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("valor_cents", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_products_user_valor", "products", ["user_id", "valor_cents", "id"])
+    op.create_index("ix_products_user_nome", "products", ["user_id", "nome", "id"])
+    op.create_index(
+        "ix_products_user_status_valor", "products", ["user_id", "status", "valor_cents", "id"]
+    )
+    op.create_index(
+        "ix_products_user_status_nome", "products", ["user_id", "status", "nome", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("products")
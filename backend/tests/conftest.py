@@ -1,54 +1,85 @@
 """Pytest configuration and shared fixtures."""
 
 import os
-from typing import Generator
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.database import Base, get_db
-from app.main import app
+# Tests create their own tables: the app startup leaves the schema alone
+os.environ.setdefault("DB_SCHEMA_MODE", "off")
+
+from app.database import Base, get_async_db, get_db, get_read_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.rate_limit import login_rate_limiter  # noqa: E402
+from app.response_cache import response_cache  # noqa: E402
+from app.user_cache import user_cache  # noqa: E402
+
+
+@pytest.fixture(scope="function")
+def test_db_path(tmp_path: Path) -> Path:
+    """
+    Path of the SQLite test database file.
+
+    A file (not :memory:) so the sync test session and the app's async
+    sessions see the same data.
+    """
+    return tmp_path / "test.db"
 
 
 @pytest.fixture(scope="function")
-def test_db() -> Generator[Session, None, None]:
+def test_db(test_db_path: Path) -> Generator[Session, None, None]:
     """
-    Create a test database with in-memory SQLite for each test.
+    Create a test database with a temporary SQLite file for each test.
 
     Yields:
         Session: SQLAlchemy session connected to test database
     """
-    # Create in-memory SQLite database
+    # Create SQLite database
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
 
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
     # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = TestingSessionLocal()
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = testing_session_local()
 
     try:
         yield db
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def async_session_factory(test_db: Session, test_db_path: Path) -> async_sessionmaker:
+    """
+    Async session factory on the test database (aiosqlite).
+
+    Uses NullPool so no connection outlives the event loop that opened it.
+    """
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{test_db_path}", poolclass=NullPool)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
 
 
 @pytest.fixture(scope="function")
-def client(test_db: Session) -> TestClient:
+def client(test_db: Session, async_session_factory: async_sessionmaker) -> TestClient:
     """
     Create FastAPI test client with test database.
 
     Args:
         test_db: Test database session
+        async_session_factory: Async sessions on the same database
 
     Returns:
         TestClient: FastAPI test client
@@ -59,7 +90,15 @@ def client(test_db: Session) -> TestClient:
         finally:
             pass
 
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with async_session_factory() as db:
+            yield db
+        # Rows changed by the request must be reloaded by the test's session
+        test_db.expire_all()
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -97,3 +136,27 @@ def clear_oauth_client_cache() -> Generator[None, None, None]:
     # Clear after test
     if "app.oauth" in sys.modules:
         del sys.modules["app.oauth"]
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_login_rate_limiter() -> Generator[None, None, None]:
+    """Start every test with empty login rate limit buckets."""
+    login_rate_limiter.store.clear()
+    yield
+    login_rate_limiter.store.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_user_cache() -> Generator[None, None, None]:
+    """Start every test with an empty user cache (user ids repeat across test DBs)."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_response_cache() -> Generator[None, None, None]:
+    """Start every test with an empty response cache (user ids repeat across test DBs)."""
+    response_cache.clear()
+    yield
+    response_cache.clear()
@@ -0,0 +1,90 @@
+"""Tests for the database session dependencies."""
+
+import asyncio
+import inspect
+from unittest.mock import patch
+
+import pytest
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import database
+from app.database import get_async_db, get_db, to_async_url
+from app.main import app
+
+
+def _dependency_calls(dependant: Dependant):
+    """Yield every dependency callable of a route, recursively."""
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+class TestAsyncRoutes:
+    """Async routes run on the event loop: they must not block it on the sync session."""
+
+    def test_async_routes_do_not_use_sync_session(self):
+        offenders = [
+            route.path
+            for route in app.routes
+            if isinstance(route, APIRoute)
+            and inspect.iscoroutinefunction(route.endpoint)
+            and get_db in _dependency_calls(route.dependant)
+        ]
+
+        assert offenders == []
+
+
+class TestToAsyncUrl:
+    """Tests for the sync to async database URL conversion."""
+
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            ("postgresql://u:secret@db:5432/app", "postgresql+asyncpg://u:secret@db:5432/app"),
+            ("postgresql+psycopg2://u:secret@db/app", "postgresql+asyncpg://u:secret@db/app"),
+            ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ],
+    )
+    def test_sync_drivers_mapped(self, url, expected):
+        assert to_async_url(url) == expected
+
+    @pytest.mark.parametrize(
+        "url", ["postgresql+asyncpg://u:secret@db/app", "sqlite+aiosqlite:///./app.db"]
+    )
+    def test_async_driver_kept(self, url):
+        assert to_async_url(url) == url
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="mysql"):
+            to_async_url("mysql://u@db/app")
+
+
+def test_get_async_db_yields_and_closes_a_session(tmp_path):
+    """The dependency yields a working AsyncSession and returns its connection after use."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'app.db'}", poolclass=AsyncAdaptedQueuePool
+    )
+
+    async def scenario():
+        dependency = get_async_db()
+        db = await anext(dependency)
+        value = (await db.execute(text("SELECT 1"))).scalar_one()
+        checked_out = engine.pool.checkedout()
+        await dependency.aclose()
+        result = db, value, checked_out, engine.pool.checkedout()
+        await engine.dispose()
+        return result
+
+    with patch.object(
+        database, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False)
+    ):
+        db, value, checked_out, checked_out_after = asyncio.run(scenario())
+
+    assert isinstance(db, AsyncSession)
+    assert value == 1
+    assert (checked_out, checked_out_after) == (1, 0)
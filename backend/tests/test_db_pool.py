@@ -0,0 +1,72 @@
+"""Tests for database connection pool configuration and metrics."""
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import StaticPool
+
+from app import metrics
+from app.db_pool import (
+    DB_POOL_RECYCLE,
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    engine_options,
+)
+
+
+class TestEngineOptions:
+    """Pool selection per database."""
+
+    def test_postgres_pool_is_sized_and_checked(self):
+        options = engine_options("postgresql://u:p@db:5432/app")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_pre_ping"] is True
+        assert options["pool_recycle"] == DB_POOL_RECYCLE
+        assert {"pool_size", "max_overflow", "pool_timeout"} <= options.keys()
+
+    def test_async_engine_uses_async_pool(self):
+        options = engine_options("postgresql+asyncpg://u:p@db/app", is_async=True)
+
+        assert options["poolclass"] is InstrumentedAsyncQueuePool
+
+    def test_sqlite_memory_shares_one_connection(self):
+        assert engine_options("sqlite://")["poolclass"] is StaticPool
+        assert engine_options("sqlite:///:memory:")["poolclass"] is StaticPool
+
+    def test_sqlite_file_reuses_connections(self):
+        options = engine_options("sqlite:////tmp/app.db")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["connect_args"] == {"check_same_thread": False}
+        assert "pool_pre_ping" not in options
+        assert "connect_args" not in engine_options("sqlite+aiosqlite:////tmp/app.db", True)
+
+
+def test_pool_metrics(tmp_path):
+    """Checkout wait, in-use, overflow and timeouts are reported."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    waits_before = metrics.histogram("db_pool_checkout_wait_ms").count
+    overflow_before = metrics.counter("db_pool_overflow_total").value
+    timeouts_before = metrics.counter("db_pool_timeouts_total").value
+
+    first = engine.connect()
+    second = engine.connect()  # Overflow connection
+    first.execute(text("SELECT 1"))
+    assert metrics.gauge("db_pool_in_use").value == 2
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    second.close()
+    first.close()
+    engine.dispose()
+
+    assert metrics.gauge("db_pool_in_use").value == 0
+    assert metrics.histogram("db_pool_checkout_wait_ms").count == waits_before + 3
+    assert metrics.counter("db_pool_overflow_total").value == overflow_before + 1
+    assert metrics.counter("db_pool_timeouts_total").value == timeouts_before + 1
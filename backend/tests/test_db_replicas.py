@@ -0,0 +1,142 @@
+"""Tests for read-replica routing (two SQLite files standing in for replicas)."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import database
+from app.auth import create_session
+from app.database import Base, get_read_db
+from app.db_replicas import READ_PRIMARY_COOKIE, ReplicaRouter
+from app.main import app
+from app.models import User
+from app.routers import auth as auth_router
+from app.user_cache import user_cache
+
+
+def _replica(path, email: str):
+    """Create a 'replica' database whose user 1 has ``email``; return its async engine."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email=email, auth_provider="email"))
+        db.commit()
+    engine.dispose()
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    """Two replica engines, user 1 being "a@..." on one and "b@..." on the other."""
+    return [
+        _replica(tmp_path / "replica_a.db", "a@example.com"),
+        _replica(tmp_path / "replica_b.db", "b@example.com"),
+    ]
+
+
+class TestReplicaRouter:
+    """Tests for round-robin and health tracking."""
+
+    def test_round_robin(self, replicas):
+        router = ReplicaRouter(replicas)
+
+        firsts = [router.candidates()[0] for _ in range(4)]
+
+        assert firsts == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+    def test_failed_replica_skipped_until_retry(self, replicas):
+        router = ReplicaRouter(replicas, retry_interval=30)
+        router.mark_down(replicas[0])
+
+        assert router.candidates() == [replicas[1]]
+        assert router.candidates() == [replicas[1]]
+        with patch("app.db_replicas.time.monotonic", return_value=time.monotonic() + 31):
+            assert replicas[0] in router.candidates()
+
+    def test_connect_skips_unreachable_replica(self, replicas, tmp_path):
+        unreachable = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}", poolclass=NullPool
+        )
+        router = ReplicaRouter([unreachable, replicas[1]])
+
+        async def scenario():
+            conn = await router.connect()
+            await conn.close()
+            return conn
+
+        conn = asyncio.run(scenario())
+
+        assert conn.engine is replicas[1]
+        assert router.candidates() == [replicas[1]]
+
+    def test_no_replicas(self):
+        router = ReplicaRouter([])
+
+        assert not router
+        assert asyncio.run(router.connect()) is None
+
+
+class TestReadRouting:
+    """Tests for get_read_db on the read-only endpoints."""
+
+    @pytest.fixture
+    def read_client(self, client, test_db, async_session_factory, replicas, monkeypatch):
+        """Client whose reads go through get_read_db with the two replicas."""
+        test_db.add(User(id=1, email="primary@example.com", auth_provider="email"))
+        test_db.commit()
+        router = ReplicaRouter(replicas)
+        monkeypatch.setattr(database, "replica_router", router)
+        monkeypatch.setattr(auth_router, "replica_router", router)
+        monkeypatch.setattr(database, "AsyncSessionLocal", async_session_factory)
+        monkeypatch.setattr(user_cache, "enabled", False)
+        del app.dependency_overrides[get_read_db]
+        client.cookies.set("session_id", create_session(1))
+        return client
+
+    def _email(self, client) -> str:
+        response = client.get("/api/auth/me")
+        assert response.status_code == 200
+        return response.json()["email"]
+
+    def test_reads_round_robin_over_replicas(self, read_client):
+        emails = [self._email(read_client) for _ in range(3)]
+
+        assert emails == ["a@example.com", "b@example.com", "a@example.com"]
+        assert read_client.get("/api/dashboard/data").status_code == 200
+
+    def test_read_your_writes_cookie_reads_primary(self, read_client):
+        read_client.cookies.set(READ_PRIMARY_COOKIE, "1")
+
+        assert self._email(read_client) == "primary@example.com"
+
+    def test_no_healthy_replica_reads_primary(self, read_client):
+        for engine in database.replica_router.engines:
+            database.replica_router.mark_down(engine)
+
+        assert self._email(read_client) == "primary@example.com"
+
+    def test_signup_reads_its_writes_from_primary(self, read_client):
+        response = read_client.post(
+            "/api/auth/signup", json={"email": "new@example.com", "password": "SecurePass123"}
+        )
+
+        assert response.status_code == 201
+        assert "Max-Age=10" in response.headers["set-cookie"]
+        assert READ_PRIMARY_COOKIE in response.cookies
+        # The new user exists only on the primary
+        assert self._email(read_client) == "new@example.com"
+
+
+def test_no_cookie_without_replicas(client):
+    response = client.post(
+        "/api/auth/signup", json={"email": "solo@example.com", "password": "SecurePass123"}
+    )
+
+    assert response.status_code == 201
+    assert READ_PRIMARY_COOKIE not in response.cookies
@@ -0,0 +1,157 @@
+"""Tests for the password hashing process pool."""
+
+import asyncio
+
+import pytest
+
+from app import auth, main, metrics
+from app.auth import (
+    calibrate_bcrypt_rounds,
+    hash_password,
+    hash_password_async,
+    set_bcrypt_rounds,
+    verify_password_async,
+)
+from app.models import User
+from app.password_hashing import (
+    PasswordHashPool,
+    PasswordHashQueueFullError,
+    available_cpus,
+    hash_in_worker,
+    verify_and_update_in_worker,
+    verify_in_worker,
+)
+
+
+class TestPasswordHashPool:
+    """Tests for PasswordHashPool and the async auth helpers."""
+
+    def test_hash_and_verify_async(self):
+        """Hashes produced in the pool verify both sync and async."""
+
+        async def scenario():
+            hashed = await hash_password_async("SecurePass123")
+            assert hashed != "SecurePass123"
+            assert await verify_password_async("SecurePass123", hashed)
+            assert not await verify_password_async("WrongPassword", hashed)
+
+        asyncio.run(scenario())
+
+    def test_verify_async_accepts_sync_hash(self):
+        """Hashes produced by the sync helper verify in the pool."""
+        hashed = hash_password("password123")
+        assert asyncio.run(verify_password_async("password123", hashed))
+
+    def test_threadpool_mode(self):
+        """workers=0 runs jobs in the default threadpool."""
+        pool = PasswordHashPool(workers=0, max_pending=4)
+        hashed = hash_password("password123")
+
+        result = asyncio.run(pool.run(verify_in_worker, "password123", hashed))
+
+        assert result is True
+        assert pool.pending == 0
+
+    def test_rejects_when_queue_full(self):
+        """Jobs beyond max_pending are rejected and counted."""
+        pool = PasswordHashPool(workers=0, max_pending=1)
+        hashed = hash_password("password123")
+        rejected_before = metrics.counter("password_hash_rejected_total").value
+
+        async def scenario():
+            first = asyncio.create_task(pool.run(verify_in_worker, "password123", hashed))
+            await asyncio.sleep(0)  # Let the first job take the only slot
+            with pytest.raises(PasswordHashQueueFullError):
+                await pool.run(verify_in_worker, "password123", hashed)
+            assert await first
+
+        asyncio.run(scenario())
+
+        assert metrics.counter("password_hash_rejected_total").value == rejected_before + 1
+        assert pool.pending == 0
+
+
+def test_metrics_endpoint_reports_hash_latency(client, monkeypatch):
+    """Signup goes through the pool and shows up in /metrics."""
+    monkeypatch.setattr(main, "METRICS_TOKEN", "secret")
+    response = client.post(
+        "/api/auth/signup", json={"email": "metrics@example.com", "password": "SecurePass123"}
+    )
+    assert response.status_code == 201
+
+    snapshot = client.get("/metrics", headers={"Authorization": "Bearer secret"}).json()
+
+    assert snapshot["password_hash_latency_ms"]["count"] >= 1
+    assert snapshot["password_hash_queue_depth"]["value"] == 0
+
+
+def test_metrics_endpoint_requires_token(client, monkeypatch):
+    """/metrics is off without METRICS_TOKEN and needs the token when on."""
+    monkeypatch.setattr(main, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(main, "METRICS_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+@pytest.mark.parametrize(
+    ("cpu_max", "expected"), [("max 100000", 8), ("100000 100000", 1), ("150000 100000", 2)]
+)
+def test_available_cpus_follows_cgroup_quota(tmp_path, monkeypatch, cpu_max, expected):
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)))
+    (tmp_path / "cpu.max").write_text(cpu_max + "\n")
+
+    assert available_cpus(tmp_path) == expected
+
+
+@pytest.fixture
+def restore_bcrypt_rounds():
+    """Restore the default bcrypt cost after the test."""
+    yield
+    set_bcrypt_rounds(None)
+
+
+class TestBcryptCost:
+    """Tests for bcrypt cost calibration and rehash on login."""
+
+    def test_calibration_respects_bounds(self):
+        """A tiny budget keeps the minimum cost, a huge one stops at the maximum."""
+        assert calibrate_bcrypt_rounds(0.001, min_rounds=4, max_rounds=6) == 4
+        assert calibrate_bcrypt_rounds(60_000, min_rounds=4, max_rounds=6) == 6
+
+    def test_set_rounds_marks_weaker_costs_outdated(self, restore_bcrypt_rounds):
+        """Hashes below the pinned cost need update, stronger ones are kept."""
+        weaker, stronger = hash_in_worker("password123", 4), hash_in_worker("password123", 6)
+
+        set_bcrypt_rounds(5)
+
+        assert auth.pwd_context.needs_update(weaker)
+        assert not auth.pwd_context.needs_update(stronger)
+        assert hash_password("password123").startswith("$2b$05$")
+
+    def test_stronger_hash_not_downgraded(self):
+        """A hash from an instance with a higher calibrated cost is left as is."""
+        stronger = hash_in_worker("password123", 6)
+
+        assert verify_and_update_in_worker("password123", stronger, 5) == (True, None)
+        weaker = hash_in_worker("password123", 4)
+        valid, new_hash = verify_and_update_in_worker("password123", weaker, 5)
+        assert valid
+        assert new_hash.startswith("$2b$05$")
+
+    def test_login_rehashes_outdated_hash(self, client, test_db, restore_bcrypt_rounds):
+        """Login with an outdated hash stores a new hash with the current cost."""
+        user = User(email="rehash@example.com", password_hash=hash_in_worker("password123", 4))
+        test_db.add(user)
+        test_db.commit()
+
+        set_bcrypt_rounds(5)
+        response = client.post(
+            "/api/auth/login", json={"email": "rehash@example.com", "password": "password123"}
+        )
+
+        assert response.status_code == 200
+        test_db.refresh(user)
+        assert user.password_hash.startswith("$2b$05$")
+        assert auth.verify_password("password123", user.password_hash)
@@ -0,0 +1,175 @@
+"""Tests for the keyset-paginated product table."""
+
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.auth import create_session
+from app.models import Product, User
+from app.products import InvalidCursorError, _page_query, decode_cursor, encode_cursor
+from app.routers.dashboard import SAMPLE_TABLE_ROWS
+
+STATUSES = ("Ativo", "Pendente", "Inativo")
+
+
+@pytest.fixture
+def user(test_db) -> User:
+    user = User(email="seller@example.com", password_hash="x", auth_provider="email")
+    other = User(email="other@example.com", password_hash="x", auth_provider="email")
+    test_db.add_all([user, other])
+    test_db.commit()
+    rng = random.Random(7)
+    test_db.execute(
+        insert(Product),
+        [
+            {
+                "user_id": owner.id,
+                "nome": f"Produto {rng.randrange(40):02d}",  # Repeated names and prices
+                "status": rng.choice(STATUSES),
+                "valor_cents": rng.randrange(20) * 500,
+            }
+            for owner in (user, other)
+            for _ in range(120)
+        ],
+    )
+    test_db.commit()
+    return user
+
+
+@pytest.fixture
+def user_client(client, user):
+    client.cookies.set("session_id", create_session(user.id))
+    return client
+
+
+def _all_pages(client, **params) -> tuple[list[dict], int]:
+    """Follow next_cursor to the end; return the rows and the number of pages."""
+    rows, pages, cursor = [], 0, None
+    while True:
+        response = client.get(
+            "/api/dashboard/table", params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == 200
+        page = response.json()
+        rows += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+def _expected(test_db, user_id, sort, order, status=None) -> list[int]:
+    column = "valor_cents" if sort == "valor" else "nome"
+    direction = "ASC" if order == "asc" else "DESC"
+    where = "user_id = :user_id" + (" AND status = :status" if status else "")
+    return list(
+        test_db.scalars(
+            text(f"SELECT id FROM products WHERE {where} ORDER BY {column} {direction}, id {direction}"),
+            {"user_id": user_id, "status": status},
+        )
+    )
+
+
+class TestPagination:
+    """Tests for GET /api/dashboard/table."""
+
+    @pytest.mark.parametrize("sort", ["valor", "nome"])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_pages_cover_every_row_once(self, user_client, test_db, user, sort, order):
+        rows, pages = _all_pages(user_client, sort=sort, order=order, limit=25)
+
+        assert [row["id"] for row in rows] == _expected(test_db, user.id, sort, order)
+        assert pages == 5
+
+    def test_status_filter(self, user_client, test_db, user):
+        rows, _ = _all_pages(user_client, sort="nome", status="Pendente", limit=10)
+
+        assert {row["status"] for row in rows} == {"Pendente"}
+        assert [row["id"] for row in rows] == _expected(test_db, user.id, "nome", "asc", "Pendente")
+
+    def test_row_shape(self, user_client):
+        row = user_client.get("/api/dashboard/table", params={"limit": 1}).json()["items"][0]
+
+        assert set(row) == {"id", "nome", "status", "valor"}
+        assert isinstance(row["valor"], float)
+
+    def test_cursor_of_another_query_rejected(self, user_client):
+        cursor = user_client.get("/api/dashboard/table", params={"limit": 5}).json()["next_cursor"]
+
+        response = user_client.get(
+            "/api/dashboard/table", params={"sort": "nome", "cursor": cursor}
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize(
+        "params", [{"cursor": "garbage!"}, {"limit": 0}, {"limit": 1000}, {"sort": "id"}]
+    )
+    def test_invalid_params(self, user_client, params):
+        assert user_client.get("/api/dashboard/table", params=params).status_code in (400, 422)
+
+    def test_dashboard_previews_first_products(self, user_client, test_db, user):
+        table_data = user_client.get("/api/dashboard/data").json()["table_data"]
+
+        assert [row["id"] for row in table_data] == _expected(test_db, user.id, "nome", "asc")[:5]
+
+    def test_dashboard_previews_sample_rows_without_products(self, client, test_db):
+        user = User(email="new@example.com", password_hash="x", auth_provider="email")
+        test_db.add(user)
+        test_db.commit()
+        client.cookies.set("session_id", create_session(user.id))
+
+        table_data = client.get("/api/dashboard/data").json()["table_data"]
+
+        assert table_data == SAMPLE_TABLE_ROWS
+        assert client.get("/api/dashboard/table").json() == {"items": [], "next_cursor": None}
+
+
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        cursor = encode_cursor("nome", "desc", "Ativo", "Produto é", 42)
+
+        assert decode_cursor(cursor, "nome", "desc", "Ativo") == ("Produto é", 42)
+
+    def test_wrong_key_type(self):
+        cursor = encode_cursor("valor", "asc", None, "not a number", 1)
+
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, "valor", "asc", None)
+
+
+@pytest.mark.parametrize(
+    ("sort", "filtered", "index"),
+    [
+        ("valor", False, "ix_products_user_valor"),
+        ("nome", False, "ix_products_user_nome"),
+        ("valor", True, "ix_products_user_status_valor"),
+        ("nome", True, "ix_products_user_status_nome"),
+    ],
+)
+def test_pages_use_composite_index(async_session_factory, user, sort, filtered, index):
+    """Each page is an index range scan: no sort of the user's rows."""
+    query = _page_query(sort, "desc", filtered, True)
+
+    async def plan():
+        async with async_session_factory() as db:
+            conn = await db.connection()
+            compiled = query.compile(conn.engine)
+            params = {
+                **compiled.params,
+                **{"user_id": 1, "status": "Ativo", "key": 0, "after_id": 0, "limit": 10},
+            }
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}",
+                tuple(params[name] for name in compiled.positiontup or ()),
+            )
+            return " ".join(row[-1] for row in result)
+
+    details = asyncio.run(plan())
+
+    assert index in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,128 @@
+"""Tests for login rate limiting."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app import metrics
+from app.rate_limit import (
+    LOGIN_EMAIL_BURST,
+    LOGIN_IP_BURST,
+    InMemoryTokenBucketStore,
+    LoginRateLimiter,
+    RedisTokenBucketStore,
+)
+
+
+class TestInMemoryTokenBucketStore:
+    """Tests for the in-memory token bucket store."""
+
+    def test_burst_then_reject(self):
+        """A bucket allows `capacity` takes, then reports the wait for the next token."""
+        store = InMemoryTokenBucketStore()
+
+        assert [store.take("k", 3, 1.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        wait = store.take("k", 3, 1.0)
+
+        assert 0 < wait <= 1.0
+
+    def test_refill_over_time(self):
+        """Tokens are refilled at `refill_per_second`."""
+        store = InMemoryTokenBucketStore()
+        with patch("app.rate_limit.time.monotonic", return_value=100.0):
+            store.take("k", 1, 0.5)
+            assert store.take("k", 1, 0.5) > 0
+        with patch("app.rate_limit.time.monotonic", return_value=102.0):
+            assert store.take("k", 1, 0.5) == 0.0
+
+    def test_lru_eviction_bounds_memory(self):
+        """Least recently used keys are evicted once max_keys is reached."""
+        store = InMemoryTokenBucketStore(max_keys=2)
+        store.take("a", 1, 0.01)
+        store.take("b", 1, 0.01)
+        store.take("a", 1, 0.01)  # "a" is now the most recently used
+        store.take("c", 1, 0.01)  # evicts "b"
+
+        assert len(store) == 2
+        assert store.take("a", 1, 0.01) > 0  # "a" kept its (empty) bucket
+        assert store.take("b", 1, 0.01) == 0.0  # "b" starts with a fresh bucket
+
+
+def test_redis_store_shares_buckets():
+    """Two stores on the same Redis share bucket state."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    store_a = RedisTokenBucketStore(fakeredis.FakeRedis(server=server))
+    store_b = RedisTokenBucketStore(fakeredis.FakeRedis(server=server))
+
+    assert store_a.take("k", 2, 0.01) == 0.0
+    assert store_b.take("k", 2, 0.01) == 0.0
+    assert store_a.take("k", 2, 0.01) > 0
+
+    store_b.clear()
+    assert store_a.take("k", 2, 0.01) == 0.0
+
+
+def test_limiter_disabled_allows_everything():
+    """A disabled limiter never rejects."""
+    limiter = LoginRateLimiter(InMemoryTokenBucketStore(), enabled=False)
+    assert all(limiter.check("a@example.com", "1.2.3.4") == 0.0 for _ in range(100))
+
+
+def test_login_rejected_with_429_before_db_and_hash(client):
+    """Over-limit attempts get 429 + Retry-After without touching the DB or bcrypt."""
+    rejected_before = metrics.counter("login_rate_limited_email_total").value
+    credentials = {"email": "victim@example.com", "password": "WrongPassword"}
+
+    for _ in range(LOGIN_EMAIL_BURST):
+        assert client.post("/api/auth/login", json=credentials).status_code == 401
+
+    with patch("app.routers.auth.verify_and_update_password_async") as mock_verify:
+        response = client.post("/api/auth/login", json=credentials)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    mock_verify.assert_not_called()
+    assert metrics.counter("login_rate_limited_email_total").value == rejected_before + 1
+
+
+def test_check_async_offloads_blocking_store():
+    """Blocking stores (Redis) are called from a worker thread, others inline."""
+
+    class ThreadRecordingStore(InMemoryTokenBucketStore):
+        def take(self, key, capacity, refill_per_second):
+            threads.append(threading.get_ident())
+            return super().take(key, capacity, refill_per_second)
+
+    threads: list[int] = []
+    store = ThreadRecordingStore()
+    limiter = LoginRateLimiter(store, enabled=True)
+
+    assert asyncio.run(limiter.check_async("a@example.com", "1.2.3.4")) == 0.0
+    store.blocking_io = True
+    assert asyncio.run(limiter.check_async("a@example.com", "1.2.3.4")) == 0.0
+
+    # ip + email buckets: two takes inline, then two in a worker thread
+    assert threads[:2] == [threading.get_ident()] * 2
+    assert threading.get_ident() not in threads[2:]
+
+
+def test_forwarded_clients_get_separate_ip_buckets(client, monkeypatch):
+    """Behind a trusted proxy each forwarded client has its own per-IP bucket."""
+    monkeypatch.setattr("app.rate_limit.TRUSTED_PROXY_HOPS", 1)
+
+    def attempt(i: int, forwarded_for: str) -> int:
+        # A new email each time: only the per-IP bucket fills up
+        credentials = {"email": f"user{i}@example.com", "password": "WrongPassword"}
+        headers = {"X-Forwarded-For": forwarded_for}
+        return client.post("/api/auth/login", json=credentials, headers=headers).status_code
+
+    assert {attempt(i, "203.0.113.1") for i in range(LOGIN_IP_BURST)} == {401}
+
+    assert attempt(100, "203.0.113.1") == 429
+    # Entries left of the trusted hop are client-supplied: forging one changes nothing
+    assert attempt(101, "198.51.100.7, 203.0.113.1") == 429
+    assert attempt(102, "203.0.113.2") == 401
@@ -0,0 +1,137 @@
+"""Tests for the per-user response cache and conditional GETs."""
+
+import time
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app import metrics
+from app.auth import create_session
+from app.models import User
+from app.response_cache import ResponseCache, make_entry, response_cache
+from app.routers import dashboard
+
+
+class TestResponseCache:
+    """Tests for versions, TTL and LRU behavior."""
+
+    def test_hit_for_same_version(self):
+        cache = ResponseCache(max_size=10, ttl=60)
+        entry = cache.put(1, "data", 0, make_entry({"a": 1}))
+
+        assert cache.get(1, "data", 0) == entry
+        assert cache.get(2, "data", 0) is None
+        assert cache.get(1, "other", 0) is None
+
+    def test_new_version_is_a_miss(self):
+        cache = ResponseCache(max_size=10, ttl=60)
+        cache.put(1, "data", cache.data_version(1), make_entry({"a": 1}))
+
+        cache.invalidate(1)
+
+        assert cache.data_version(1) == 1
+        assert cache.get(1, "data", cache.data_version(1)) is None
+        assert len(cache) == 0
+
+    def test_entries_expire(self):
+        cache = ResponseCache(max_size=10, ttl=60)
+        cache.put(1, "data", 0, make_entry({"a": 1}))
+
+        with patch("app.response_cache.time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get(1, "data", 0) is None
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_size=2, ttl=60)
+        for user_id in (1, 2):
+            cache.put(user_id, "data", 0, make_entry({"user": user_id}))
+        cache.get(1, "data", 0)  # user 1 is now the most recently used
+        cache.put(3, "data", 0, make_entry({"user": 3}))  # evicts user 2
+
+        assert cache.get(2, "data", 0) is None
+        assert cache.get(1, "data", 0) is not None
+
+    def test_disabled(self):
+        cache = ResponseCache(enabled=False)
+        cache.put(1, "data", 0, make_entry({"a": 1}))
+
+        assert cache.get(1, "data", 0) is None
+
+    def test_strong_etag_follows_content(self):
+        first, same, other = make_entry({"a": 1}), make_entry({"a": 1}), make_entry({"a": 2})
+
+        assert first.etag == same.etag != other.etag
+        assert first.etag.startswith('"') and not first.etag.startswith("W/")
+
+
+class TestDashboardConditionalGet:
+    """Tests for ETags on /api/dashboard/data."""
+
+    @pytest.fixture
+    def user_client(self, client, test_db):
+        user = User(email="etag@example.com", password_hash="x", auth_provider="email")
+        test_db.add(user)
+        test_db.commit()
+        client.cookies.set("session_id", create_session(user.id))
+        client.user_id = user.id
+        return client
+
+    def test_etag_and_304(self, user_client):
+        saved_before = metrics.counter("response_cache_bytes_saved_total").value
+        first = user_client.get("/api/dashboard/data")
+        etag = first.headers["etag"]
+
+        with patch.object(
+            dashboard, "build_dashboard_data", side_effect=AssertionError("rebuilt")
+        ):
+            second = user_client.get("/api/dashboard/data", headers={"If-None-Match": etag})
+            third = user_client.get("/api/dashboard/data")
+
+        assert first.status_code == 200
+        assert first.json()["user_email"] == "etag@example.com"
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+        assert third.content == first.content
+        assert (
+            metrics.counter("response_cache_bytes_saved_total").value
+            == saved_before + len(first.content)
+        )
+
+    def test_stale_etag_gets_body(self, user_client):
+        response = user_client.get("/api/dashboard/data", headers={"If-None-Match": '"old"'})
+
+        assert response.status_code == 200
+        assert response.json()["user_email"] == "etag@example.com"
+
+    def test_invalidate_rebuilds(self, user_client):
+        user_client.get("/api/dashboard/data")
+        response_cache.invalidate(user_client.user_id)
+
+        with patch.object(
+            dashboard, "build_dashboard_data", wraps=dashboard.build_dashboard_data
+        ) as build:
+            assert user_client.get("/api/dashboard/data").status_code == 200
+        build.assert_called_once()
+
+    def test_new_day_rebuilds(self, user_client):
+        user_client.get("/api/dashboard/data")
+
+        with (
+            patch.object(dashboard, "utc_today", return_value=date(2099, 1, 1)),
+            patch.object(
+                dashboard, "build_dashboard_data", wraps=dashboard.build_dashboard_data
+            ) as build,
+        ):
+            user_client.get("/api/dashboard/data")
+        build.assert_called_once()
+
+    def test_session_cookie_refresh_kept(self, user_client):
+        with patch("app.routers.dashboard.refresh_session_cookie") as refresh:
+            refresh.side_effect = lambda response, session_id: response.set_cookie(
+                "session_id", session_id
+            )
+            response = user_client.get("/api/dashboard/data")
+
+        assert "session_id=" in response.headers["set-cookie"]
@@ -0,0 +1,210 @@
+"""Tests for sales ingest, the daily rollup and the chart endpoint."""
+
+import asyncio
+from datetime import UTC, date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.auth import create_session
+from app.models import DailySales, SalesEvent, User
+from app.response_cache import response_cache
+from app.sales import record_sales, sales_chart
+
+TODAY = date(2026, 10, 17)  # A Saturday
+
+
+def _at(day: date, hour: int = 12) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, tzinfo=UTC)
+
+
+@pytest.fixture
+def user(test_db) -> User:
+    user = User(email="seller@example.com", password_hash="x", auth_provider="email")
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+def _record(async_session_factory, user_id: int, sales) -> int:
+    async def scenario():
+        async with async_session_factory() as db:
+            recorded = await record_sales(db, user_id, sales)
+            await db.commit()
+            return recorded
+
+    return asyncio.run(scenario())
+
+
+def _chart(async_session_factory, user_id: int, days: int, bucket: str = "day", **options):
+    async def scenario():
+        async with async_session_factory() as db:
+            return await sales_chart(db, user_id, days, bucket, today=TODAY, **options)
+
+    return asyncio.run(scenario())
+
+
+class TestRollup:
+    """Tests for record_sales."""
+
+    def test_ingests_add_to_day_buckets(self, test_db, async_session_factory, user):
+        _record(async_session_factory, user.id, [(_at(TODAY, 9), 1000), (_at(TODAY, 18), 250)])
+        _record(
+            async_session_factory,
+            user.id,
+            [(_at(TODAY, 20), 50), (_at(TODAY - timedelta(days=1)), 700)],
+        )
+
+        rollups = test_db.execute(
+            select(DailySales.day, DailySales.event_count, DailySales.amount_cents)
+            .where(DailySales.user_id == user.id)
+            .order_by(DailySales.day)
+        ).all()
+        assert rollups == [(TODAY - timedelta(days=1), 1, 700), (TODAY, 3, 1300)]
+        assert len(test_db.scalars(select(SalesEvent)).all()) == 4
+
+    def test_days_are_utc(self, test_db, async_session_factory, user):
+        # 22:00 in São Paulo (UTC-3) is the next UTC day
+        sao_paulo = timezone(timedelta(hours=-3))
+        _record(
+            async_session_factory,
+            user.id,
+            [(datetime(2026, 10, 16, 22, tzinfo=sao_paulo), 100)],
+        )
+
+        assert test_db.scalar(select(DailySales.day)) == date(2026, 10, 17)
+
+    def test_nothing_to_record(self, async_session_factory, user):
+        assert _record(async_session_factory, user.id, []) == 0
+
+    def test_cache_invalidation_left_to_the_caller(self, async_session_factory, user):
+        """The caller invalidates after committing, not record_sales before it."""
+        version = response_cache.data_version(user.id)
+
+        _record(async_session_factory, user.id, [(_at(TODAY), 100)])
+
+        assert response_cache.data_version(user.id) == version
+
+
+class TestChart:
+    """Tests for sales_chart."""
+
+    def test_daily_points_with_gaps(self, async_session_factory, user):
+        _record(
+            async_session_factory,
+            user.id,
+            [(_at(TODAY), 1050), (_at(TODAY - timedelta(days=3)), 200)],
+        )
+
+        points = _chart(async_session_factory, user.id, 7)
+
+        assert [p["date"] for p in points] == [
+            (TODAY - timedelta(days=6 - i)).isoformat() for i in range(7)
+        ]
+        assert [p["value"] for p in points] == [0, 0, 0, 2.0, 0, 0, 10.5]
+        assert points[-1]["count"] == 1
+
+    def test_weekly_buckets(self, async_session_factory, user):
+        _record(
+            async_session_factory,
+            user.id,
+            [
+                (_at(date(2026, 10, 12)), 100),  # Monday
+                (_at(date(2026, 10, 17)), 100),  # Saturday, same week
+                (_at(date(2026, 9, 17)), 100),  # Before the 30-day range
+            ],
+        )
+
+        points = _chart(async_session_factory, user.id, 30, "week")
+
+        # 2026-09-18 .. 2026-10-17: the first week starts before the range
+        assert points[0]["date"] == "2026-09-18"
+        assert points[-1] == {"date": "2026-10-12", "value": 2.0, "count": 2}
+        assert sum(p["count"] for p in points) == 2
+
+    def test_monthly_buckets(self, async_session_factory, user):
+        _record(
+            async_session_factory,
+            user.id,
+            [(_at(date(2026, 1, 31)), 100), (_at(date(2026, 10, 1)), 300)],
+        )
+
+        points = _chart(async_session_factory, user.id, 365, "month")
+
+        assert [p["date"] for p in points][:2] == ["2025-10-18", "2025-11-01"]
+        assert points[-1] == {"date": "2026-10-01", "value": 3.0, "count": 1}
+        assert len(points) == 13
+
+    def test_moving_average_and_downsampling(self, async_session_factory, user):
+        _record(
+            async_session_factory,
+            user.id,
+            # A spike 40 days ago in an otherwise steady series
+            [(_at(TODAY - timedelta(days=i)), 50_000 if i == 40 else 100) for i in range(90)],
+        )
+
+        points = _chart(async_session_factory, user.id, 90, window=7, max_points=20)
+
+        assert len(points) == 20
+        assert points[0]["date"] == (TODAY - timedelta(days=89)).isoformat()
+        assert points[-1]["date"] == TODAY.isoformat()
+        assert max(p["value"] for p in points) == 500.0  # LTTB keeps the spike
+        assert all(p["average"] == 1.0 for p in points if p["date"] < "2026-09-07")
+
+
+class TestSalesEndpoints:
+    """Tests for POST /api/dashboard/sales and GET /api/dashboard/chart."""
+
+    @pytest.fixture
+    def user_client(self, client, user):
+        client.cookies.set("session_id", create_session(user.id))
+        return client
+
+    def test_sales_show_up_in_chart_and_dashboard(self, user_client):
+        before = user_client.get("/api/dashboard/data")
+        today = datetime.now(UTC).replace(microsecond=0)
+
+        response = user_client.post(
+            "/api/dashboard/sales",
+            json={"sales": [{"occurred_at": today.isoformat(), "amount": "19.90"}]},
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"recorded": 1}
+        # Recording invalidated the cached dashboard payload
+        after = user_client.get(
+            "/api/dashboard/data", headers={"If-None-Match": before.headers["etag"]}
+        )
+        assert after.status_code == 200
+        assert after.json()["chart_data"][-1]["value"] == 19.9
+        chart = user_client.get("/api/dashboard/chart", params={"days": 30, "bucket": "month"})
+        assert chart.status_code == 200
+        assert sum(p["value"] for p in chart.json()) == 19.9
+        assert "etag" in chart.headers
+
+    def test_chart_options(self, user_client):
+        response = user_client.get(
+            "/api/dashboard/chart", params={"days": 365, "window": 7, "max_points": 50}
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()) == 50
+        assert "average" in response.json()[0]
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"days": 10}, {"bucket": "year"}, {"max_points": 2}, {"window": 1}],
+    )
+    def test_invalid_chart_params(self, user_client, params):
+        assert user_client.get("/api/dashboard/chart", params=params).status_code == 422
+
+    def test_invalid_amount(self, user_client):
+        response = user_client.post(
+            "/api/dashboard/sales",
+            json={"sales": [{"occurred_at": "2026-10-17T12:00:00Z", "amount": "1.999"}]},
+        )
+
+        assert response.status_code == 422
+
+    def test_requires_authentication(self, client):
+        assert client.get("/api/dashboard/chart").status_code == 401
@@ -0,0 +1,128 @@
+"""Tests for migrations, the startup schema check and startup timing."""
+
+import asyncio
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import metrics, schema_version
+from app.database import Base
+from app.schema_version import (
+    ALEMBIC_INI,
+    SCHEMA_REVISION,
+    SchemaVersionError,
+    check_schema,
+    legacy_revision,
+    prepare_schema,
+    run_migrations,
+)
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    """Sync and async engines on an empty SQLite file; no cached check."""
+    monkeypatch.setattr(schema_version, "_verified_revision", None)
+    path = tmp_path / "schema.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    yield engine, async_engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Tests for the Alembic migrations."""
+
+    def test_head_is_schema_revision(self):
+        script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+
+        assert script.get_current_head() == SCHEMA_REVISION
+
+    def test_migrations_match_models(self, engines):
+        engine, _ = engines
+        run_migrations(engine)
+
+        with engine.connect() as conn:
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+        assert diff == []
+
+
+    @pytest.mark.parametrize(
+        ("tables", "revision"), [(["users"], "0001"), (["users", "sessions"], "0002")]
+    )
+    def test_create_all_database_is_stamped_then_upgraded(self, engines, tables, revision):
+        engine, _ = engines
+        Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in tables])
+        with engine.connect() as conn:
+            assert legacy_revision(conn) == revision
+
+        run_migrations(engine)
+
+        with engine.connect() as conn:
+            assert conn.scalar(text("SELECT version_num FROM alembic_version")) == SCHEMA_REVISION
+            assert legacy_revision(conn) is None
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+    def test_empty_database_is_not_stamped(self, engines):
+        engine, _ = engines
+
+        with engine.connect() as conn:
+            assert legacy_revision(conn) is None
+
+
+class TestSchemaCheck:
+    """Tests for DB_SCHEMA_MODE handling at startup."""
+
+    def test_migrate_then_check(self, engines):
+        engine, async_engine = engines
+
+        asyncio.run(prepare_schema(engine, async_engine, mode="migrate"))
+
+        with engine.connect() as conn:
+            assert conn.scalar(text("SELECT version_num FROM alembic_version")) == SCHEMA_REVISION
+
+    def test_unmigrated_database_fails(self, engines):
+        engine, async_engine = engines
+
+        with pytest.raises(SchemaVersionError, match="no migration version"):
+            asyncio.run(check_schema(async_engine))
+
+    def test_outdated_database_fails(self, engines):
+        engine, async_engine = engines
+        run_migrations(engine)
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE alembic_version SET version_num = '0000'"))
+
+        with pytest.raises(SchemaVersionError, match="revision 0000"):
+            asyncio.run(check_schema(async_engine))
+
+    def test_check_is_cached(self, engines):
+        engine, async_engine = engines
+        run_migrations(engine)
+        asyncio.run(check_schema(async_engine))
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+
+        asyncio.run(check_schema(async_engine))  # No query
+
+    def test_off_and_unknown_modes(self, engines):
+        engine, async_engine = engines
+
+        asyncio.run(prepare_schema(engine, async_engine, mode="off"))
+        with pytest.raises(ValueError, match="DB_SCHEMA_MODE"):
+            asyncio.run(prepare_schema(engine, async_engine, mode="create"))
+
+
+def test_startup_timings_recorded(client):
+    """Starting the app records the ready phase; the first response its own."""
+    assert metrics.gauge("startup_ready_ms").value > 0
+
+    client.get("/health")
+
+    assert metrics.gauge("startup_first_request_ms").value > 0
@@ -0,0 +1,127 @@
+"""Tests for session persistence (snapshot + append-only log)."""
+
+import asyncio
+from datetime import timedelta
+
+from app.session_persistence import (
+    LOG_RECORD,
+    SessionJournal,
+    attach_journal,
+    run_journal_flusher,
+)
+from app.session_store import InMemorySessionStore
+
+TTL = timedelta(hours=1)
+
+
+def _restart(directory) -> InMemorySessionStore:
+    """Simulate a new process: fresh store restored from ``directory``."""
+    store = InMemorySessionStore()
+    attach_journal(store, directory)
+    return store
+
+
+class TestSessionJournal:
+    """Tests for SessionJournal."""
+
+    def test_nothing_is_written_until_flush(self, tmp_path):
+        store = InMemorySessionStore()
+        journal = attach_journal(store, tmp_path)
+
+        store.create("a", 1, TTL)
+
+        assert not journal.log_path.exists()
+        assert journal.flush() == LOG_RECORD.size
+        assert _restart(tmp_path).get("a") == 1
+
+    def test_log_replay_applies_creates_touches_and_deletes(self, tmp_path):
+        store = InMemorySessionStore()
+        journal = attach_journal(store, tmp_path)
+        store.create("kept", 1, TTL)
+        store.create("deleted", 2, TTL)
+        store.touch("kept", timedelta(hours=2))
+        store.delete("deleted")
+        store.create("expired", 3, timedelta(seconds=-1))
+        journal.flush()
+
+        restored = _restart(tmp_path)
+
+        assert restored.get("kept") == 1
+        assert restored.get("deleted") is None
+        assert restored.get("expired") is None
+        assert len(restored) == 1
+
+    def test_snapshot_truncates_log_and_keeps_later_ops(self, tmp_path):
+        store = InMemorySessionStore()
+        journal = attach_journal(store, tmp_path)
+        for i in range(100):
+            store.create(f"s{i}", i, TTL)
+
+        assert journal.snapshot(store) == 100
+        assert journal.log_path.stat().st_size == 0
+
+        store.delete("s0")
+        store.create("after", 500, TTL)
+        journal.flush()
+        restored = _restart(tmp_path)
+
+        assert len(restored) == 100
+        assert restored.get("s0") is None
+        assert restored.get("s99") == 99
+        assert restored.get("after") == 500
+
+    def test_torn_log_tail_is_ignored(self, tmp_path):
+        store = InMemorySessionStore()
+        journal = attach_journal(store, tmp_path)
+        store.create("a", 1, TTL)
+        journal.flush()
+        with open(journal.log_path, "ab") as f:
+            f.write(b"\x01partial")
+
+        assert _restart(tmp_path).get("a") == 1
+
+    def test_restore_rebuilds_expiry_index(self, tmp_path):
+        journal = SessionJournal(tmp_path)
+        store = InMemorySessionStore()
+        store.create("short", 1, timedelta(seconds=-1))
+        store.create("long", 2, TTL)
+        journal.snapshot(store)
+
+        restored = _restart(tmp_path)
+
+        assert not restored.has_expired()  # Expired record skipped at load
+        assert restored.get("long") == 2
+
+    def test_restore_rebuilds_user_index_across_stripes(self, tmp_path):
+        journal = SessionJournal(tmp_path)
+        store = InMemorySessionStore(shards=4)
+        for i in range(20):
+            store.create(f"multi-{i}", 1, TTL + timedelta(seconds=i))
+            store.create(f"single-{i}", 100 + i, TTL)
+        journal.snapshot(store)
+        restored = InMemorySessionStore(shards=4)
+
+        journal.restore(restored)
+
+        assert restored.list_user_sessions(1) == store.list_user_sessions(1)  # Oldest first
+        assert restored.list_user_sessions(105) == store.list_user_sessions(105)
+        assert restored.delete_user_sessions(1) == 20
+        assert len(restored) == 20
+
+
+def test_flusher_writes_final_snapshot_on_shutdown(tmp_path):
+    store = InMemorySessionStore()
+    journal = attach_journal(store, tmp_path)
+
+    async def scenario():
+        task = asyncio.create_task(run_journal_flusher(journal, store, flush_interval=0.01))
+        store.create("a", 1, TTL)
+        await asyncio.sleep(0.05)
+        assert journal.log_path.stat().st_size == LOG_RECORD.size  # Flushed in background
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert journal.snapshot_path.exists()
+    assert _restart(tmp_path).get("a") == 1
@@ -0,0 +1,573 @@
+"""Tests for session storage backends."""
+
+import asyncio
+import math
+import threading
+import time
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import auth, metrics
+from app.database import Base
+from app.models import User
+from app.session_db import DatabaseSessionStore
+from app.session_persistence import SessionJournal
+from app.session_store import (
+    KEY_SIZE,
+    InMemorySessionStore,
+    RedisSessionStore,
+    RevocationList,
+    SessionRecord,
+    SessionStore,
+    StatelessSessionStore,
+    create_session_store,
+    run_session_sweeper,
+    session_handle,
+    session_key,
+)
+
+TTL = timedelta(hours=1)
+
+
+@pytest.fixture(params=["memory", "redis", "database"])
+def store(request: pytest.FixtureRequest) -> Generator[SessionStore, None, None]:
+    """Every stateful SessionStore implementation (Redis backed by fakeredis)."""
+    if request.param == "memory":
+        yield InMemorySessionStore(max_sessions_per_user=3)
+    elif request.param == "database":
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        yield DatabaseSessionStore(sessionmaker(bind=engine), max_sessions_per_user=3)
+        engine.dispose()
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis()
+        yield RedisSessionStore(client, max_sessions_per_user=3)
+        client.flushall()
+
+
+class TestSessionStoreContract:
+    """Behavior shared by every SessionStore implementation."""
+
+    def test_create_get_delete(self, store):
+        store.create("sid", 42, TTL)
+
+        assert store.get("sid") == 42
+        assert store.delete("sid") is True
+        assert store.get("sid") is None
+        assert store.delete("sid") is False
+
+    def test_get_unknown_session(self, store):
+        assert store.get("missing") is None
+
+    def test_touch(self, store):
+        store.create("sid", 1, TTL)
+
+        assert store.touch("sid", TTL) is True
+        assert store.touch("missing", TTL) is False
+        assert store.touch_many(["sid", "missing"], TTL) == 1
+
+    def test_list_user_sessions(self, store):
+        store.create("a", 1, TTL)
+        store.create("b", 1, TTL)
+        store.create("other", 2, TTL)
+        store.delete("a")
+
+        sessions = store.list_user_sessions(1)
+
+        assert [session.handle for session in sessions] == [session_handle("b")]
+        assert sessions[0].expires_at > time.time()
+        assert store.list_user_sessions(3) == []
+
+    def test_delete_user_session_checks_owner(self, store):
+        store.create("sid", 1, TTL)
+        handle = session_handle("sid")
+
+        assert store.delete_user_session(2, handle) is False
+        assert store.delete_user_session(1, "not-a-handle") is False
+        assert store.delete_user_session(1, handle) is True
+        assert store.get("sid") is None
+        assert store.list_user_sessions(1) == []
+
+    def test_delete_user_sessions_keeps_current(self, store):
+        for session_id in ("a", "b", "c"):
+            store.create(session_id, 1, TTL)
+        store.create("other", 2, TTL)
+
+        assert store.delete_user_sessions(1, keep_session_id="b") == 2
+        assert [store.get(sid) for sid in ("a", "b", "c", "other")] == [None, 1, None, 2]
+        assert store.delete_user_sessions(1) == 1
+        assert store.list_user_sessions(1) == []
+
+    def test_oldest_session_evicted_beyond_cap(self, store):
+        for i in range(5):
+            store.create(f"s{i}", 1, TTL)
+
+        assert [store.get(f"s{i}") for i in range(5)] == [None, None, 1, 1, 1]
+        assert len(store.list_user_sessions(1)) == 3
+
+
+def test_memory_store_expires_sessions():
+    """Expired sessions are reported as missing and removed on lookup."""
+    store = InMemorySessionStore()
+    store.create("sid", 1, TTL)
+
+    with patch("app.session_store.time.time", return_value=9_999_999_999):
+        assert store.get("sid") is None
+    assert len(store) == 0
+
+
+class TestSessionRecords:
+    """The in-memory store keeps compact records keyed by digests, not session ids."""
+
+    def test_keys_are_fixed_size_digests(self):
+        store = InMemorySessionStore(shards=1)
+        # Signed tokens like the real ones (~100 characters)
+        session_ids = [auth.session_serializer.dumps({"user_id": i}) for i in range(3)]
+        for user_id, session_id in enumerate(session_ids):
+            store.create(session_id, user_id, TTL)
+
+        sessions = store._shards[0].sessions
+
+        assert set(sessions) == {session_key(session_id) for session_id in session_ids}
+        assert all(len(key) == KEY_SIZE for key in sessions)
+        assert all(isinstance(record, SessionRecord) for record in sessions.values())
+        assert not hasattr(sessions[session_key(session_ids[0])], "__dict__")
+
+    def test_similar_ids_are_distinct_sessions(self):
+        store = InMemorySessionStore()
+        store.create("token", 1, TTL)
+        store.create("token2", 2, TTL)
+
+        assert store.delete("token") is True
+        assert store.get("token") is None
+        assert store.get("token2") == 2
+
+    def test_expiry_in_whole_seconds(self):
+        store = InMemorySessionStore()
+        with patch("app.session_store.time.time", return_value=1000.5):
+            store.create("sid", 1, timedelta(seconds=10))
+
+        record = store._shard(session_key("sid")).sessions[session_key("sid")]
+        assert record.expires_at == 1010
+        with patch("app.session_store.time.time", return_value=1009.9):
+            assert store.get("sid") == 1
+        with patch("app.session_store.time.time", return_value=1010):
+            assert store.get("sid") is None
+        assert len(store) == 0
+
+
+class TestInMemorySweep:
+    """Tests for the expiry index and background sweeper."""
+
+    def test_sweep_removes_only_expired(self):
+        store = InMemorySessionStore()
+        store.create("old", 1, timedelta(seconds=-1))
+        store.create("new", 2, TTL)
+
+        assert store.has_expired()
+        assert store.sweep(10) == 1
+        assert not store.has_expired()
+        assert store.get("new") == 2
+        assert len(store) == 1
+
+    def test_sweep_is_bounded_per_batch(self):
+        store = InMemorySessionStore()
+        for i in range(5):
+            store.create(f"s{i}", i, timedelta(seconds=-1))
+
+        assert store.sweep(2) == 2
+        assert len(store) == 3
+        assert store.sweep(10) == 3
+
+    def test_sweep_skips_touched_and_deleted_entries(self):
+        store = InMemorySessionStore()
+        store.create("touched", 1, TTL)
+        store.create("deleted", 2, TTL)
+        store.touch("touched", timedelta(hours=2))
+        store.delete("deleted")
+
+        with patch("app.session_store.time.time", return_value=time.time() + 5400):
+            assert store.sweep(10) == 0  # Only the outdated entry of "touched" was due
+            assert store.get("touched") == 1
+
+    def test_touch_does_not_grow_the_heap(self):
+        store = InMemorySessionStore(shards=1)
+        store.create("sid", 1, TTL)
+        heap = store._shards[0].expiry_heap
+
+        for _ in range(2000):
+            store.touch("sid", TTL)
+
+        assert len(heap) == 1
+
+    def test_sweep_requeues_touched_entries_once(self):
+        store = InMemorySessionStore(shards=1)
+        store.create("sid", 1, TTL)
+        store.touch("sid", timedelta(hours=2))
+        heap = store._shards[0].expiry_heap
+
+        with patch("app.session_store.time.time", return_value=time.time() + 5400):
+            assert store.sweep(10) == 0
+            assert not store.has_expired()
+        assert len(heap) == 1
+        with patch("app.session_store.time.time", return_value=time.time() + 7300):
+            assert store.sweep(10) == 1
+        assert heap == []
+        assert len(store) == 0
+
+    def test_background_sweeper(self):
+        store = InMemorySessionStore()
+        for i in range(7):
+            store.create(f"s{i}", i, timedelta(seconds=-1))
+        store.create("live", 99, TTL)
+        evicted_before = metrics.counter("sessions_evicted_total").value
+
+        async def scenario():
+            task = asyncio.create_task(run_session_sweeper(store, interval=60, batch_size=3))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(scenario())
+
+        assert len(store) == 1
+        assert metrics.counter("sessions_evicted_total").value == evicted_before + 7
+        assert metrics.gauge("sessions_live").value == 1
+
+
+class TestDatabaseSessionStore:
+    """Tests specific to the sessions table backend."""
+
+    @pytest.fixture
+    def db_store(self, test_db) -> DatabaseSessionStore:
+        return DatabaseSessionStore(sessionmaker(bind=test_db.get_bind()))
+
+    def test_get_user_single_join(self, db_store, test_db):
+        user = User(email="join@example.com", password_hash="x", auth_provider="email")
+        test_db.add(user)
+        test_db.commit()
+        db_store.create("sid", user.id, TTL)
+        db_store.create("expired", user.id, timedelta(seconds=-1))
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = test_db.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert db_store.get_user(test_db, "sid").email == "join@example.com"
+            assert db_store.get_user(test_db, "expired") is None
+            assert db_store.get_user(test_db, "missing") is None
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert len(statements) == 3
+        assert "JOIN sessions" in statements[0]
+
+    def test_sweep_purges_in_batches(self, db_store):
+        for i in range(5):
+            db_store.create(f"old{i}", 1, timedelta(seconds=-1))
+        db_store.create("new", 1, TTL)
+
+        assert db_store.has_expired()
+        assert db_store.sweep(2) == 2
+        assert db_store.sweep(10) == 3
+        assert not db_store.has_expired()
+        assert db_store.get("new") == 1
+
+    def test_endpoints_use_the_join(self, client, test_db, db_store):
+        user = User(email="db@example.com", password_hash="x", auth_provider="email")
+        test_db.add(user)
+        test_db.commit()
+        with patch.object(auth, "session_store", db_store):
+            client.cookies.set("session_id", auth.create_session(user.id))
+
+            assert client.get("/api/auth/me").json()["email"] == "db@example.com"
+            assert client.get("/api/dashboard/data").json()["user_email"] == "db@example.com"
+            assert len(client.get("/api/auth/sessions").json()) == 1
+
+
+def test_memory_user_index_follows_sweep_and_restore(tmp_path):
+    """Swept sessions leave the per-user index; restore() rebuilds it."""
+    store = InMemorySessionStore()
+    store.create("expired", 1, timedelta(seconds=-1))
+    store.create("live", 1, TTL)
+    store.sweep(10)
+
+    assert [s.handle for s in store.list_user_sessions(1)] == [session_handle("live")]
+
+    SessionJournal(tmp_path).snapshot(store)
+    restored = InMemorySessionStore(shards=4)
+    SessionJournal(tmp_path).restore(restored)
+    assert restored.list_user_sessions(1) == store.list_user_sessions(1)
+    assert restored.delete_user_sessions(1) == 1
+
+
+def test_memory_user_index_stores_a_single_session_as_a_bare_key():
+    """One-session users cost a key in the index, not a one-element list."""
+    store = InMemorySessionStore(max_sessions_per_user=2)
+    users = store._user_shard(1).users
+
+    store.create("a", 1, TTL)
+    assert users[1] == session_key("a")
+    store.create("b", 1, TTL)
+    assert users[1] == [session_key("a"), session_key("b")]
+    store.create("c", 1, TTL)  # Evicts "a"
+    assert users[1] == [session_key("b"), session_key("c")]
+    store.delete("b")
+    assert users[1] == session_key("c")
+    assert [s.handle for s in store.list_user_sessions(1)] == [session_handle("c")]
+    store.create("d", 1, TTL)
+    assert store.delete_user_sessions(1, keep_session_id="d") == 1
+    assert users[1] == session_key("d")
+    store.delete("d")
+    assert 1 not in users
+
+
+class TestSessionEndpoints:
+    """Tests for listing and revoking the current user's sessions."""
+
+    @pytest.fixture
+    def sessions(self, client) -> Generator[list[str], None, None]:
+        with patch.object(auth, "session_store", InMemorySessionStore()):
+            ids = [auth.create_session(5) for _ in range(3)]
+            client.cookies.set("session_id", ids[-1])
+            yield ids
+
+    def test_requires_authentication(self, client):
+        assert client.get("/api/auth/sessions").status_code == 401
+        assert client.delete("/api/auth/sessions").status_code == 401
+
+    def test_list_sessions(self, client, sessions):
+        response = client.get("/api/auth/sessions")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [item["id"] for item in body] == [session_handle(sid) for sid in sessions]
+        assert [item["current"] for item in body] == [False, False, True]
+
+    def test_revoke_one_session(self, client, sessions):
+        handle = session_handle(sessions[0])
+
+        assert client.delete(f"/api/auth/sessions/{handle}").status_code == 200
+        assert client.delete(f"/api/auth/sessions/{handle}").status_code == 404
+        assert auth.get_user_from_session(sessions[0]) is None
+        assert auth.get_user_from_session(sessions[1]) == 5
+
+    def test_log_out_everywhere_else(self, client, sessions):
+        response = client.delete("/api/auth/sessions")
+
+        assert response.json() == {"revoked": 2}
+        assert [auth.get_user_from_session(sid) for sid in sessions] == [None, None, 5]
+
+    def test_log_out_everywhere(self, client, sessions):
+        response = client.delete("/api/auth/sessions", params={"keep_current": "false"})
+
+        assert response.json() == {"revoked": 3}
+        assert client.get("/api/auth/sessions").status_code == 401
+
+
+class TestInMemoryConcurrency:
+    """Stress tests for the lock-striped in-memory store."""
+
+    def test_concurrent_create_get_touch_delete(self):
+        """Threads hammering the store never see each other's sessions or lose writes."""
+        store = InMemorySessionStore(shards=4)
+        threads_count, per_thread = 8, 500
+        errors: list[str] = []
+        barrier = threading.Barrier(threads_count)
+
+        def worker(thread_id: int) -> None:
+            barrier.wait()
+            ids = [f"t{thread_id}-s{i}" for i in range(per_thread)]
+            for session_id in ids:
+                store.create(session_id, thread_id, TTL)
+            for session_id in ids:
+                if store.get(session_id) != thread_id:
+                    errors.append(f"lost {session_id}")
+                store.touch(session_id, TTL)
+            # Delete every other session, twice: only the first delete succeeds
+            for session_id in ids[::2]:
+                if not store.delete(session_id):
+                    errors.append(f"double delete {session_id}")
+                if store.delete(session_id):
+                    errors.append(f"deleted twice {session_id}")
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(store) == threads_count * per_thread // 2
+        assert store.get("t3-s1") == 3
+        assert store.get("t3-s0") is None
+
+    def test_concurrent_readers_and_sweeper(self):
+        """Readers keep working while the sweeper removes expired sessions."""
+        store = InMemorySessionStore(shards=4)
+        for i in range(2000):
+            store.create(f"expired-{i}", i, timedelta(seconds=-1))
+            store.create(f"live-{i}", i, TTL)
+        misses: list[str] = []
+        done = threading.Event()
+
+        def reader() -> None:
+            while not done.is_set():
+                for i in range(0, 2000, 97):
+                    if store.get(f"live-{i}") != i:
+                        misses.append(f"live-{i}")
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        while store.has_expired():
+            store.sweep(100)
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        assert misses == []
+        assert len(store) == 2000
+
+
+def test_redis_store_uses_native_ttl():
+    """Redis keys carry the session TTL and touch resets it."""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    store = RedisSessionStore(client)
+
+    store.create("sid", 7, timedelta(seconds=30))
+    key = "session:" + session_handle("sid")
+    assert 0 < client.ttl(key) <= 30
+    assert 0 < client.ttl("user_sessions:7") <= 30
+
+    store.touch_many(["sid"], TTL)
+    assert client.ttl(key) > 30
+    assert client.ttl("user_sessions:7") > 30
+
+
+class TestStatelessSessionStore:
+    """Tests for signed, stateless sessions with a revocation list."""
+
+    @pytest.fixture
+    def stateless(self) -> Generator[StatelessSessionStore, None, None]:
+        store = StatelessSessionStore(auth.session_serializer, TTL)
+        with patch.object(auth, "session_store", store):
+            yield store
+
+    def test_token_is_the_session(self, stateless):
+        session_id = auth.create_session(11)
+
+        assert auth.get_user_from_session(session_id) == 11
+        assert len(stateless.revocations) == 0
+
+    def test_logout_revokes_only_that_token(self, stateless):
+        first = auth.create_session(11)
+        second = auth.create_session(11)
+
+        assert auth.delete_session(first) is True
+        assert auth.delete_session(first) is False
+        assert auth.get_user_from_session(first) is None
+        assert auth.get_user_from_session(second) == 11
+
+    def test_rejects_tampered_and_expired_tokens(self, stateless):
+        session_id = auth.create_session(11)
+
+        assert auth.get_user_from_session(session_id + "x") is None
+        with patch("itsdangerous.timed.time.time", return_value=time.time() + 7200):
+            assert auth.get_user_from_session(session_id) is None
+
+    def test_log_out_everywhere(self, stateless):
+        first = auth.create_session(11)
+        current = auth.create_session(11)
+        other_user = auth.create_session(12)
+
+        assert stateless.delete_user_sessions(11, keep_session_id=current) == 0
+        assert auth.get_user_from_session(first) is None
+        assert auth.get_user_from_session(current) == 11
+        assert auth.get_user_from_session(other_user) == 12
+        assert stateless.list_user_sessions(11) == []
+
+        with patch("app.session_store.time.time", return_value=time.time() + 7200):
+            assert stateless.sweep(10) == 1  # The cutoff outlived every token it covers
+
+    def test_login_right_after_log_out_everywhere(self, stateless):
+        """Tokens are signed in whole seconds: a login in the cutoff's second stays valid."""
+        now = math.floor(time.time()) + 0.2
+
+        def token_issued_at(issued_at: float) -> str:
+            created_at = datetime.fromtimestamp(issued_at, UTC).replace(tzinfo=None)
+            with patch("itsdangerous.timed.time.time", return_value=issued_at):
+                return auth.session_serializer.dumps(
+                    {"user_id": 11, "created_at": created_at.isoformat(), "jti": str(issued_at)}
+                )
+
+        old = token_issued_at(now)
+        with patch("app.session_store.time.time", return_value=now + 0.3):
+            stateless.delete_user_sessions(11)
+        new = token_issued_at(now + 0.6)
+
+        assert auth.get_user_from_session(old) is None
+        assert auth.get_user_from_session(new) == 11
+
+    def test_log_out_everywhere_without_created_at(self, stateless):
+        """Tokens without created_at fall back to the signature's whole seconds."""
+        now = math.floor(time.time()) + 0.2
+        with patch("itsdangerous.timed.time.time", return_value=now - 1):
+            old = auth.session_serializer.dumps({"user_id": 11, "jti": "old"})
+        with patch("app.session_store.time.time", return_value=now):
+            stateless.delete_user_sessions(11)
+        with patch("itsdangerous.timed.time.time", return_value=now + 0.3):
+            new = auth.session_serializer.dumps({"user_id": 11, "jti": "new"})
+
+        assert auth.get_user_from_session(old) is None
+        assert auth.get_user_from_session(new) == 11
+
+    def test_sweep_forgets_expired_revocations(self, stateless):
+        session_id = auth.create_session(11)
+        auth.delete_session(session_id)
+
+        assert stateless.sweep(10) == 0  # Token not expired yet
+        with patch("app.session_store.time.time", return_value=time.time() + 2 * 3600 + 1):
+            assert stateless.has_expired()
+            assert stateless.sweep(10) == 1
+        assert len(stateless.revocations) == 0
+
+
+def test_revocation_list_prune_is_bounded():
+    revocations = RevocationList(bucket_seconds=10)
+    for i in range(5):
+        revocations.revoke(f"t{i}", expires_at=100.0 + i)
+
+    with patch("app.session_store.time.time", return_value=1000.0):
+        assert revocations.prune(3) == 3
+        assert len(revocations) == 2
+        assert revocations.prune(3) == 2
+        assert not revocations.has_expired()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown SESSION_BACKEND"):
+        create_session_store(auth.session_serializer, TTL, backend="memcached")
+
+
+def test_auth_helpers_delegate_to_store():
+    """create_session / get_user_from_session / delete_session use the configured store."""
+    fakeredis = pytest.importorskip("fakeredis")
+    with patch.object(auth, "session_store", RedisSessionStore(fakeredis.FakeRedis())):
+        session_id = auth.create_session(5)
+
+        assert auth.get_user_from_session(session_id) == 5
+        assert auth.delete_session(session_id) is True
+        assert auth.get_user_from_session(session_id) is None
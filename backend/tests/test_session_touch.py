@@ -0,0 +1,128 @@
+"""Tests for sliding session expiration (coalesced, write-behind touches)."""
+
+import asyncio
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app import auth, metrics
+from app.models import User
+from app.session_store import InMemorySessionStore
+from app.session_touch import SessionTouchBuffer, flush_touches, run_touch_flusher
+
+TTL = timedelta(hours=1)
+
+
+class TestSessionTouchBuffer:
+    """Tests for touch coalescing and batched flushes."""
+
+    def test_touches_coalesced_per_interval(self):
+        buffer = SessionTouchBuffer(interval=60, enabled=True)
+
+        assert buffer.record("sid") is True
+        assert buffer.record("sid") is False
+        assert buffer.record("other") is True
+        assert buffer.drain() == ["sid", "other"]
+        assert buffer.drain() == []
+
+        with patch("app.session_touch.time.monotonic", return_value=time.monotonic() + 61):
+            assert buffer.record("sid") is True
+
+    def test_fresh_session_not_touched(self):
+        buffer = SessionTouchBuffer(interval=60, enabled=True)
+        buffer.mark_fresh("sid")
+
+        assert buffer.record("sid") is False
+
+    def test_drain_forgets_old_touches(self):
+        buffer = SessionTouchBuffer(interval=60, enabled=True)
+        buffer.record("sid")
+
+        with patch("app.session_touch.time.monotonic", return_value=time.monotonic() + 61):
+            buffer.drain()
+        assert len(buffer._last_touch) == 0
+
+    def test_disabled(self):
+        buffer = SessionTouchBuffer(interval=60, enabled=False)
+
+        assert buffer.record("sid") is False
+        assert buffer.drain() == []
+
+    def test_flush_extends_sessions_in_batches(self):
+        store = InMemorySessionStore()
+        for i in range(5):
+            store.create(f"s{i}", i, timedelta(seconds=10))
+        buffer = SessionTouchBuffer(interval=60, enabled=True)
+        for i in range(5):
+            buffer.record(f"s{i}")
+        buffer.record("missing")
+
+        with patch.object(store, "touch_many", wraps=store.touch_many) as touch_many:
+            assert flush_touches(buffer, store, TTL, batch_size=2) == 5
+
+        assert touch_many.call_count == 3
+        with patch("app.session_store.time.time", return_value=time.time() + 1800):
+            assert store.get("s4") == 4
+
+    def test_background_flusher_flushes_on_shutdown(self):
+        buffer = SessionTouchBuffer(interval=60, enabled=True)
+        buffer.record("sid")
+        flushed: list[list[str]] = []
+
+        def flush() -> int:
+            flushed.append(buffer.drain())
+            return len(flushed[-1])
+
+        async def scenario():
+            task = asyncio.create_task(run_touch_flusher(flush, interval=60))
+            await asyncio.sleep(0)
+            task.cancel()
+
+        asyncio.run(scenario())
+
+        assert flushed == [["sid"]]
+
+    def test_failing_final_flush_does_not_block_shutdown(self, caplog):
+        def flush() -> int:
+            raise RuntimeError("database unavailable")
+
+        async def scenario():
+            task = asyncio.create_task(run_touch_flusher(flush, interval=60))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+
+        assert "Final session touch flush failed" in caplog.text
+
+
+def test_requests_extend_session_without_a_write_per_request(client, test_db):
+    """Authenticated requests schedule one touch per interval and refresh the cookie."""
+    user = User(email="slide@example.com", password_hash="x", auth_provider="email")
+    test_db.add(user)
+    test_db.commit()
+    store = InMemorySessionStore()
+    buffer = SessionTouchBuffer(interval=60, enabled=True)
+    with patch.object(auth, "session_store", store), patch.object(auth, "session_touches", buffer):
+        session_id = auth.create_session(user.id)
+        client.cookies.set("session_id", session_id)
+        coalesced_before = metrics.counter("session_touches_coalesced_total").value
+
+        # Right after login the session is fresh: nothing to touch
+        assert "set-cookie" not in client.get("/api/auth/me").headers
+        assert len(buffer) == 0
+
+        with patch("app.session_touch.time.monotonic", return_value=time.monotonic() + 61):
+            first = client.get("/api/dashboard/data")
+            second = client.get("/api/auth/me")
+
+        assert "session_id=" in first.headers["set-cookie"]
+        assert "set-cookie" not in second.headers
+        assert metrics.counter("session_touches_coalesced_total").value == coalesced_before + 2
+        with patch.object(store, "touch_many", wraps=store.touch_many) as touch_many:
+            assert auth.flush_session_touches() == 1
+        touch_many.assert_called_once()
@@ -0,0 +1,102 @@
+"""Tests for the streaming table exports."""
+
+import asyncio
+import csv
+import io
+import json
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app import database
+from app.auth import create_session
+from app.models import Product, SalesEvent, User
+from app.table_export import stream_table
+
+
+@pytest.fixture
+def user(test_db) -> User:
+    user = User(email="seller@example.com", password_hash="x", auth_provider="email")
+    other = User(email="other@example.com", password_hash="x", auth_provider="email")
+    test_db.add_all([user, other])
+    test_db.commit()
+    test_db.execute(
+        insert(Product),
+        [
+            {"user_id": owner.id, "nome": f"Produto {i}", "status": "Ativo", "valor_cents": 1050}
+            for owner in (user, other)
+            for i in range(25)
+        ],
+    )
+    test_db.execute(
+        insert(SalesEvent),
+        [
+            {
+                "user_id": user.id,
+                "occurred_at": datetime(2026, 10, day, tzinfo=UTC),
+                "amount_cents": 199,
+            }
+            for day in (3, 1, 2)
+        ],
+    )
+    test_db.commit()
+    return user
+
+
+@pytest.fixture
+def export_client(client, user, async_session_factory, monkeypatch):
+    """Client whose export streams read the test database."""
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_session_factory)
+    client.cookies.set("session_id", create_session(user.id))
+    return client
+
+
+class TestExportEndpoint:
+    """Tests for GET /api/dashboard/export/{table}."""
+
+    def test_products_csv(self, export_client):
+        response = export_client.get("/api/dashboard/export/products")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        assert 'filename="products.csv"' in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 25
+        assert rows[0] == {"id": "1", "nome": "Produto 0", "status": "Ativo", "valor": "10.5"}
+
+    def test_sales_ndjson(self, export_client):
+        response = export_client.get("/api/dashboard/export/sales", params={"format": "ndjson"})
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [row["occurred_at"][:10] for row in rows] == [
+            "2026-10-01",
+            "2026-10-02",
+            "2026-10-03",
+        ]
+        assert rows[0]["amount"] == 1.99
+
+    @pytest.mark.parametrize(
+        ("path", "params"),
+        [("/api/dashboard/export/users", {}), ("/api/dashboard/export/products", {"format": "xml"})],
+    )
+    def test_invalid_params(self, export_client, path, params):
+        assert export_client.get(path, params=params).status_code == 422
+
+    def test_requires_authentication(self, client):
+        assert client.get("/api/dashboard/export/products").status_code == 401
+
+
+def test_one_chunk_per_batch(user, async_session_factory):
+    async def chunks():
+        return [
+            chunk
+            async for chunk in stream_table(
+                async_session_factory, user.id, "products", "ndjson", batch_size=10
+            )
+        ]
+
+    result = asyncio.run(chunks())
+
+    assert [chunk.count(b"\n") for chunk in result] == [10, 10, 5]
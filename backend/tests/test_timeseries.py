@@ -0,0 +1,90 @@
+"""Tests for the vectorized time-series helpers."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.timeseries import aggregate, bucket_range, bucket_start, lttb, moving_average
+
+
+def _days(*days: str) -> np.ndarray:
+    return np.array(days, dtype="datetime64[D]")
+
+
+class TestBuckets:
+    """Tests for bucket starts and aggregation."""
+
+    def test_bucket_start(self):
+        days = _days("2026-10-17", "2026-10-12", "2026-01-01")
+
+        assert (bucket_start(days, "day") == days).all()
+        assert (
+            bucket_start(days, "week") == _days("2026-10-12", "2026-10-12", "2025-12-29")
+        ).all()
+        assert (
+            bucket_start(days, "month") == _days("2026-10-01", "2026-10-01", "2026-01-01")
+        ).all()
+
+    @pytest.mark.parametrize(
+        ("bucket", "expected"),
+        [
+            ("day", ["2026-10-14", "2026-10-15", "2026-10-16", "2026-10-17"]),
+            ("week", ["2026-10-05", "2026-10-12"]),
+            ("month", ["2026-10-01"]),
+        ],
+    )
+    def test_bucket_range(self, bucket, expected):
+        starts = bucket_range(date(2026, 10, 11), date(2026, 10, 17), bucket)
+
+        assert starts.astype(str).tolist()[-len(expected) :] == expected
+
+    @pytest.mark.filterwarnings("error::DeprecationWarning")
+    def test_month_range_across_years(self):
+        starts = bucket_range(date(2025, 11, 20), date(2026, 2, 3), "month")
+
+        assert starts.astype(str).tolist() == ["2025-11-01", "2025-12-01", "2026-01-01", "2026-02-01"]
+
+    def test_aggregate_fills_gaps(self):
+        starts = bucket_range(date(2026, 10, 1), date(2026, 10, 31), "week")
+
+        counts, amounts = aggregate(
+            starts, "week", _days("2026-10-02", "2026-10-03", "2026-10-20"), [1, 2, 3], [10, 20, 30]
+        )
+
+        assert counts.tolist() == [3, 0, 0, 3, 0]
+        assert amounts.tolist() == [30, 0, 0, 30, 0]
+
+    def test_aggregate_without_rows(self):
+        starts = bucket_range(date(2026, 10, 1), date(2026, 10, 7), "day")
+
+        (counts,) = aggregate(starts, "day", _days(), [])
+
+        assert counts.tolist() == [0] * 7
+
+
+def test_moving_average():
+    assert moving_average([1, 2, 3, 4, 5], 3).tolist() == [1.0, 1.5, 2.0, 3.0, 4.0]
+
+
+class TestLttb:
+    """Tests for Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_ends_and_extremes(self):
+        x = np.arange(1000)
+        y = np.sin(x / 50)
+        y[500], y[720] = 5, -5
+
+        kept = lttb(x, y, 30)
+
+        assert len(kept) == 30
+        assert kept[0] == 0 and kept[-1] == 999
+        assert (np.diff(kept) > 0).all()
+        assert 500 in kept and 720 in kept
+
+    def test_short_series_unchanged(self):
+        assert lttb([0, 1, 2], [5, 6, 7], 10).tolist() == [0, 1, 2]
+
+    def test_needs_three_points(self):
+        with pytest.raises(ValueError):
+            lttb(np.arange(10), np.arange(10), 2)
@@ -0,0 +1,205 @@
+"""Tests for the bulk user import/export CLI."""
+
+import csv
+import io
+import json
+import sys
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, func, select
+
+from app import database
+from app.models import User
+from app.user_bulk import (
+    InvalidRowError,
+    export_users,
+    import_users,
+    main,
+    read_rows,
+    validate_row,
+)
+
+# Pre-hashed password from another system ("legacy-password")
+LEGACY_HASH = CryptContext(schemes=["bcrypt"]).hash("legacy-password", rounds=4)
+
+
+@pytest.fixture
+def engine(test_db, test_db_path):
+    """Sync engine on the (already created) test database."""
+    engine = create_engine(f"sqlite:///{test_db_path}")
+    yield engine
+    engine.dispose()
+
+
+def _import(engine, text: str, fmt: str = "ndjson", **kwargs):
+    kwargs.setdefault("workers", 0)
+    kwargs.setdefault("rounds", 4)
+    return import_users(engine, read_rows(io.StringIO(text), fmt), **kwargs)
+
+
+def _ndjson(*rows: dict) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+class TestValidateRow:
+    """Tests for input row validation."""
+
+    def test_password_row(self):
+        user = validate_row({"email": "Ana@Example.com", "password": "secret123"})
+
+        assert user.email == "Ana@example.com"
+        assert user.password == "secret123"
+        assert user.auth_provider == "email"
+
+    def test_google_row(self):
+        user = validate_row({"email": "g@example.com", "google_id": "123"})
+
+        assert user.auth_provider == "google"
+        assert user.password is None
+
+    @pytest.mark.parametrize(
+        "row",
+        [
+            {"email": "not-an-email", "password": "secret123"},
+            {"email": "a@example.com", "password": "short"},
+            {"email": "a@example.com", "password_hash": "plaintext"},
+            {"email": "a@example.com", "password": "secret123", "password_hash": LEGACY_HASH},
+            {"email": "a@example.com", "auth_provider": "github"},
+            {"password": "secret123"},
+        ],
+    )
+    def test_invalid_rows(self, row):
+        with pytest.raises(InvalidRowError):
+            validate_row(row)
+
+
+class TestImport:
+    """Tests for import_users."""
+
+    def test_import_ndjson(self, engine, test_db):
+        result = _import(
+            engine,
+            _ndjson(
+                {"email": "a@example.com", "password": "secret123"},
+                {"email": "b@example.com", "password_hash": LEGACY_HASH},
+                {"email": "c@example.com", "google_id": "g-1"},
+            ),
+        )
+
+        assert (result.rows, result.inserted, result.skipped, result.rejected) == (3, 3, 0, 0)
+        assert result.rows_per_second > 0
+        users = {u.email: u for u in test_db.scalars(select(User))}
+        context = CryptContext(schemes=["bcrypt"])
+        assert context.verify("secret123", users["a@example.com"].password_hash)
+        assert users["b@example.com"].password_hash == LEGACY_HASH
+        assert users["c@example.com"].auth_provider == "google"
+        assert users["c@example.com"].google_id == "g-1"
+        assert users["c@example.com"].created_at is not None
+
+    def test_import_csv_in_batches(self, engine, test_db):
+        lines = ["email,password,password_hash,google_id"]
+        lines += [f"user{i}@example.com,secret{i:04d},," for i in range(25)]
+
+        result = _import(engine, "\n".join(lines) + "\n", fmt="csv", batch_size=10)
+
+        assert result.inserted == 25
+        assert test_db.scalar(select(func.count()).select_from(User)) == 25
+
+    def test_existing_users_skipped(self, engine, test_db):
+        test_db.add(User(email="taken@example.com", auth_provider="email"))
+        test_db.add(User(email="other@example.com", google_id="g-1", auth_provider="google"))
+        test_db.commit()
+
+        result = _import(
+            engine,
+            _ndjson(
+                {"email": "taken@example.com", "password": "secret123"},
+                {"email": "new-google@example.com", "google_id": "g-1"},
+                {"email": "new@example.com", "password": "secret123"},
+            ),
+        )
+
+        assert (result.inserted, result.skipped) == (1, 2)
+        assert test_db.scalar(select(func.count()).select_from(User)) == 3
+
+    def test_invalid_rows_reported_and_skipped(self, engine, test_db):
+        messages = []
+
+        result = _import(
+            engine,
+            '{"email": "ok@example.com", "password": "secret123"}\n'
+            "{not json\n"
+            '{"email": "bad", "password": "secret123"}\n',
+            report=messages.append,
+        )
+
+        assert (result.rows, result.inserted, result.rejected) == (3, 1, 2)
+        assert any(m.startswith("line 2: invalid JSON") for m in messages)
+        assert any(m.startswith("line 3:") for m in messages)
+
+    def test_process_pool_hashing(self, engine, test_db):
+        result = _import(
+            engine,
+            _ndjson(*({"email": f"p{i}@example.com", "password": "secret123"} for i in range(4))),
+            workers=2,
+        )
+
+        assert result.inserted == 4
+        hashes = test_db.scalars(select(User.password_hash)).all()
+        assert all(h.startswith("$2b$04$") for h in hashes)
+
+
+class TestExport:
+    """Tests for export_users."""
+
+    @pytest.fixture
+    def users(self, engine):
+        _import(
+            engine,
+            _ndjson(
+                {"email": "a@example.com", "password_hash": LEGACY_HASH},
+                {"email": "g@example.com", "google_id": "g-1"},
+            ),
+        )
+
+    def test_export_ndjson(self, engine, users):
+        out = io.StringIO()
+
+        result = export_users(engine, out, "ndjson", batch_size=1)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert result.rows == 2
+        assert [r["email"] for r in rows] == ["a@example.com", "g@example.com"]
+        assert rows[1]["google_id"] == "g-1"
+        assert "password_hash" not in rows[0]
+
+    def test_cli_export_to_stdout_leaves_it_open(self, engine, users, monkeypatch):
+        out = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", out)
+        monkeypatch.setattr(database, "engine", engine)
+
+        main(["export", "-", "--format", "ndjson"])
+
+        assert not out.closed
+        assert len(out.getvalue().splitlines()) == 2
+
+    def test_export_csv_with_hashes(self, engine, users):
+        out = io.StringIO()
+
+        export_users(engine, out, "csv", with_password_hashes=True)
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert rows[0]["password_hash"] == LEGACY_HASH
+        assert rows[1]["password_hash"] == ""
+
+    def test_round_trip(self, engine, users, tmp_path):
+        out = io.StringIO()
+        export_users(engine, out, "ndjson", with_password_hashes=True)
+        target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+        User.metadata.create_all(target)
+
+        result = _import(target, out.getvalue())
+
+        assert result.inserted == 2
+        target.dispose()
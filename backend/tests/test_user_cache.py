@@ -0,0 +1,126 @@
+"""Tests for the current-user snapshot cache."""
+
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import metrics
+from app.auth import create_session
+from app.models import User
+from app.user_cache import UserCache, get_cached_user, user_cache
+
+
+def _add_user(test_db, email: str = "cached@example.com") -> User:
+    user = User(email=email, password_hash="x", auth_provider="email")
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+
+class TestUserCache:
+    """Tests for LRU + TTL behavior."""
+
+    def test_hit_and_miss(self, test_db):
+        user = _add_user(test_db)
+        cache = UserCache(max_size=10, ttl=60)
+
+        assert cache.get(user.id) is None
+        snapshot = cache.put(user)
+
+        assert cache.get(user.id) == snapshot
+        assert snapshot.email == "cached@example.com"
+
+    def test_entries_expire(self, test_db):
+        user = _add_user(test_db)
+        cache = UserCache(max_size=10, ttl=60)
+        cache.put(user)
+
+        with patch("app.user_cache.time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get(user.id) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, test_db):
+        users = [_add_user(test_db, f"u{i}@example.com") for i in range(3)]
+        cache = UserCache(max_size=2, ttl=60)
+        cache.put(users[0])
+        cache.put(users[1])
+        cache.get(users[0].id)  # users[0] is now the most recently used
+        cache.put(users[2])  # evicts users[1]
+
+        assert cache.get(users[1].id) is None
+        assert cache.get(users[0].id) is not None
+
+    def test_disabled(self, test_db):
+        cache = UserCache(enabled=False)
+        cache.put(_add_user(test_db))
+
+        assert len(cache) == 0
+
+
+@contextmanager
+def count_queries() -> Iterator[list[str]]:
+    """Record the SQL statements run by any engine (sync or async)."""
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def test_get_cached_user_queries_once(test_db, async_session_factory):
+    user = _add_user(test_db)
+    hits_before = metrics.counter("user_cache_hits_total").value
+    misses_before = metrics.counter("user_cache_misses_total").value
+
+    async def scenario():
+        async with async_session_factory() as db:
+            with count_queries() as statements:
+                first = await get_cached_user(db, user.id)
+                second = await get_cached_user(db, user.id)
+            assert await get_cached_user(db, 999) is None
+        return first, second, statements
+
+    first, second, statements = asyncio.run(scenario())
+
+    assert first == second
+    assert len(statements) == 1
+    assert metrics.counter("user_cache_hits_total").value == hits_before + 1
+    assert metrics.counter("user_cache_misses_total").value == misses_before + 2
+
+
+def test_orm_update_invalidates(test_db):
+    user = _add_user(test_db)
+    user_cache.put(user)
+
+    user.auth_provider = "google"
+    test_db.commit()
+
+    assert user_cache.get(user.id) is None
+
+
+def test_authenticated_requests_skip_the_database(client, test_db):
+    """/me and the dashboard share the cached snapshot."""
+    user = _add_user(test_db)
+    client.cookies.set("session_id", create_session(user.id))
+
+    assert client.get("/api/auth/me").status_code == 200
+    # The dashboard payload itself comes from the response cache once built
+    assert client.get("/api/dashboard/data").status_code == 200
+    with count_queries() as statements:
+        me = client.get("/api/auth/me")
+        dashboard = client.get("/api/dashboard/data")
+
+    assert statements == []
+    assert me.json()["email"] == "cached@example.com"
+    assert dashboard.json()["user_email"] == "cached@example.com"
@@ -0,0 +1,152 @@
+"""Tests for the user repository (pre-built lookups and upserts)."""
+
+import asyncio
+from unittest.mock import patch
+
+from app.models import User
+from app.user_repository import (
+    get_user_by_email,
+    get_user_by_google_id,
+    get_user_row,
+    insert_user,
+    upsert_google_user,
+)
+from tests.test_user_cache import count_queries
+
+
+def _add_user(test_db) -> User:
+    user = User(
+        email="repo@example.com",
+        password_hash="x",
+        google_id="google-123",
+        auth_provider="google",
+    )
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+
+class TestUserRepository:
+    """Tests for the lookups by id, email and google_id."""
+
+    def test_lookups(self, test_db, async_session_factory):
+        user = _add_user(test_db)
+
+        async def scenario():
+            async with async_session_factory() as db:
+                return (
+                    await get_user_by_email(db, "repo@example.com"),
+                    await get_user_by_google_id(db, "google-123"),
+                    await get_user_by_email(db, "missing@example.com"),
+                    await get_user_by_google_id(db, "missing"),
+                )
+
+        by_email, by_google_id, missing_email, missing_google_id = asyncio.run(scenario())
+
+        assert by_email.id == user.id
+        assert by_google_id.id == user.id
+        assert missing_email is None
+        assert missing_google_id is None
+
+    def test_row_has_only_response_columns(self, test_db, async_session_factory):
+        user = _add_user(test_db)
+
+        async def scenario():
+            async with async_session_factory() as db:
+                return await get_user_row(db, user.id), await get_user_row(db, 999)
+
+        row, missing = asyncio.run(scenario())
+
+        assert row._asdict() == {
+            "id": user.id,
+            "email": "repo@example.com",
+            "auth_provider": "google",
+            "created_at": user.created_at,
+        }
+        assert missing is None
+
+
+class TestUpserts:
+    """Tests for the single-statement signup and Google sign-in writes."""
+
+    def test_insert_user(self, test_db, async_session_factory):
+        async def scenario():
+            async with async_session_factory() as db:
+                with count_queries() as statements:
+                    created = await insert_user(db, "new@example.com", "hash")
+                duplicate = await insert_user(db, "new@example.com", "other")
+                await db.commit()
+            return created, duplicate, statements
+
+        created, duplicate, statements = asyncio.run(scenario())
+
+        assert created.email == "new@example.com"
+        assert created.auth_provider == "email"
+        assert created.created_at is not None
+        assert duplicate is None
+        assert len(statements) == 1
+        user = test_db.query(User).filter(User.email == "new@example.com").one()
+        assert user.password_hash == "hash"
+
+    def test_google_create_link_and_login(self, test_db, async_session_factory):
+        test_db.add(User(email="linked@example.com", password_hash="x", auth_provider="email"))
+        test_db.commit()
+
+        async def scenario():
+            async with async_session_factory() as db:
+                created = await upsert_google_user(db, "g@example.com", "g-1")
+                linked = await upsert_google_user(db, "linked@example.com", "g-2")
+                await db.commit()
+                with count_queries() as statements:
+                    again = await upsert_google_user(db, "g@example.com", "g-1")
+            return created, linked, again, statements
+
+        created, linked, again, statements = asyncio.run(scenario())
+
+        # A returning user is one read
+        assert len(statements) == 1
+        assert statements[0].lstrip().upper().startswith("SELECT")
+        assert created.auth_provider == "google"
+        assert again.id == created.id
+        assert linked.auth_provider == "google"
+        linked_user = test_db.get(User, linked.id)
+        test_db.refresh(linked_user)
+        assert linked_user.google_id == "g-2"
+        assert linked_user.password_hash == "x"
+        assert test_db.query(User).count() == 2
+
+    def test_google_id_taken_concurrently(self, test_db, async_session_factory):
+        """The unique violation of a concurrent sign-in resolves to the existing user."""
+        user = _add_user(test_db)
+
+        reads = []
+
+        async def read_missing_first(db, google_id):
+            # The first read misses, as if the user was created meanwhile
+            reads.append(google_id)
+            return None if len(reads) == 1 else await get_user_by_google_id(db, google_id)
+
+        async def scenario():
+            async with async_session_factory() as db:
+                with patch("app.user_repository.get_user_by_google_id", read_missing_first):
+                    row = await upsert_google_user(db, "renamed@example.com", "google-123")
+                await db.commit()
+            return row
+
+        row = asyncio.run(scenario())
+
+        assert len(reads) == 2
+        assert row.id == user.id
+        assert row.email == "repo@example.com"
+        assert test_db.query(User).count() == 1
+
+
+def test_signup_rejects_registered_email(client):
+    body = {"email": "twice@example.com", "password": "SecurePass123"}
+
+    assert client.post("/api/auth/signup", json=body).status_code == 201
+    response = client.post("/api/auth/signup", json=body)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"